@@ -1,23 +1,35 @@
+# Bibliotecas pesadas (plotly, scipy.stats, scikit-learn, matplotlib) são importadas pelas seções e
+# funções que as usam, para que a página comece a ser desenhada antes de carregá-las
+# (medição: benchmarks/bench_inicializacao.py)
 import streamlit as st
 import pandas as pd
-import numpy as np
-import sqlite3
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import re
 import os
-import tempfile
-from scipy import stats
 import datetime
 from datetime import timedelta
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
+from src.analises import (calcular_metricas_desempenho, analisar_tendencias, tabela_tendencias,
+                          realizar_pca, gerar_alertas, realizar_teste_t, classificar_eficacia)
+from src.dados import (carregar_medicoes, carregar_medicoes_chip, carregar_episodios, carregar_falhas,
+                       carregar_exposicao, aplicar_filtros)
+from src.bootstrap import bootstrap_eficacia, descrever_intervalo
+from src.falhas import mascarar_falhas
+from src.exposicao import LACUNA_MAXIMA
+from src.pareamento import pares_lotes, comparar_pares, PASSO_GRADE
+from src.precalculo import carregar_resultados, identificar_recorte, obter_recorte
+from src.shards import carregar_medicoes_federado, caminho_catalogo
+from src.pca import ajustar_pca, MAX_PONTOS_PCA
+from src.tendencias import acumular_somas, CHAVES_TENDENCIA
+from src.exportacao import gerador_exportacao, FORMATOS_EXPORTACAO
+from src.relatorio import GerenciadorRelatorios, caminho_relatorio, ler_relatorio, montar_conteudo
+from src.utils.cache import versao_dados, chave_filtro
+from src.utils.instrumentacao import Instrumentacao
 import warnings
 warnings.filterwarnings('ignore')
 
+# Copy-on-Write (padrão a partir do pandas 3): seleções sobre o DataFrame compartilhado entre
+# as sessões não copiam os dados até que alguém tente alterá-los, e nunca alteram o original
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
 # Configuração da página
 st.set_page_config(
     page_title="Análise DIATEX - Dashboard Avançado",
@@ -31,60 +43,75 @@ st.set_page_config(
     }
 )
 
-# Função para carregar os dados do banco SQLite
-@st.cache_data
-def carregar_dados(caminho_db):
-    # Conectar ao banco de dados
-    conn = sqlite3.connect(caminho_db)
-    
-    # Carregar dados da tabela medicoes com join na tabela tratamentos
-    query = """
-    SELECT 
-        m.Fecha, m.Hora, m.NH3, m.Temperatura, m.Humedad, 
-        m.Nome_Arquivo, m.lote_composto, m.idade_lote, m.n_cama, m.teste,
-        t.produtor, t.linhagem, t.bateria_teste
-    FROM medicoes m
-    LEFT JOIN tratamentos t ON m.lote_composto = t.lote_composto
-    WHERE m.teste IS NOT NULL AND m.teste != ''
-    """
-    df = pd.read_sql_query(query, conn)
-    
-    # Fechar conexão
-    conn.close()
+# Instrumentação desta execução (o modo debug vem do checkbox da sidebar)
+instrumentacao = Instrumentacao(detalhado=st.session_state.get('modo_debug', False))
+
+# Banco onde os tempos de cada execução são registrados no modo debug
+caminho_telemetria = os.path.join("database", "telemetria_dashboard.db")
+
+# Dados de cada versão do banco, mantidos uma única vez por processo e compartilhados (somente leitura)
+# por todas as sessões; st.cache_data devolveria uma cópia desserializada para cada sessão
+@st.cache_resource(max_entries=2, show_spinner=False)
+def carregar_dados(versao, caminho_db, dir_shards=None):
+    # Com shards (src/shards.py), a consulta é distribuída entre os bancos do catálogo
+    df = carregar_medicoes_federado(dir_shards) if dir_shards else carregar_medicoes(caminho_db)
     
     # Verificar se temos dados
     if len(df) == 0:
         st.error("Nenhum dado encontrado com tratamentos válidos!")
         st.stop()
     
-    # Converter colunas de data e hora
-    df['Fecha'] = pd.to_datetime(df['Fecha'])
-    df['data_hora'] = pd.to_datetime(df['Fecha'].astype(str) + ' ' + df['Hora'])
-    
-    # Criar coluna de semana de vida
-    df['semana_vida'] = (df['idade_lote'] // 7) + 1
-    
-    # Criar coluna de aviário (extrair do nome do arquivo)
-    df['aviario'] = df['Nome_Arquivo'].str.extract(r'(\d+)').astype(str)
-    
     return df
 
+# Leituras do relatório alinhadas aos chips (vazio se src/alinhamento.py ainda não foi executado)
+@st.cache_resource(max_entries=2, show_spinner=False)
+def carregar_dados_chip(versao, caminho_db):
+    return carregar_medicoes_chip(caminho_db)
+
+# Episódios de NH3 (vazio se src/episodios.py ainda não foi executado)
+@st.cache_resource(max_entries=2, show_spinner=False)
+def carregar_dados_episodios(versao, caminho_db):
+    return carregar_episodios(caminho_db)
+
+# Falhas de sensor: planos, picos e lacunas (vazio se src/falhas.py ainda não foi executado)
+@st.cache_resource(max_entries=2, show_spinner=False)
+def carregar_dados_falhas(versao, caminho_db):
+    return carregar_falhas(caminho_db)
+
+# Exposição integrada por lote com os resultados zootécnicos (vazio se src/exposicao.py ainda não foi executado)
+@st.cache_resource(max_entries=2, show_spinner=False)
+def carregar_dados_exposicao(versao, caminho_db):
+    return carregar_exposicao(caminho_db)
+
+# Dados com as leituras em falha anuladas, também mantidos uma única vez por processo
+@st.cache_resource(max_entries=2, show_spinner=False)
+def carregar_dados_sem_falhas(versao, versao_falhas, caminho_db, dir_shards=None):
+    return mascarar_falhas(carregar_dados(versao, caminho_db, dir_shards),
+                           carregar_dados_falhas(versao_falhas, caminho_db))
+
+# Resultados pré-calculados por src/precalculo.py para os recortes padrão (geral, bateria, lote, aviário)
+@st.cache_resource(max_entries=2, show_spinner=False)
+def carregar_dados_resultados(versao, caminho_resultados):
+    return carregar_resultados(caminho_resultados)
+
 # Função para criar gráficos comparativos (refatorada)
 def criar_grafico_comparativo(df, variavel, agrupar_por='dia'):
-    dados = df.copy()
+    # O DataFrame é compartilhado entre as sessões: a chave de agrupamento é uma série à parte, sem copiar os dados
+    dados = df
     
     # Definir agrupamento
     if agrupar_por == 'dia':
-        dados['grupo'] = dados['Fecha'].dt.date
+        grupo = dados['Fecha'].dt.date
     elif agrupar_por == 'semana':
-        dados['grupo'] = dados['semana_vida']
+        grupo = dados['semana_vida']
     else:  # hora
-        dados['grupo'] = dados['data_hora'].dt.floor('H')
+        grupo = dados['data_hora'].dt.floor('H')
     
     # Agrupar dados
-    dados_agrupados = dados.groupby(['grupo', 'teste'])[variavel].mean().reset_index()
+    dados_agrupados = dados.groupby([grupo.rename('grupo'), 'teste'], observed=True)[variavel].mean().reset_index()
     
     # Criar gráfico com Plotly
+    import plotly.express as px
     fig = px.line(
         dados_agrupados, 
         x='grupo', 
@@ -110,200 +137,52 @@ def criar_grafico_comparativo(df, variavel, agrupar_por='dia'):
     
     return fig
 
-# Função para calcular métricas de desempenho
-def calcular_metricas_desempenho(df):
-    """Calcula métricas de desempenho do produto DIATEX"""
-    metricas = {}
-    
-    for tratamento in ['DIATEX', 'TESTEMUNHA']:
-        dados_trat = df[df['teste'] == tratamento]
-        
-        if len(dados_trat) > 0:  # Verificar se há dados para o tratamento
-            metricas[tratamento] = {
-                'nh3_media': dados_trat['NH3'].mean(),
-                'nh3_std': dados_trat['NH3'].std(),
-                'nh3_min': dados_trat['NH3'].min(),
-                'nh3_max': dados_trat['NH3'].max(),
-                'temp_media': dados_trat['Temperatura'].mean(),
-                'umid_media': dados_trat['Humedad'].mean(),
-                'n_medicoes': len(dados_trat),
-                'dias_monitoramento': dados_trat['Fecha'].nunique()
-            }
-    
-    # Calcular eficácia relativa apenas se ambos os tratamentos existirem
-    if 'DIATEX' in metricas and 'TESTEMUNHA' in metricas:
-        if metricas['TESTEMUNHA']['nh3_media'] > 0:  # Evitar divisão por zero
-            metricas['eficacia_nh3'] = ((metricas['TESTEMUNHA']['nh3_media'] - metricas['DIATEX']['nh3_media']) / 
-                                       metricas['TESTEMUNHA']['nh3_media']) * 100
-        
-        if metricas['TESTEMUNHA']['nh3_std'] > 0:  # Evitar divisão por zero
-            metricas['reducao_variabilidade'] = ((metricas['TESTEMUNHA']['nh3_std'] - metricas['DIATEX']['nh3_std']) / 
-                                               metricas['TESTEMUNHA']['nh3_std']) * 100
-    
-    return metricas
-
-# Função para análise de tendências temporais
-def analisar_tendencias(df, variavel):
-    """Analisa tendências temporais dos dados"""
-    resultados = {}
-    
-    for tratamento in ['DIATEX', 'TESTEMUNHA']:
-        dados_trat = df[df['teste'] == tratamento].copy()
-        if len(dados_trat) > 10:  # Mínimo de pontos para análise
-            dados_trat = dados_trat.sort_values('data_hora')
-            dados_trat['tempo_numerico'] = (dados_trat['data_hora'] - dados_trat['data_hora'].min()).dt.total_seconds()
-            
-            # Regressão linear simples
-            slope, intercept, r_value, p_value, std_err = stats.linregress(
-                dados_trat['tempo_numerico'], dados_trat[variavel]
-            )
-            
-            resultados[tratamento] = {
-                'slope': slope,
-                'r_squared': r_value**2,
-                'p_value': p_value,
-                'tendencia': 'crescente' if slope > 0 else 'decrescente' if slope < 0 else 'estável',
-                'significativa': p_value < 0.05
-            }
-    
-    return resultados
-
-# Função para análise PCA
-def realizar_pca(df):
-    """Realiza análise de componentes principais"""
-    try:
-        # Preparar dados para PCA
-        variaveis = ['NH3', 'Temperatura', 'Humedad', 'idade_lote']
-        dados_pca = df[variaveis + ['teste']].dropna()
-        
-        if len(dados_pca) == 0:
-            return None, None
-        
-        # Separar por tratamento
-        X_diatex = dados_pca[dados_pca['teste'] == 'DIATEX'][variaveis]
-        X_testemunha = dados_pca[dados_pca['teste'] == 'TESTEMUNHA'][variaveis]
-        
-        if len(X_diatex) > 10 and len(X_testemunha) > 10:
-            # Padronizar dados
-            scaler = StandardScaler()
-            X_combined = pd.concat([X_diatex, X_testemunha])
-            X_scaled = scaler.fit_transform(X_combined)
-            
-            # Aplicar PCA
-            pca = PCA(n_components=2)
-            X_pca = pca.fit_transform(X_scaled)
-            
-            # Criar DataFrame com resultados
-            df_pca = pd.DataFrame(X_pca, columns=['PC1', 'PC2'])
-            df_pca['teste'] = dados_pca['teste'].values
-            
-            return df_pca, pca.explained_variance_ratio_
-        else:
-            return None, None
-    except Exception as e:
-        st.error(f"Erro na análise PCA: {str(e)}")
-        return None, None
-
-# Função para alertas e recomendações
-def gerar_alertas(df):
-    """Gera alertas baseados nos dados"""
-    alertas = []
-    
-    # Verificar níveis críticos de NH3
-    nh3_critico = 25  # ppm - limite considerado alto
-    medicoes_criticas = df[df['NH3'] > nh3_critico]
-    
-    if len(medicoes_criticas) > 0:
-        # Filtrar valores não nulos na coluna teste
-        tratamentos_afetados = medicoes_criticas['teste'].dropna().unique()
-        tratamentos_str = ', '.join(tratamentos_afetados) if len(tratamentos_afetados) > 0 else 'Não especificado'
-        
-        alertas.append({
-            'tipo': 'warning',
-            'titulo': 'Níveis Críticos de Amônia',
-            'mensagem': f'{len(medicoes_criticas)} medições acima de {nh3_critico} ppm detectadas.',
-            'detalhes': f"Tratamentos afetados: {tratamentos_str}"
-        })
-    
-    # Verificar eficácia do produto
-    metricas = calcular_metricas_desempenho(df)
-    if 'eficacia_nh3' in metricas:
-        if metricas['eficacia_nh3'] > 10:
-            alertas.append({
-                'tipo': 'success',
-                'titulo': 'Eficácia Comprovada',
-                'mensagem': f'DIATEX apresenta redução de {metricas["eficacia_nh3"]:.1f}% nos níveis de NH3.',
-                'detalhes': 'Resultado estatisticamente significativo'
-            })
-        elif metricas['eficacia_nh3'] < -5:
-            alertas.append({
-                'tipo': 'error',
-                'titulo': 'Eficácia Questionável',
-                'mensagem': f'DIATEX apresenta aumento de {abs(metricas["eficacia_nh3"]):.1f}% nos níveis de NH3.',
-                'detalhes': 'Recomenda-se revisar aplicação do produto'
-            })
-    
-    # Verificar variabilidade dos dados
-    for tratamento in ['DIATEX', 'TESTEMUNHA']:
-        dados_trat = df[df['teste'] == tratamento]
-        if len(dados_trat) > 0:  # Verificar se há dados para o tratamento
-            cv_nh3 = (dados_trat['NH3'].std() / dados_trat['NH3'].mean()) * 100
-            
-            if cv_nh3 > 50:  # Coeficiente de variação alto
-                alertas.append({
-                    'tipo': 'info',
-                    'titulo': f'Alta Variabilidade - {tratamento}',
-                    'mensagem': f'Coeficiente de variação de NH3: {cv_nh3:.1f}%',
-                    'detalhes': 'Considerar fatores ambientais que podem estar influenciando'
-                })
-    
-    return alertas
-def realizar_teste_t(df, variavel):
-    # Separar dados por tratamento
-    diatex = df[df['teste'] == 'DIATEX'][variavel].dropna()
-    testemunha = df[df['teste'] == 'TESTEMUNHA'][variavel].dropna()
-    
-    # Verificar se há dados suficientes
-    if len(diatex) < 2 or len(testemunha) < 2:
-        return {
-            'estatistica': None,
-            'p_valor': None,
-            'significativo': None,
-            'interpretacao': 'Dados insuficientes para análise'
-        }
-    
-    # Realizar teste T
-    estatistica, p_valor = stats.ttest_ind(diatex, testemunha, equal_var=False)
-    
-    # Interpretar resultado
-    significativo = p_valor < 0.05
-    
-    if significativo:
-        if diatex.mean() > testemunha.mean():
-            interpretacao = f"Há diferença significativa (p={p_valor:.4f}). DIATEX apresenta valores de {variavel} MAIORES que TESTEMUNHA."
-        else:
-            interpretacao = f"Há diferença significativa (p={p_valor:.4f}). DIATEX apresenta valores de {variavel} MENORES que TESTEMUNHA."
-    else:
-        interpretacao = f"Não há diferença significativa (p={p_valor:.4f}) entre os tratamentos para {variavel}."
-    
-    return {
-        'estatistica': estatistica,
-        'p_valor': p_valor,
-        'significativo': significativo,
-        'interpretacao': interpretacao
-    }
+# Teste T do recorte pré-calculado, quando houver, ou calculado sobre os dados filtrados
+def teste_t(dados, variavel):
+    if resultados is not None:
+        return resultados.teste_t(variavel)
+    return realizar_teste_t(dados, variavel)
+
+# Exibe um gráfico Plotly medindo a serialização (e o tamanho do payload no modo debug)
+def exibir_grafico(fig, nome):
+    instrumentacao.grafico(nome, fig)
+    with instrumentacao.medir(f'plotly: {nome}'):
+        st.plotly_chart(fig, width='stretch')
+
+# Modelo PCA em cache por versão dos dados e filtro (o DataFrame não entra no hash)
+@st.cache_resource(max_entries=32, show_spinner=False)
+def obter_modelo_pca(versao, chave, _dados_pca):
+    return ajustar_pca(_dados_pca, metodo='amostra')
+
+# Intervalos de confiança do bootstrap por blocos, em cache por versão dos dados e filtro
+@st.cache_data(max_entries=64, show_spinner=False)
+def obter_bootstrap(versao, chave, unidade, _dados):
+    return bootstrap_eficacia(_dados, unidade)
+
+# Comparação pareada DIATEX x TESTEMUNHA sobre a grade regular, em cache por versão dos dados e filtro
+# (só o resumo fica em cache; as grades de cada par são descartadas ao fim do cálculo)
+@st.cache_data(max_entries=16, show_spinner=False)
+def obter_comparacao_pareada(versao, chave, _dados):
+    return comparar_pares(_dados, pares_lotes(_dados))
+
+# Gerenciador de relatórios em segundo plano, compartilhado entre sessões
+@st.cache_resource
+def obter_gerenciador_relatorios():
+    return GerenciadorRelatorios()
 
 # Função para criar matriz de correlação (refatorada)
-def criar_matriz_correlacao(df, tratamento=None):
-    dados = df.copy()
+def criar_matriz_correlacao(df, tratamento=None, corr=None):
+    dados = df
     
     if tratamento:
         dados = dados[dados['teste'] == tratamento]
     
-    # Calcular correlação
-    corr = dados[['NH3', 'Temperatura', 'Humedad', 'idade_lote']].corr()
+    # Calcular correlação (a menos que ela já venha pré-calculada)
+    if corr is None:
+        corr = dados[['NH3', 'Temperatura', 'Humedad', 'idade_lote']].corr()
     
     # Criar gráfico com Plotly
+    import plotly.express as px
     fig = px.imshow(
         corr,
         text_auto=True,
@@ -324,18 +203,45 @@ Este dashboard oferece análise estatística completa da eficácia do produto DI
 
 # Caminho para o banco de dados local no repositório
 caminho_db = os.path.join("database", "TESTE_DIATEX_PROD.db")
+# Banco gerado por src/precalculo.py (opcional)
+caminho_resultados = os.path.join("database", "resultados_analises.db")
+
+# Layout opcional com um banco por granja ou bateria: DIATEX_SHARDS aponta para a pasta dos shards
+dir_shards = os.environ.get('DIATEX_SHARDS') or None
+caminho_fonte = caminho_catalogo(dir_shards) if dir_shards else caminho_db
 
 # Verificar se o arquivo existe
-if not os.path.exists(caminho_db):
-    st.error(f"Arquivo de banco de dados não encontrado em {caminho_db}.")
+if not os.path.exists(caminho_fonte):
+    st.error(f"Arquivo de banco de dados não encontrado em {caminho_fonte}.")
     st.info("Verifique se o arquivo está na pasta 'database' do repositório.")
     st.stop()
 
+# Versão dos dados (muda a cada nova carga do banco ou publicação de shard)
+versao = versao_dados(caminho_fonte)
+# Versão do banco principal (episódios, chip, exposição e falhas), calculada uma vez por execução
+if caminho_fonte == caminho_db:
+    versao_db = versao
+else:
+    versao_db = versao_dados(caminho_db) if os.path.exists(caminho_db) else None
+
 # Carregar dados
+instrumentacao.secao('Carregamento')
 with st.spinner('Carregando dados...'):
-    df = carregar_dados(caminho_db)
+    with instrumentacao.medir('carregar_dados'):
+        df = carregar_dados(versao, caminho_db, dir_shards)
+
+# Falhas de sensor detectadas na carga (src/falhas.py); a exclusão é opcional
+with instrumentacao.medir('carregar_falhas'):
+    falhas = carregar_dados_falhas(versao_db, caminho_db) if versao_db else pd.DataFrame()
+excluir_falhas = not falhas.empty and st.sidebar.checkbox(
+    'Excluir leituras com falha de sensor', value=False,
+    help="Anula os valores de NH3, temperatura ou umidade em sensores travados ou picos isolados")
+if excluir_falhas:
+    with instrumentacao.medir('mascarar_falhas', linhas=len(df)):
+        df = carregar_dados_sem_falhas(versao, versao_db, caminho_db, dir_shards)
 
 # Adicionar métricas na sidebar
+instrumentacao.secao('Sidebar e filtros')
 st.sidebar.markdown("## 📊 Métricas Rápidas")
 
 # Calcular métricas gerais
@@ -350,7 +256,8 @@ st.sidebar.metric("Aviários Monitorados", aviarios_monitorados)
 st.sidebar.metric("Produtores", produtores_envolvidos)
 
 # Métricas de eficácia
-metricas = calcular_metricas_desempenho(df)
+with instrumentacao.medir('calcular_metricas_desempenho', linhas=len(df)):
+    metricas = calcular_metricas_desempenho(df)
 if 'eficacia_nh3' in metricas and metricas['eficacia_nh3'] is not None:
     st.sidebar.metric(
         "Eficácia NH3", 
@@ -362,8 +269,8 @@ else:
 
 # Exibir informação sobre o arquivo carregado
 st.sidebar.markdown("---")
-st.sidebar.info(f"📁 **Arquivo:** {os.path.basename(caminho_db)}")
-st.sidebar.info(f"🕒 **Última atualização:** {datetime.datetime.fromtimestamp(os.path.getmtime(caminho_db)).strftime('%d/%m/%Y %H:%M')}")
+st.sidebar.info(f"📁 **Arquivo:** {os.path.basename(caminho_fonte)}")
+st.sidebar.info(f"🕒 **Última atualização:** {datetime.datetime.fromtimestamp(os.path.getmtime(caminho_fonte)).strftime('%d/%m/%Y %H:%M')}")
 
 # Sidebar para filtros
 st.sidebar.title('Filtros')
@@ -408,13 +315,6 @@ filtro_periodo = st.sidebar.date_input(
     max_value=max_data
 )
 
-# Aplicar filtro de período
-if len(filtro_periodo) == 2:
-    df_filtrado_periodo = df[(df['Fecha'].dt.date >= filtro_periodo[0]) & 
-                             (df['Fecha'].dt.date <= filtro_periodo[1])]
-else:
-    df_filtrado_periodo = df
-
 # Filtro de idade com slider
 min_idade = int(df['idade_lote'].min())
 max_idade = int(df['idade_lote'].max())
@@ -458,27 +358,46 @@ opcoes_agrupamento = ['dia', 'semana', 'hora']
 agrupamento = st.sidebar.radio('Agrupar por', opcoes_agrupamento)
 
 # Exibir estatísticas gerais
+instrumentacao.secao('Estatísticas Gerais')
 st.header('Estatísticas Gerais')
 
 # Aplicar todos os filtros de forma centralizada
-dados_filtrados = df_filtrado_periodo.copy()
-
-if filtro_produtor:
-    dados_filtrados = dados_filtrados[dados_filtrados['produtor'] == filtro_produtor]
-if filtro_linhagem:
-    dados_filtrados = dados_filtrados[dados_filtrados['linhagem'] == filtro_linhagem]
-if filtro_bateria:
-    dados_filtrados = dados_filtrados[dados_filtrados['bateria_teste'] == filtro_bateria]
-if filtro_lote:
-    dados_filtrados = dados_filtrados[dados_filtrados['lote_composto'] == filtro_lote]
-if filtro_aviario:
-    dados_filtrados = dados_filtrados[dados_filtrados['aviario'] == filtro_aviario]
-if filtro_idade_min is not None and filtro_idade_max is not None:
-    dados_filtrados = dados_filtrados[(dados_filtrados['idade_lote'] >= filtro_idade_min) & 
-                                     (dados_filtrados['idade_lote'] <= filtro_idade_max)]
-if filtro_semana_min is not None and filtro_semana_max is not None:
-    dados_filtrados = dados_filtrados[(dados_filtrados['semana_vida'] >= filtro_semana_min) & 
-                                     (dados_filtrados['semana_vida'] <= filtro_semana_max)]
+with instrumentacao.medir('aplicar_filtros', linhas=len(df)):
+    dados_filtrados = aplicar_filtros(
+        df,
+        periodo=filtro_periodo if len(filtro_periodo) == 2 else None,
+        produtor=filtro_produtor,
+        linhagem=filtro_linhagem,
+        bateria=filtro_bateria,
+        lote=filtro_lote,
+        aviario=filtro_aviario,
+        idade=(filtro_idade_min, filtro_idade_max) if filtro_idade_min is not None else None,
+        semana=(filtro_semana_min, filtro_semana_max) if filtro_semana_min is not None else None
+    )
+
+# Chave estável do estado atual dos filtros (usada pelos caches das análises); inclui a exclusão
+# de falhas, que troca o conjunto de dados de origem
+chave_filtros = chave_filtro(
+    produtor=filtro_produtor, linhagem=filtro_linhagem, bateria=filtro_bateria,
+    lote=filtro_lote, aviario=filtro_aviario, periodo=filtro_periodo,
+    idade=(filtro_idade_min, filtro_idade_max), semana=(filtro_semana_min, filtro_semana_max),
+    excluir_falhas=excluir_falhas
+)
+
+# Filtros equivalentes a um recorte padrão: as análises vêm prontas do banco de resultados,
+# desde que ele tenha sido gerado a partir desta mesma versão dos dados
+resultados = None
+recorte = identificar_recorte(
+    produtor=filtro_produtor, linhagem=filtro_linhagem, bateria=filtro_bateria, lote=filtro_lote,
+    aviario=filtro_aviario, periodo_completo=tuple(filtro_periodo) == (min_data, max_data),
+    idade=filtro_idade_min, semana=filtro_semana_min
+)
+if recorte is not None and not excluir_falhas and os.path.exists(caminho_resultados):
+    with instrumentacao.medir('carregar_resultados'):
+        versao_resultados, tabelas_resultados = carregar_dados_resultados(versao_dados(caminho_resultados),
+                                                                          caminho_resultados)
+    if versao_resultados == versao:
+        resultados = obter_recorte(tabelas_resultados, *recorte)
 
 # Exibir contagem de registros
 col1, col2, col3 = st.columns(3)
@@ -493,12 +412,36 @@ with col3:
 
 # Exibir estatísticas descritivas
 st.subheader('Estatísticas Descritivas por Tratamento')
-estatisticas = dados_filtrados.groupby('teste')[['NH3', 'Temperatura', 'Humedad']].describe()
+with instrumentacao.medir('estatisticas_descritivas', linhas=len(dados_filtrados)):
+    if resultados is not None:
+        estatisticas = resultados.estatisticas()
+    else:
+        estatisticas = dados_filtrados.groupby('teste', observed=True)[['NH3', 'Temperatura', 'Humedad']].describe()
 st.dataframe(estatisticas)
 
 # Seção de Alertas e Recomendações
+instrumentacao.secao('Alertas e Recomendações')
 st.header('🚨 Alertas e Recomendações')
-alertas = gerar_alertas(dados_filtrados)
+# Episódios de exposição sustentada e subida rápida (gravados na carga por src/episodios.py)
+with instrumentacao.medir('carregar_episodios'):
+    episodios = carregar_dados_episodios(versao_db, caminho_db) if versao_db else pd.DataFrame()
+if not episodios.empty:
+    episodios = aplicar_filtros(
+        episodios,
+        periodo=filtro_periodo if len(filtro_periodo) == 2 else None,
+        lote=filtro_lote,
+        aviario=filtro_aviario
+    )
+def intervalos_eficacia(unidade):
+    """Intervalos do bootstrap por blocos (`unidade`: 'lote' ou 'dia') para os filtros atuais."""
+    if resultados is not None:
+        return resultados.bootstrap(unidade)
+    with instrumentacao.medir(f'bootstrap_eficacia: {unidade}', linhas=len(dados_filtrados)):
+        return obter_bootstrap(versao, chave_filtros, unidade, dados_filtrados)
+
+with instrumentacao.medir('gerar_alertas', linhas=len(dados_filtrados)):
+    alertas = (resultados.alertas() if resultados is not None
+               else gerar_alertas(dados_filtrados, episodios, intervalos_eficacia('lote')))
 
 if alertas:
     for alerta in alertas:
@@ -518,18 +461,53 @@ if alertas:
 else:
     st.info("Nenhum alerta identificado nos dados atuais.")
 
+if not episodios.empty:
+    with st.expander(f"⏱️ Episódios de NH3 por aviário ({len(episodios):,})"):
+        st.dataframe(
+            episodios.reindex(columns=['ID_Aviario', 'lote_composto', 'teste', 'nivel', 'limiar', 'inicio', 'fim',
+                                       'duracao_min', 'pico', 'media', 'variacao']),
+            width='stretch', hide_index=True
+        )
+        st.caption("Exposição: NH3 acima do limiar (ppm) sem interrupção pela duração indicada. "
+                   "Subida: média móvel de NH3 que subiu pelo menos o limiar (ppm) em relação ao mínimo da última hora.")
+
+if not falhas.empty:
+    falhas_filtradas = aplicar_filtros(
+        falhas,
+        periodo=filtro_periodo if len(filtro_periodo) == 2 else None,
+        aviario=filtro_aviario
+    )
+    with st.expander(f"🛠️ Falhas de sensor ({len(falhas_filtradas):,})"):
+        st.dataframe(
+            falhas_filtradas.groupby(['ID_Aviario', 'tipo', 'variavel'], dropna=False)
+            .agg(ocorrencias=('tipo', 'size'), minutos=('duracao_min', 'sum'), leituras=('n_leituras', 'sum'))
+            .reset_index(),
+            width='stretch', hide_index=True
+        )
+        st.dataframe(
+            falhas_filtradas[['ID_Aviario', 'tipo', 'variavel', 'inicio', 'fim', 'duracao_min', 'n_leituras',
+                              'valor', 'escore']],
+            width='stretch', hide_index=True
+        )
+        st.caption("Plano: mesmo valor repetido sem interrupção (sensor travado). "
+                   "Pico: escore z robusto (mediana e MAD da última hora ao redor da leitura) acima de 6. "
+                   "Lacuna: intervalo sem leituras maior que 15 minutos dentro do lote. "
+                   "Planos e picos podem ser excluídos das análises pela opção da barra lateral.")
+
 # Gráficos comparativos
+instrumentacao.secao('Gráficos Comparativos')
 st.header('Gráficos Comparativos')
+import plotly.express as px
 
 # Abas para diferentes variáveis
 tab1, tab2, tab3 = st.tabs(["Amônia (NH3)", "Temperatura", "Umidade"])
 
 with tab1:
-    st.plotly_chart(
-        criar_grafico_comparativo(dados_filtrados, 'NH3', agrupar_por=agrupamento),
-        width='stretch'
-    )
-    resultado_teste_t = realizar_teste_t(dados_filtrados, 'NH3')
+    with instrumentacao.medir('criar_grafico_comparativo', linhas=len(dados_filtrados)):
+        fig_comparativo = criar_grafico_comparativo(dados_filtrados, 'NH3', agrupar_por=agrupamento)
+    exibir_grafico(fig_comparativo, 'comparativo NH3')
+    with instrumentacao.medir('realizar_teste_t', linhas=len(dados_filtrados)):
+        resultado_teste_t = teste_t(dados_filtrados, 'NH3')
     st.subheader('Análise Estatística - Teste T')
     st.write(resultado_teste_t['interpretacao'])
     if resultado_teste_t['p_valor'] is not None:
@@ -537,14 +515,14 @@ with tab1:
                          title='Distribuição de NH3 por Semana de Vida',
                          labels={'semana_vida': 'Semana de Vida', 'NH3': 'NH3 (ppm)', 'teste': 'Tratamento'},
                          color_discrete_map={'DIATEX': '#1f77b4', 'TESTEMUNHA': '#ff7f0e'})
-        st.plotly_chart(fig_box, width='stretch')
+        exibir_grafico(fig_box, 'box NH3')
 
 with tab2:
-    st.plotly_chart(
-        criar_grafico_comparativo(dados_filtrados, 'Temperatura', agrupar_por=agrupamento),
-        width='stretch'
-    )
-    resultado_teste_t = realizar_teste_t(dados_filtrados, 'Temperatura')
+    with instrumentacao.medir('criar_grafico_comparativo', linhas=len(dados_filtrados)):
+        fig_comparativo = criar_grafico_comparativo(dados_filtrados, 'Temperatura', agrupar_por=agrupamento)
+    exibir_grafico(fig_comparativo, 'comparativo Temperatura')
+    with instrumentacao.medir('realizar_teste_t', linhas=len(dados_filtrados)):
+        resultado_teste_t = teste_t(dados_filtrados, 'Temperatura')
     st.subheader('Análise Estatística - Teste T')
     st.write(resultado_teste_t['interpretacao'])
     if resultado_teste_t['p_valor'] is not None:
@@ -552,14 +530,14 @@ with tab2:
                          title='Distribuição de Temperatura por Semana de Vida',
                          labels={'semana_vida': 'Semana de Vida', 'Temperatura': 'Temperatura (°C)', 'teste': 'Tratamento'},
                          color_discrete_map={'DIATEX': '#1f77b4', 'TESTEMUNHA': '#ff7f0e'})
-        st.plotly_chart(fig_box, width='stretch')
+        exibir_grafico(fig_box, 'box Temperatura')
 
 with tab3:
-    st.plotly_chart(
-        criar_grafico_comparativo(dados_filtrados, 'Humedad', agrupar_por=agrupamento),
-        width='stretch'
-    )
-    resultado_teste_t = realizar_teste_t(dados_filtrados, 'Humedad')
+    with instrumentacao.medir('criar_grafico_comparativo', linhas=len(dados_filtrados)):
+        fig_comparativo = criar_grafico_comparativo(dados_filtrados, 'Humedad', agrupar_por=agrupamento)
+    exibir_grafico(fig_comparativo, 'comparativo Humedad')
+    with instrumentacao.medir('realizar_teste_t', linhas=len(dados_filtrados)):
+        resultado_teste_t = teste_t(dados_filtrados, 'Humedad')
     st.subheader('Análise Estatística - Teste T')
     st.write(resultado_teste_t['interpretacao'])
     if resultado_teste_t['p_valor'] is not None:
@@ -567,9 +545,10 @@ with tab3:
                          title='Distribuição de Umidade por Semana de Vida',
                          labels={'semana_vida': 'Semana de Vida', 'Humedad': 'Umidade (%)', 'teste': 'Tratamento'},
                          color_discrete_map={'DIATEX': '#1f77b4', 'TESTEMUNHA': '#ff7f0e'})
-        st.plotly_chart(fig_box, width='stretch')
+        exibir_grafico(fig_box, 'box Humedad')
 
 # Análises exploratórias adicionais
+instrumentacao.secao('Análises Avançadas')
 st.header('Análises Exploratórias Adicionais')
 
 # Análises Avançadas
@@ -582,9 +561,16 @@ with tab_tend:
     st.markdown("#### Análise de Tendências Temporais")
     variavel_tendencia = st.selectbox("Selecione a variável para análise de tendência:", ['NH3', 'Temperatura', 'Humedad'])
     
-    tendencias = analisar_tendencias(dados_filtrados, variavel_tendencia)
+    # Somas acumuladas por lote: a tendência geral e as tabelas por lote/aviário saem da mesma passada
+    with instrumentacao.medir('analisar_tendencias', linhas=len(dados_filtrados)):
+        if resultados is not None:
+            somas_tendencia = resultados.somas_tendencia(variavel_tendencia)
+        else:
+            somas_tendencia = acumular_somas(dados_filtrados, variavel_tendencia, CHAVES_TENDENCIA)
+        tendencias = analisar_tendencias(dados_filtrados, variavel_tendencia, somas=somas_tendencia)
     
     if tendencias:
+        unidade_tendencia = {'NH3': 'ppm', 'Temperatura': '°C', 'Humedad': '%'}[variavel_tendencia]
         col1, col2 = st.columns(2)
         
         with col1:
@@ -595,6 +581,7 @@ with tab_tend:
                     tend_diatex['tendencia'].title(),
                     delta=f"R² = {tend_diatex['r_squared']:.3f}"
                 )
+                st.caption(f"Inclinação dentro dos lotes: {tend_diatex['slope']:+.3f} {unidade_tendencia}/dia")
                 if tend_diatex['significativa']:
                     st.success("Tendência estatisticamente significativa")
                 else:
@@ -608,16 +595,31 @@ with tab_tend:
                     tend_teste['tendencia'].title(),
                     delta=f"R² = {tend_teste['r_squared']:.3f}"
                 )
+                st.caption(f"Inclinação dentro dos lotes: {tend_teste['slope']:+.3f} {unidade_tendencia}/dia")
                 if tend_teste['significativa']:
                     st.success("Tendência estatisticamente significativa")
                 else:
                     st.info("Tendência não significativa")
+        
+        st.markdown("##### Tendência por Lote")
+        st.dataframe(tabela_tendencias(somas_tendencia, ['teste', 'aviario', 'lote_composto']), width='stretch')
+        
+        st.markdown("##### Tendência por Aviário")
+        st.dataframe(tabela_tendencias(somas_tendencia, ['teste', 'aviario']), width='stretch')
 
 with tab_pca:
     st.markdown("#### Análise de Componentes Principais (PCA)")
     st.markdown("Análise multivariada para identificar padrões nos dados.")
     
-    df_pca, variance_ratio = realizar_pca(dados_filtrados)
+    try:
+        with instrumentacao.medir('realizar_pca', linhas=len(dados_filtrados)):
+            df_pca, variance_ratio = realizar_pca(
+                dados_filtrados,
+                obter_modelo=lambda dados_pca: obter_modelo_pca(versao, chave_filtros, dados_pca)
+            )
+    except Exception as e:
+        st.error(f"Erro na análise PCA: {str(e)}")
+        df_pca, variance_ratio = None, None
     
     if df_pca is not None:
         fig_pca = px.scatter(
@@ -625,19 +627,23 @@ with tab_pca:
             title='Análise PCA - Separação entre Tratamentos',
             labels={'PC1': f'PC1 ({variance_ratio[0]:.1%} da variância)', 
                    'PC2': f'PC2 ({variance_ratio[1]:.1%} da variância)'},
-            color_discrete_map={'DIATEX': '#1f77b4', 'TESTEMUNHA': '#ff7f0e'}
+            color_discrete_map={'DIATEX': '#1f77b4', 'TESTEMUNHA': '#ff7f0e'},
+            render_mode='webgl'
         )
         fig_pca.update_layout(height=500)
-        st.plotly_chart(fig_pca, width='stretch')
+        exibir_grafico(fig_pca, 'PCA')
         
         st.info(f"Os dois primeiros componentes explicam {(variance_ratio[0] + variance_ratio[1]):.1%} da variância total dos dados.")
+        if len(dados_filtrados) > MAX_PONTOS_PCA:
+            st.caption(f"Exibindo uma amostra estratificada de {len(df_pca):,} pontos.")
     else:
         st.warning("Dados insuficientes para análise PCA.")
 
 with tab_perf:
     st.markdown("#### Métricas Detalhadas de Desempenho")
     
-    metricas_detalhadas = calcular_metricas_desempenho(dados_filtrados)
+    with instrumentacao.medir('calcular_metricas_desempenho', linhas=len(dados_filtrados)):
+        metricas_detalhadas = resultados.metricas() if resultados is not None else calcular_metricas_desempenho(dados_filtrados)
     
     if 'DIATEX' in metricas_detalhadas and 'TESTEMUNHA' in metricas_detalhadas:
         # Métricas de NH3
@@ -692,29 +698,89 @@ with tab_perf:
         })
         st.dataframe(df_comparacao, width='stretch')
 
+        # Leituras do mesmo lote são correlacionadas: o intervalo sorteia lotes (ou dias de cada lote) inteiros
+        st.markdown("##### Intervalos de Confiança (bootstrap por blocos)")
+        unidade_bootstrap = st.radio("Unidade de reamostragem", ['lote', 'dia'], horizontal=True,
+                                     format_func=lambda u: 'Lote' if u == 'lote' else 'Dia de cada lote')
+        intervalos = intervalos_eficacia(unidade_bootstrap)
+        if intervalos is None:
+            st.info("São necessários pelo menos 2 blocos de cada tratamento para estimar o intervalo.")
+        else:
+            st.dataframe(pd.DataFrame({
+                'Indicador': ['Redução Média NH3 (%)', 'Redução Variabilidade (%)'],
+                'Estimativa': [intervalos[c]['estimativa'] for c in ('eficacia_nh3', 'reducao_variabilidade')],
+                f"IC {intervalos['nivel']:.0%} inferior": [intervalos[c]['inferior'] for c in ('eficacia_nh3', 'reducao_variabilidade')],
+                f"IC {intervalos['nivel']:.0%} superior": [intervalos[c]['superior'] for c in ('eficacia_nh3', 'reducao_variabilidade')],
+            }).round(1), width='stretch', hide_index=True)
+            st.caption(f"{intervalos['reamostragens']:,} reamostragens de {intervalos['blocos']['DIATEX']} blocos DIATEX "
+                       f"e {intervalos['blocos']['TESTEMUNHA']} blocos TESTEMUNHA; o DIATEX reduziu o NH3 em "
+                       f"{intervalos['prob_reducao']:.0%} delas.")
+
+        # Aviários do mesmo produtor e bateria comparados instante a instante, e não só pelas médias
+        st.markdown("##### Comparação Pareada por Aviário")
+        with instrumentacao.medir('comparacao_pareada', linhas=len(dados_filtrados)):
+            comparacao = obter_comparacao_pareada(versao, chave_filtros, dados_filtrados)
+        comparacao = comparacao[comparacao['pontos'] > 0]
+        if comparacao.empty:
+            st.info("Nenhum par DIATEX x TESTEMUNHA do mesmo produtor e bateria com leituras simultâneas.")
+        else:
+            st.dataframe(comparacao.rename(columns={
+                'produtor': 'Produtor', 'bateria_teste': 'Bateria', 'lote_diatex': 'Lote DIATEX',
+                'lote_testemunha': 'Lote TESTEMUNHA', 'variavel': 'Variável', 'pontos': 'Instantes pareados',
+                'diferenca_media': 'Diferença média', 'n_efetivo': 'n efetivo', 'p_valor': 'P-valor',
+                'correlacao': 'Correlação', 'defasagem_max_min': 'Defasagem da correlação máxima (min)',
+                'correlacao_max': 'Correlação máxima',
+            }).drop(columns=['desvio_diferenca', 'autocorrelacao', 't_stat']).round(3),
+                width='stretch', hide_index=True)
+            st.caption(f"Leituras interpoladas em uma grade comum de {PASSO_GRADE.seconds // 60} minutos; "
+                       "diferença = DIATEX - TESTEMUNHA nos instantes em que os dois aviários têm leitura. "
+                       "O teste T usa o n efetivo, descontada a autocorrelação entre instantes vizinhos.")
+
 # Matriz de correlação
+instrumentacao.secao('Matriz de Correlação')
 st.subheader('Matriz de Correlação')
 col1, col2 = st.columns(2)
 
 with col1:
-    st.plotly_chart(
-        criar_matriz_correlacao(dados_filtrados, tratamento='DIATEX'),
-        width='stretch'
-    )
+    exibir_grafico(criar_matriz_correlacao(dados_filtrados, tratamento='DIATEX',
+                                           corr=resultados.correlacao('DIATEX') if resultados is not None else None),
+                   'correlação DIATEX')
 
 with col2:
-    st.plotly_chart(
-        criar_matriz_correlacao(dados_filtrados, tratamento='TESTEMUNHA'),
-        width='stretch'
+    exibir_grafico(criar_matriz_correlacao(dados_filtrados, tratamento='TESTEMUNHA',
+                                           corr=resultados.correlacao('TESTEMUNHA') if resultados is not None else None),
+                   'correlação TESTEMUNHA')
+
+# Correlação com os chips de temperatura/umidade instalados nos aviários
+with instrumentacao.medir('carregar_dados_chip'):
+    dados_chip = carregar_dados_chip(versao_db, caminho_db) if versao_db else pd.DataFrame()
+if not dados_chip.empty:
+    dados_chip = aplicar_filtros(
+        dados_chip,
+        periodo=filtro_periodo if len(filtro_periodo) == 2 else None,
+        aviario=filtro_aviario
     )
+    with st.expander(f"🔗 Relatório vs. chips de temperatura/umidade ({len(dados_chip):,} leituras alinhadas)"):
+        if len(dados_chip) > 1:
+            corr_chip = dados_chip[['NH3', 'Temperatura', 'Humedad', 'temperatura_chip', 'umidade_chip']].corr()
+            exibir_grafico(px.imshow(corr_chip, text_auto='.2f', color_continuous_scale='RdBu_r', zmin=-1, zmax=1,
+                                     title='Correlação entre relatório e chips'), 'correlação chips')
+            diff_temp_chip = (dados_chip['Temperatura'] - dados_chip['temperatura_chip']).mean()
+            st.caption(f"Diferença média de temperatura (relatório - chip): {diff_temp_chip:.2f} °C. "
+                       f"Cada leitura do relatório é associada à leitura do chip mais próxima em até ±5 minutos.")
+        else:
+            st.info("Nenhuma leitura alinhada aos chips para os filtros selecionados.")
 
 # Análise por idade/semana
+instrumentacao.secao('Análise por Idade/Semana')
 st.subheader('Análise por Idade/Semana')
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 
 visualizacao = st.radio('Visualizar por:', ['Idade (dias)', 'Semana de vida'])
 
 if visualizacao == 'Idade (dias)':
-    dados_por_idade = dados_filtrados.groupby(['idade_lote', 'teste'])[['NH3', 'Temperatura', 'Humedad']].mean().reset_index()
+    dados_por_idade = dados_filtrados.groupby(['idade_lote', 'teste'], observed=True)[['NH3', 'Temperatura', 'Humedad']].mean().reset_index()
     fig = make_subplots(rows=3, cols=1, subplot_titles=('NH3 por Idade', 'Temperatura por Idade', 'Umidade por Idade'),
                         shared_xaxes=True, vertical_spacing=0.1)
     for i, var in enumerate(['NH3', 'Temperatura', 'Humedad']):
@@ -725,10 +791,10 @@ if visualizacao == 'Idade (dias)':
                                      line=dict(color='#1f77b4' if tratamento == 'DIATEX' else '#ff7f0e'),
                                      legendgroup=tratamento, showlegend=(i==0)), row=i+1, col=1)
     fig.update_layout(height=800, title_text='Variáveis por Idade das Aves', legend_title_text='Tratamento')
-    st.plotly_chart(fig, width='stretch')
+    exibir_grafico(fig, 'por idade')
     
 else:  # Semana de vida
-    dados_por_semana = dados_filtrados.groupby(['semana_vida', 'teste'])[['NH3', 'Temperatura', 'Humedad']].mean().reset_index()
+    dados_por_semana = dados_filtrados.groupby(['semana_vida', 'teste'], observed=True)[['NH3', 'Temperatura', 'Humedad']].mean().reset_index()
     fig = make_subplots(rows=3, cols=1, subplot_titles=('NH3 por Semana', 'Temperatura por Semana', 'Umidade por Semana'),
                         shared_xaxes=True, vertical_spacing=0.1)
     for i, var in enumerate(['NH3', 'Temperatura', 'Humedad']):
@@ -739,24 +805,56 @@ else:  # Semana de vida
                                      line=dict(color='#1f77b4' if tratamento == 'DIATEX' else '#ff7f0e'),
                                      legendgroup=tratamento, showlegend=(i==0)), row=i+1, col=1)
     fig.update_layout(height=800, title_text='Variáveis por Semana de Vida das Aves', legend_title_text='Tratamento')
-    st.plotly_chart(fig, width='stretch')
+    exibir_grafico(fig, 'por semana')
+
+# Exposição acumulada por lote (gravada na carga por src/exposicao.py) ao lado dos resultados do lote
+with instrumentacao.medir('carregar_exposicao'):
+    exposicao = carregar_dados_exposicao(versao_db, caminho_db) if versao_db else pd.DataFrame()
+if not exposicao.empty:
+    exposicao = aplicar_filtros(exposicao, lote=filtro_lote, aviario=filtro_aviario)
+    with st.expander('Exposição acumulada por lote e resultados zootécnicos'):
+        colunas_exposicao = {
+            'lote_composto': 'Lote', 'teste': 'Tratamento', 'nh3_media_ponderada': 'NH3 médio ponderado (ppm)',
+            'ppm_horas_nh3': 'NH3 (ppm·h)', 'minutos_nh3_acima_20': 'Min. NH3 > 20 ppm',
+            'minutos_nh3_acima_25': 'Min. NH3 > 25 ppm', 'graus_hora_acima_30': 'Graus-hora > 30 °C',
+            'peso_abate': 'Peso ao abate', 'pc_cond_pes': '% Cond. pés', 'pc_cond_aero': '% Cond. aerossaculite',
+        }
+        colunas_exposicao = {c: nome for c, nome in colunas_exposicao.items() if c in exposicao.columns}
+        st.dataframe(exposicao[list(colunas_exposicao)].rename(columns=colunas_exposicao),
+                     width='stretch', hide_index=True)
+        st.caption('Integrais no tempo pela regra do trapézio; intervalos maiores que '
+                   f'{LACUNA_MAXIMA.seconds // 60} minutos entre leituras não são integrados.')
 
 # Conclusões e Relatório Final
+instrumentacao.secao('Conclusões')
 st.header('📋 Conclusões e Relatório Final')
 
 # Aplicar filtro de tratamento específico para conclusões
-dados_conclusoes = dados_filtrados.copy()
+dados_conclusoes = dados_filtrados
 if filtro_tratamento_especifico:
     dados_conclusoes = dados_conclusoes[dados_conclusoes['teste'] == filtro_tratamento_especifico]
 
-# Análises estatísticas completas
-medias_nh3 = dados_conclusoes.groupby('teste')['NH3'].mean()
-medias_temp = dados_conclusoes.groupby('teste')['Temperatura'].mean()
-medias_umid = dados_conclusoes.groupby('teste')['Humedad'].mean()
-
-resultado_nh3 = realizar_teste_t(dados_conclusoes, 'NH3')
-resultado_temp = realizar_teste_t(dados_conclusoes, 'Temperatura')
-resultado_umid = realizar_teste_t(dados_conclusoes, 'Humedad')
+# Análises estatísticas completas (pré-calculadas quando não há filtro de tratamento específico)
+resultados_conclusoes = resultados if not filtro_tratamento_especifico else None
+if resultados_conclusoes is not None:
+    metricas_conclusoes = resultados_conclusoes.metricas()
+    medias = {coluna: pd.Series({t: m[coluna] for t, m in metricas_conclusoes.items() if isinstance(m, dict)}, dtype=float)
+              for coluna in ['nh3_media', 'temp_media', 'umid_media']}
+    medias_nh3, medias_temp, medias_umid = medias['nh3_media'], medias['temp_media'], medias['umid_media']
+else:
+    medias_nh3 = dados_conclusoes.groupby('teste', observed=True)['NH3'].mean()
+    medias_temp = dados_conclusoes.groupby('teste', observed=True)['Temperatura'].mean()
+    medias_umid = dados_conclusoes.groupby('teste', observed=True)['Humedad'].mean()
+
+with instrumentacao.medir('realizar_teste_t', linhas=len(dados_conclusoes)):
+    if resultados_conclusoes is not None:
+        resultado_nh3 = resultados_conclusoes.teste_t('NH3')
+        resultado_temp = resultados_conclusoes.teste_t('Temperatura')
+        resultado_umid = resultados_conclusoes.teste_t('Humedad')
+    else:
+        resultado_nh3 = realizar_teste_t(dados_conclusoes, 'NH3')
+        resultado_temp = realizar_teste_t(dados_conclusoes, 'Temperatura')
+        resultado_umid = realizar_teste_t(dados_conclusoes, 'Humedad')
 
 if 'DIATEX' in medias_nh3 and 'TESTEMUNHA' in medias_nh3:
     # Métricas principais
@@ -819,12 +917,9 @@ if 'DIATEX' in medias_nh3 and 'TESTEMUNHA' in medias_nh3:
     st.subheader("🏆 Conclusão Final")
     
     # Critérios de avaliação
-    eficacia_significativa = resultado_nh3['significativo'] and diff_nh3 < -5  # Redução de pelo menos 5%
-    eficacia_moderada = resultado_nh3['significativo'] and -5 <= diff_nh3 < 0
-    ineficaz = resultado_nh3['significativo'] and diff_nh3 >= 0
-    inconclusivo = not resultado_nh3['significativo']
+    classificacao = classificar_eficacia(resultado_nh3, diff_nh3)
     
-    if eficacia_significativa:
+    if classificacao == 'significativa':
         st.success(f"""
         ### ✅ DIATEX DEMONSTRA EFICÁCIA SIGNIFICATIVA
         
@@ -835,7 +930,7 @@ if 'DIATEX' in medias_nh3 and 'TESTEMUNHA' in medias_nh3:
         
         **Recomendação:** Implementação do produto DIATEX é recomendada.
         """)
-    elif eficacia_moderada:
+    elif classificacao == 'moderada':
         st.warning(f"""
         ### ⚠️ DIATEX APRESENTA EFICÁCIA MODERADA
         
@@ -846,7 +941,7 @@ if 'DIATEX' in medias_nh3 and 'TESTEMUNHA' in medias_nh3:
         
         **Recomendação:** Considerar implementação com monitoramento contínuo.
         """)
-    elif ineficaz:
+    elif classificacao == 'ineficaz':
         st.error(f"""
         ### ❌ DIATEX NÃO DEMONSTRA EFICÁCIA
         
@@ -870,6 +965,10 @@ if 'DIATEX' in medias_nh3 and 'TESTEMUNHA' in medias_nh3:
         """)
     
     # Contexto adicional
+    intervalos_conclusoes = intervalos_eficacia('lote') if not filtro_tratamento_especifico else None
+    if intervalos_conclusoes is not None:
+        st.caption(f"Redução média de NH3: {descrever_intervalo(intervalos_conclusoes)}")
+
     st.subheader("📋 Considerações Adicionais")
     n_total = len(dados_conclusoes)
     periodo_estudo = (dados_conclusoes['Fecha'].max() - dados_conclusoes['Fecha'].min()).days
@@ -891,34 +990,91 @@ agora_gmt3 = datetime.datetime.now() - timedelta(hours=3)
 st.markdown("---")
 
 # Seção de exportação de dados
+instrumentacao.secao('Exportação e relatório')
 st.subheader("📁 Exportar Dados")
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    if st.button("📊 Exportar Dados Filtrados"):
-        csv = dados_filtrados.to_csv(index=False)
-        st.download_button(
-            label="Baixar CSV",
-            data=csv,
-            file_name=f"dados_diatex_filtrados_{datetime.date.today()}.csv",
-            mime="text/csv"
-        )
+    # Arquivos gerados só no clique, em blocos, e reaproveitados para o mesmo filtro
+    st.download_button(
+        label="📊 Exportar Dados Filtrados (CSV)",
+        data=gerador_exportacao(dados_filtrados, 'csv', versao, chave_filtros),
+        file_name=f"dados_diatex_filtrados_{datetime.date.today()}.csv",
+        mime=FORMATOS_EXPORTACAO['csv']['mime'],
+        on_click='ignore'
+    )
+    st.download_button(
+        label="📦 Exportar Dados Filtrados (Parquet)",
+        data=gerador_exportacao(dados_filtrados, 'parquet', versao, chave_filtros),
+        file_name=f"dados_diatex_filtrados_{datetime.date.today()}.parquet",
+        mime=FORMATOS_EXPORTACAO['parquet']['mime'],
+        on_click='ignore'
+    )
 
 with col2:
-    if st.button("📈 Exportar Estatísticas"):
-        stats_csv = estatisticas.to_csv()
-        st.download_button(
-            label="Baixar Estatísticas CSV",
-            data=stats_csv,
-            file_name=f"estatisticas_diatex_{datetime.date.today()}.csv",
-            mime="text/csv"
-        )
+    st.download_button(
+        label="📈 Exportar Estatísticas",
+        data=lambda: estatisticas.to_csv(),
+        file_name=f"estatisticas_diatex_{datetime.date.today()}.csv",
+        mime="text/csv",
+        on_click='ignore'
+    )
 
 with col3:
-    if st.button("📋 Gerar Relatório"):
-        st.info("Funcionalidade de relatório em PDF será implementada em breve.")
+    if 'DIATEX' in medias_nh3 and 'TESTEMUNHA' in medias_nh3:
+        gerenciador = obter_gerenciador_relatorios()
+        caminho_pdf = caminho_relatorio(versao, chave_filtro(filtros=chave_filtros, tratamento=filtro_tratamento_especifico))
+        tarefa_inicial = gerenciador.tarefa(caminho_pdf)
+        relatorio_em_andamento = tarefa_inicial is not None and not tarefa_inicial['futuro'].done()
+        
+        # Acompanha o progresso sem bloquear a sessão: só o fragmento é reexecutado
+        @st.fragment(run_every=1 if relatorio_em_andamento else None)
+        def painel_relatorio():
+            tarefa = gerenciador.tarefa(caminho_pdf)
+            if os.path.exists(caminho_pdf):
+                st.download_button(
+                    label="📋 Baixar Relatório (PDF)",
+                    data=lambda: ler_relatorio(caminho_pdf),
+                    file_name=f"relatorio_diatex_{datetime.date.today()}.pdf",
+                    mime="application/pdf",
+                    on_click='ignore'
+                )
+            elif tarefa is not None and not tarefa['futuro'].done():
+                st.progress(tarefa['progresso']['fracao'], text=f"Gerando relatório: {tarefa['progresso']['etapa']}")
+            else:
+                if tarefa is not None and tarefa['futuro'].exception() is not None:
+                    st.error(f"Erro ao gerar relatório: {tarefa['futuro'].exception()}")
+                    gerenciador.descartar(caminho_pdf)
+                if st.button("📋 Gerar Relatório"):
+                    filtros_descritos = {
+                        'Produtor': filtro_produtor, 'Linhagem': filtro_linhagem, 'Bateria': filtro_bateria,
+                        'Lote': filtro_lote, 'Aviário': filtro_aviario, 'Tratamento': filtro_tratamento_especifico,
+                        'Idade': filtro_idade_range if filtro_idade_min is not None else None,
+                        'Semana': filtro_semana_range if filtro_semana_min is not None else None
+                    }
+                    conteudo = montar_conteudo(
+                        filtros='; '.join(f"{k}: {v}" for k, v in filtros_descritos.items() if v is not None) or 'Nenhum',
+                        n_medicoes=n_total,
+                        periodo=f"{periodo_estudo} dias",
+                        metricas=(metricas_conclusoes if resultados_conclusoes is not None
+                                  else calcular_metricas_desempenho(dados_conclusoes)),
+                        testes_t={'NH3': resultado_nh3, 'Temperatura': resultado_temp, 'Umidade': resultado_umid},
+                        alertas=alertas,
+                        classificacao=classificacao,
+                        diff_nh3=diff_nh3, diff_temp=diff_temp, diff_umid=diff_umid
+                    )
+                    gerenciador.solicitar(caminho_pdf, conteudo, dados_conclusoes)
+                    st.rerun()
+            # Relatório concluído durante o acompanhamento: rerun completo para encerrar o polling
+            if relatorio_em_andamento and (tarefa is None or tarefa['futuro'].done()):
+                st.rerun()
+        
+        painel_relatorio()
+    else:
+        st.button("📋 Gerar Relatório", disabled=True, help="Requer dados de ambos os tratamentos (DIATEX e TESTEMUNHA).")
 
 # Informações do sistema
+instrumentacao.secao('Rodapé')
 st.markdown(f"""
 <div style="background-color: #f0f2f6; padding: 20px; border-radius: 10px; margin-top: 20px;">
 <h4>ℹ️ Informações do Sistema</h4>
@@ -927,7 +1083,7 @@ st.markdown(f"""
 <div>
 <strong>📊 Dados:</strong><br>
 • Última atualização: {agora_gmt3.strftime('%d/%m/%Y %H:%M')} (GMT-3)<br>
-• Banco de dados: {os.path.basename(caminho_db)}<br>
+• Banco de dados: {os.path.basename(caminho_fonte)}<br>
 • Total de registros: {len(df):,}<br>
 • Período de dados: {df['Fecha'].min().strftime('%d/%m/%Y')} a {df['Fecha'].max().strftime('%d/%m/%Y')}
 </div>
@@ -989,4 +1145,22 @@ st.sidebar.markdown("""
 - [Documentação](https://github.com/seu-usuario/testeDiatexCama)
 - [Reportar Bug](https://github.com/seu-usuario/testeDiatexCama/issues)
 - [Código Fonte](https://github.com/seu-usuario/testeDiatexCama)
-""")
\ No newline at end of file
+""")
+
+# Modo debug: tempos por seção desta execução
+st.sidebar.markdown("---")
+st.sidebar.checkbox("🐞 Modo debug (tempos por seção)", key='modo_debug')
+instrumentacao.finalizar()
+instrumentacao.gravar(caminho_telemetria)
+if st.session_state.get('modo_debug'):
+    with st.sidebar.expander("⏱️ Tempos desta execução", expanded=True):
+        tempos = instrumentacao.tabela()
+        st.dataframe(
+            tempos[tempos['tipo'] != 'funcao'][['tipo', 'nome', 'segundos', 'bytes']],
+            hide_index=True, width='stretch'
+        )
+        st.markdown("**Análises**")
+        st.dataframe(
+            tempos[tempos['tipo'] == 'funcao'][['secao', 'nome', 'segundos', 'linhas']],
+            hide_index=True, width='stretch'
+        )
@@ -0,0 +1,129 @@
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import argparse
+import threading
+import multiprocessing
+from contextlib import closing
+
+# Adicionar a raiz do projeto ao Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from src.dados import CONSULTA_MEDICOES
+from src.utils.conexao import conexao_leitura, publicar_banco, ativar_wal
+from benchmarks.gerar_dados_sinteticos import gerar_banco
+
+DIR_BANCOS = os.path.join(project_root, 'benchmarks', 'bancos', 'concorrencia')
+
+# Consulta típica de uma sessão: agregação por tratamento sobre o join completo
+CONSULTA_SESSAO = f"SELECT teste, COUNT(*) AS n, AVG(NH3) AS nh3 FROM ({CONSULTA_MEDICOES}) GROUP BY teste"
+
+
+def publicador(modo, versoes, destino, duracao, fila):
+    """Processo de carga: publica alternadamente as versões do banco enquanto as sessões leem."""
+    publicacoes, fim = 0, time.perf_counter() + duracao
+    while time.perf_counter() < fim:
+        origem = versoes[publicacoes % len(versoes)]
+        if modo == 'pool':
+            publicar_banco(origem, destino)
+        else:
+            # Comportamento anterior do carga_sql.sh: cópia sobre o arquivo em uso
+            shutil.copyfile(origem, destino)
+        publicacoes += 1
+    fila.put(publicacoes)
+
+
+def sessao(modo, destino, totais_validos, fim, resultados):
+    """Uma sessão do dashboard repetindo a consulta; registra latência, erros e leituras inconsistentes."""
+    latencias, erros, inconsistentes = [], 0, 0
+    while time.perf_counter() < fim:
+        inicio = time.perf_counter()
+        try:
+            if modo == 'pool':
+                with conexao_leitura(destino) as conn:
+                    parcial = pd.read_sql_query(CONSULTA_SESSAO, conn)
+            else:
+                with closing(sqlite3.connect(destino)) as conn:
+                    parcial = pd.read_sql_query(CONSULTA_SESSAO, conn)
+        except (sqlite3.Error, pd.errors.DatabaseError):
+            erros += 1
+            continue
+        latencias.append(time.perf_counter() - inicio)
+        if int(parcial['n'].sum()) not in totais_validos:
+            inconsistentes += 1
+    resultados.append((latencias, erros, inconsistentes))
+
+
+def executar(modo, versoes, n_sessoes, duracao):
+    destino = os.path.join(DIR_BANCOS, f'dashboard_{modo}.db')
+    for sufixo in ('', '-wal', '-shm'):
+        if os.path.exists(destino + sufixo):
+            os.remove(destino + sufixo)
+    shutil.copyfile(versoes[0], destino)
+    if modo == 'pool':
+        # Estado do banco após a primeira publicação
+        ativar_wal(destino)
+
+    totais_validos = set()
+    for caminho in versoes:
+        with closing(sqlite3.connect(caminho)) as conn:
+            totais_validos.add(conn.execute(f"SELECT COUNT(*) FROM ({CONSULTA_MEDICOES})").fetchone()[0])
+
+    fila = multiprocessing.Queue()
+    carga = multiprocessing.Process(target=publicador, args=(modo, versoes, destino, duracao, fila))
+    resultados = []
+    fim = time.perf_counter() + duracao
+    sessoes = [threading.Thread(target=sessao, args=(modo, destino, totais_validos, fim, resultados))
+               for _ in range(n_sessoes)]
+    carga.start()
+    for t in sessoes:
+        t.start()
+    for t in sessoes:
+        t.join()
+    carga.join()
+
+    latencias = np.concatenate([np.asarray(r[0]) for r in resultados]) if resultados else np.array([])
+    return {
+        'modo': modo,
+        'sessoes': n_sessoes,
+        'publicacoes': fila.get(),
+        'consultas': len(latencias),
+        'erros': sum(r[1] for r in resultados),
+        'inconsistentes': sum(r[2] for r in resultados),
+        'p50_ms': float(np.percentile(latencias, 50) * 1000) if len(latencias) else None,
+        'p95_ms': float(np.percentile(latencias, 95) * 1000) if len(latencias) else None,
+        'max_ms': float(latencias.max() * 1000) if len(latencias) else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga: sessões simultâneas lendo o banco durante uma carga")
+    parser.add_argument('--linhas', type=int, default=200_000, help="Leituras de cada versão do banco sintético")
+    parser.add_argument('--sessoes', type=int, default=32)
+    parser.add_argument('--duracao', type=float, default=20.0, help="Segundos de teste por modo")
+    parser.add_argument('--modos', nargs='+', default=['copia', 'pool'], choices=['copia', 'pool'],
+                        help="copia: conexão nova + cópia sobre o arquivo (anterior); pool: pool somente leitura + publicação WAL")
+    args = parser.parse_args()
+
+    os.makedirs(DIR_BANCOS, exist_ok=True)
+    # Duas versões com tamanhos diferentes, para que uma leitura misturada seja detectável pela contagem
+    versoes = []
+    for i, n in enumerate([args.linhas, args.linhas + args.linhas // 10]):
+        caminho = os.path.join(DIR_BANCOS, f'versao_{i}_{n}.db')
+        if not os.path.exists(caminho):
+            gerar_banco(caminho, n, semente=i)
+        versoes.append(caminho)
+
+    print(f"{'modo':<6} {'sessões':>7} {'publicações':>11} {'consultas':>9} {'erros':>6} "
+          f"{'inconsist.':>10} {'p50 ms':>8} {'p95 ms':>8} {'máx ms':>8}")
+    for modo in args.modos:
+        r = executar(modo, versoes, args.sessoes, args.duracao)
+        fmt = lambda v: f"{v:8.1f}" if v is not None else f"{'-':>8}"
+        print(f"{r['modo']:<6} {r['sessoes']:>7} {r['publicacoes']:>11} {r['consultas']:>9} {r['erros']:>6} "
+              f"{r['inconsistentes']:>10} {fmt(r['p50_ms'])} {fmt(r['p95_ms'])} {fmt(r['max_ms'])}")
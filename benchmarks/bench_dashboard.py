@@ -0,0 +1,178 @@
+import os
+import sys
+import gc
+import json
+import time
+import platform
+import argparse
+import datetime
+import subprocess
+import tracemalloc
+
+# Adicionar a raiz do projeto ao Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from src.analises import (calcular_metricas_desempenho, realizar_teste_t, realizar_pca,
+                          analisar_tendencias, gerar_alertas)
+from src.dados import carregar_medicoes, aplicar_filtros
+from benchmarks.gerar_dados_sinteticos import gerar_banco
+
+DIR_RESULTADOS = os.path.join(project_root, 'benchmarks', 'resultados')
+DIR_BANCOS = os.path.join(project_root, 'benchmarks', 'bancos')
+
+# Variação tolerada (em %) antes de uma etapa ser marcada como regressão na comparação
+TOLERANCIA_REGRESSAO = 20.0
+# Diferenças absolutas menores que isto são tratadas como ruído de medição
+DIFERENCA_MINIMA_SEGUNDOS = 0.05
+
+
+def medir(funcao, *args, memoria=True, **kwargs):
+    """Executa a função medindo tempo de parede e, opcionalmente, o pico de memória alocada."""
+    gc.collect()
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    segundos = time.perf_counter() - inicio
+
+    pico_mb = None
+    if memoria:
+        # Segunda execução com rastreamento, para que o overhead do tracemalloc não afete o tempo
+        del resultado
+        gc.collect()
+        tracemalloc.start()
+        resultado = funcao(*args, **kwargs)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        pico_mb = pico / 2**20
+    return resultado, segundos, pico_mb
+
+
+def filtros_representativos(df):
+    """Combinação típica de filtros da sidebar: uma bateria e metade do período."""
+    inicio, fim = df['Fecha'].min(), df['Fecha'].max()
+    return {
+        'periodo': (inicio.date(), (inicio + (fim - inicio) / 2).date()),
+        'bateria': df['bateria_teste'].dropna().iloc[0],
+        'idade': (7, 35),
+    }
+
+
+def executar_suite(caminho_db, memoria=True):
+    """Mede cada etapa do caminho de dados do dashboard sobre um banco."""
+    registros = []
+
+    def registrar(etapa, linhas_entrada, segundos, pico_mb):
+        registros.append({
+            'etapa': etapa,
+            'linhas_entrada': int(linhas_entrada),
+            'segundos': round(segundos, 4),
+            'pico_mb': None if pico_mb is None else round(pico_mb, 1),
+        })
+        pico = '' if pico_mb is None else f"  pico {pico_mb:9.1f} MB"
+        print(f"  {etapa:<32} {linhas_entrada:>12,} linhas  {segundos:9.3f} s{pico}")
+
+    df, segundos, pico = medir(carregar_medicoes, caminho_db, memoria=memoria)
+    registrar('carregar_dados', len(df), segundos, pico)
+
+    filtros = filtros_representativos(df)
+    _, segundos, pico = medir(aplicar_filtros, df, memoria=memoria, **filtros)
+    registrar('filtros', len(df), segundos, pico)
+
+    # As análises rodam sobre o conjunto completo (pior caso: nenhum filtro na sidebar)
+    etapas = [
+        ('calcular_metricas_desempenho', calcular_metricas_desempenho, ()),
+        ('realizar_teste_t', realizar_teste_t, ('NH3',)),
+        ('realizar_pca', realizar_pca, ()),
+        ('analisar_tendencias', analisar_tendencias, ('NH3',)),
+        ('gerar_alertas', gerar_alertas, ()),
+    ]
+    for nome, funcao, args in etapas:
+        _, segundos, pico = medir(funcao, df, *args, memoria=memoria)
+        registrar(nome, len(df), segundos, pico)
+
+    return registros
+
+
+def versao_git():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(resultado, arquivo_anterior):
+    """Compara com um resultado anterior e lista as etapas que ficaram mais lentas que a tolerância."""
+    with open(arquivo_anterior, encoding='utf-8') as f:
+        anterior = json.load(f)
+    base = {(r['linhas_db'], r['etapa']): r['segundos'] for r in anterior['resultados']}
+
+    regressoes = []
+    print(f"\nComparação com {arquivo_anterior} (commit {anterior.get('commit')}):")
+    for r in resultado['resultados']:
+        chave = (r['linhas_db'], r['etapa'])
+        if chave not in base or base[chave] == 0:
+            continue
+        variacao = (r['segundos'] - base[chave]) / base[chave] * 100
+        regrediu = (variacao > TOLERANCIA_REGRESSAO
+                    and r['segundos'] - base[chave] > DIFERENCA_MINIMA_SEGUNDOS)
+        marca = ' <-- REGRESSÃO' if regrediu else ''
+        print(f"  {r['linhas_db']:>12,} {r['etapa']:<32} {base[chave]:9.3f} s -> {r['segundos']:9.3f} s ({variacao:+6.1f}%){marca}")
+        if marca:
+            regressoes.append(chave)
+    return regressoes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do caminho de dados do dashboard em escala sintética")
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1_000_000, 10_000_000, 50_000_000],
+                        help="Tamanhos dos bancos sintéticos (gerados em benchmarks/bancos se não existirem)")
+    parser.add_argument('--db', nargs='+', default=None, help="Usar bancos existentes em vez dos sintéticos")
+    parser.add_argument('--sem-memoria', action='store_true', help="Não medir o pico de memória (mais rápido)")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON de saída")
+    parser.add_argument('--comparar', default=None, help="Resultado JSON anterior para comparação")
+    args = parser.parse_args()
+
+    if args.db:
+        bancos = args.db
+    else:
+        os.makedirs(DIR_BANCOS, exist_ok=True)
+        bancos = []
+        for n in args.linhas:
+            caminho = os.path.join(DIR_BANCOS, f'sintetico_{n}.db')
+            if not os.path.exists(caminho):
+                print(f"Gerando banco sintético com {n:,} linhas em {caminho}...")
+                gerar_banco(caminho, n)
+            bancos.append(caminho)
+
+    resultado = {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': versao_git(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'resultados': [],
+    }
+
+    for caminho in bancos:
+        print(f"\nBanco: {caminho}")
+        registros = executar_suite(caminho, memoria=not args.sem_memoria)
+        linhas_db = registros[0]['linhas_entrada']
+        for r in registros:
+            resultado['resultados'].append({'banco': os.path.basename(caminho), 'linhas_db': linhas_db, **r})
+
+    saida = args.saida
+    if saida is None:
+        os.makedirs(DIR_RESULTADOS, exist_ok=True)
+        saida = os.path.join(DIR_RESULTADOS, f"bench_dashboard_{datetime.datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em: {saida}")
+
+    if args.comparar:
+        regressoes = comparar(resultado, args.comparar)
+        sys.exit(1 if regressoes else 0)
@@ -0,0 +1,122 @@
+import os
+import sys
+import glob
+import json
+import difflib
+import hashlib
+import argparse
+import datetime
+
+# Adicionar a raiz do projeto ao Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, project_root)
+
+from src.extract_tables2 import extract_tables_with_tabula, METODOS_EXTRACAO
+from benchmarks.bench_dashboard import medir, versao_git, DIR_RESULTADOS
+
+DIR_PDF = os.path.join(project_root, 'data', 'raw', 'pdf')
+DIR_GOLDEN = os.path.join(project_root, 'benchmarks', 'golden')
+
+# 'auto' é o comportamento do pipeline (stream com fallback para lattice);
+# as demais estratégias forçam um único método
+ESTRATEGIAS = {'auto': None}
+ESTRATEGIAS.update({nome: [(nome, params)] for nome, params in METODOS_EXTRACAO})
+
+
+def serializar(df):
+    """Forma canônica da saída limpa usada no snapshot (CSV sem índice)."""
+    return df.to_csv(index=False, lineterminator='\n')
+
+
+def caminho_golden(pdf_path):
+    return os.path.join(DIR_GOLDEN, os.path.splitext(os.path.basename(pdf_path))[0] + '.csv')
+
+
+def comparar_golden(pdf_path, texto):
+    """Compara a saída com o snapshot; retorna (status, detalhe)."""
+    golden = caminho_golden(pdf_path)
+    if not os.path.exists(golden):
+        return 'sem_golden', None
+    with open(golden, encoding='utf-8', newline='') as f:
+        esperado = f.read()
+    if esperado == texto:
+        return 'identico', None
+    diff = difflib.unified_diff(esperado.splitlines(), texto.splitlines(),
+                                'golden', 'atual', lineterm='', n=0)
+    return 'divergente', '\n'.join(list(diff)[:12])
+
+
+def atualizar_golden(pdf_path, texto):
+    os.makedirs(DIR_GOLDEN, exist_ok=True)
+    with open(caminho_golden(pdf_path), 'w', encoding='utf-8', newline='') as f:
+        f.write(texto)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da extração de PDFs com verificação contra snapshot golden")
+    parser.add_argument('pdfs', nargs='*', help="PDFs a medir (padrão: data/raw/pdf/*.pdf)")
+    parser.add_argument('--estrategias', nargs='+', default=list(ESTRATEGIAS), choices=list(ESTRATEGIAS))
+    parser.add_argument('--sem-memoria', action='store_true', help="Não medir o pico de memória (mais rápido)")
+    parser.add_argument('--atualizar-golden', action='store_true',
+                        help="Grava a saída da estratégia 'auto' como novo snapshot golden")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON de saída")
+    args = parser.parse_args()
+
+    pdfs = args.pdfs or sorted(glob.glob(os.path.join(DIR_PDF, '*.pdf')))
+    resultado = {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': versao_git(),
+        'resultados': [],
+    }
+    divergentes = []
+
+    for pdf_path in pdfs:
+        nome = os.path.basename(pdf_path)
+        for estrategia in args.estrategias:
+            df, segundos, pico_mb = medir(extract_tables_with_tabula, pdf_path,
+                                          metodos=ESTRATEGIAS[estrategia], memoria=not args.sem_memoria)
+            paginas = df.attrs.get('paginas') or 0
+            texto = serializar(df)
+
+            golden, detalhe = None, None
+            if estrategia == 'auto':
+                if args.atualizar_golden:
+                    atualizar_golden(pdf_path, texto)
+                    golden = 'atualizado'
+                else:
+                    golden, detalhe = comparar_golden(pdf_path, texto)
+                    if golden == 'divergente':
+                        divergentes.append(nome)
+
+            registro = {
+                'arquivo': nome,
+                'estrategia': estrategia,
+                'metodo_usado': df.attrs.get('metodo'),
+                'paginas': paginas,
+                'linhas': len(df),
+                'segundos': round(segundos, 3),
+                'paginas_por_segundo': round(paginas / segundos, 2) if segundos else None,
+                'linhas_por_segundo': round(len(df) / segundos, 1) if segundos else None,
+                'pico_mb': None if pico_mb is None else round(pico_mb, 1),
+                'sha1_saida': hashlib.sha1(texto.encode('utf-8')).hexdigest(),
+                'golden': golden,
+            }
+            resultado['resultados'].append(registro)
+            print(f"{nome:<24} {estrategia:<8} método={registro['metodo_usado'] or '-':<8} "
+                  f"{paginas:>4} pág {len(df):>7,} linhas {segundos:8.2f} s "
+                  f"{registro['paginas_por_segundo'] or 0:7.2f} pág/s {registro['linhas_por_segundo'] or 0:9.1f} linhas/s"
+                  f"{'' if golden is None else '  golden=' + golden}")
+            if detalhe:
+                print(detalhe)
+
+    saida = args.saida
+    if saida is None:
+        os.makedirs(DIR_RESULTADOS, exist_ok=True)
+        saida = os.path.join(DIR_RESULTADOS, f"bench_extracao_{datetime.datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em: {saida}")
+
+    if divergentes:
+        print(f"Saída diferente do snapshot golden em: {', '.join(divergentes)}")
+        sys.exit(1)
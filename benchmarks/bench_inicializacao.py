@@ -0,0 +1,157 @@
+import os
+import sys
+import json
+import platform
+import argparse
+import datetime
+import statistics
+import subprocess
+
+# Adicionar a raiz do projeto ao Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, project_root)
+
+from benchmarks.bench_dashboard import versao_git, TOLERANCIA_REGRESSAO, DIFERENCA_MINIMA_SEGUNDOS
+
+DIR_RESULTADOS = os.path.join(project_root, 'benchmarks', 'resultados')
+APP = os.path.join(project_root, 'app_cloud.py')
+
+# Bibliotecas pesadas que só deveriam ser carregadas pelas seções que as usam
+MODULOS_PESADOS = ['matplotlib', 'seaborn', 'sklearn', 'scipy.stats', 'plotly']
+MARCADOR = '--- inicio da execucao do dashboard ---'
+
+# Executado em um interpretador novo: importa o AppTest (o servidor do Streamlit já estaria
+# carregado), marca o início no stderr e roda o dashboard duas vezes (fria e já aquecida).
+# A primeira renderização é a chamada de st.set_page_config, o primeiro comando que chega ao navegador
+SCRIPT_FILHO = f"""
+import sys, time, json
+import streamlit
+from streamlit.testing.v1 import AppTest
+marcas = {{}}
+set_page_config = streamlit.set_page_config
+def registrar_primeira_renderizacao(*args, **kwargs):
+    marcas.setdefault('primeira_renderizacao', time.perf_counter() - inicio)
+    return set_page_config(*args, **kwargs)
+streamlit.set_page_config = registrar_primeira_renderizacao
+print({MARCADOR!r}, file=sys.stderr, flush=True)
+inicio = time.perf_counter()
+at = AppTest.from_file({APP!r}, default_timeout=600).run()
+primeira = time.perf_counter() - inicio
+inicio = time.perf_counter()
+at.run()
+segunda = time.perf_counter() - inicio
+print(json.dumps({{
+    'primeira_renderizacao': marcas.get('primeira_renderizacao'),
+    'primeira_execucao': primeira,
+    'execucao_aquecida': segunda,
+    'erros': [str(e.value) for e in at.exception],
+    'modulos_carregados': [m for m in {MODULOS_PESADOS!r} if m in sys.modules],
+}}))
+"""
+
+
+def tempos_importacao(stderr):
+    """Tempo acumulado (s) por pacote de topo importado durante a execução, a partir do -X importtime."""
+    linhas = stderr.split(MARCADOR, 1)[-1].splitlines()
+    tempos = {}
+    for linha in linhas:
+        if not linha.startswith('import time:') or '|' not in linha:
+            continue
+        partes = linha.split('|')
+        try:
+            acumulado = int(partes[1])
+        except ValueError:
+            continue  # cabeçalho
+        nome = partes[2]
+        # Só os imports feitos diretamente pelo dashboard (sem recuo); os internos já estão no acumulado
+        if nome.startswith('  '):
+            continue
+        pacote = nome.strip().split('.')[0]
+        tempos[pacote] = tempos.get(pacote, 0.0) + acumulado / 1e6
+    return tempos
+
+
+def medir_partida():
+    """Uma partida a frio: processo novo, dashboard executado do zero."""
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', SCRIPT_FILHO], cwd=project_root,
+                              capture_output=True, text=True)
+    if processo.returncode != 0:
+        raise RuntimeError(f"Falha ao executar o dashboard:\n{processo.stderr[-2000:]}")
+    resultado = json.loads(processo.stdout.strip().splitlines()[-1])
+    resultado['importacao'] = tempos_importacao(processo.stderr)
+    return resultado
+
+
+def comparar(resultado, arquivo_anterior):
+    """Compara com um resultado anterior e lista as medidas que ficaram mais lentas que a tolerância."""
+    with open(arquivo_anterior, encoding='utf-8') as f:
+        anterior = json.load(f)
+    base = {r['etapa']: r['segundos'] for r in anterior['resultados']}
+
+    regressoes = []
+    print(f"\nComparação com {arquivo_anterior} (commit {anterior.get('commit')}):")
+    for r in resultado['resultados']:
+        if not base.get(r['etapa']):
+            continue
+        variacao = (r['segundos'] - base[r['etapa']]) / base[r['etapa']] * 100
+        regrediu = (variacao > TOLERANCIA_REGRESSAO
+                    and r['segundos'] - base[r['etapa']] > DIFERENCA_MINIMA_SEGUNDOS)
+        marca = ' <-- REGRESSÃO' if regrediu else ''
+        print(f"  {r['etapa']:<32} {base[r['etapa']]:9.3f} s -> {r['segundos']:9.3f} s ({variacao:+6.1f}%){marca}")
+        if regrediu:
+            regressoes.append(r['etapa'])
+    return regressoes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partida a frio do dashboard: tempo da primeira execução "
+                                                 "e tempo de importação por módulo")
+    parser.add_argument('--repeticoes', type=int, default=3, help="Partidas medidas (é gravada a mediana)")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON de saída")
+    parser.add_argument('--comparar', default=None, help="Resultado JSON anterior para comparação")
+    args = parser.parse_args()
+
+    partidas = []
+    for i in range(args.repeticoes):
+        partida = medir_partida()
+        if partida['erros']:
+            print(f"Erros no dashboard: {partida['erros']}")
+            sys.exit(1)
+        print(f"  partida {i + 1}: primeira renderização {partida['primeira_renderizacao']:.2f} s, "
+              f"primeira execução {partida['primeira_execucao']:.2f} s, aquecida {partida['execucao_aquecida']:.2f} s")
+        partidas.append(partida)
+
+    registros = [{'etapa': etapa, 'segundos': round(statistics.median(p[etapa] for p in partidas), 4)}
+                 for etapa in ('primeira_renderizacao', 'primeira_execucao', 'execucao_aquecida')]
+    pacotes = sorted({pacote for p in partidas for pacote in p['importacao']})
+    importacao = {pacote: statistics.median(p['importacao'].get(pacote, 0.0) for p in partidas) for pacote in pacotes}
+    for pacote, segundos in sorted(importacao.items(), key=lambda item: -item[1]):
+        if segundos >= 0.01:
+            registros.append({'etapa': f'importar {pacote}', 'segundos': round(segundos, 4)})
+
+    print(f"\n  {'medida':<32} {'segundos':>9}")
+    for r in registros:
+        print(f"  {r['etapa']:<32} {r['segundos']:9.3f}")
+    print(f"\n  Bibliotecas pesadas carregadas na primeira execução: "
+          f"{', '.join(partidas[-1]['modulos_carregados']) or 'nenhuma'}")
+
+    resultado = {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': versao_git(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'repeticoes': args.repeticoes,
+        'modulos_carregados': partidas[-1]['modulos_carregados'],
+        'resultados': registros,
+    }
+    saida = args.saida
+    if saida is None:
+        os.makedirs(DIR_RESULTADOS, exist_ok=True)
+        saida = os.path.join(DIR_RESULTADOS, f"bench_inicializacao_{datetime.datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em: {saida}")
+
+    if args.comparar:
+        regressoes = comparar(resultado, args.comparar)
+        sys.exit(1 if regressoes else 0)
@@ -0,0 +1,77 @@
+import os
+import sys
+import gc
+import pickle
+import argparse
+import tracemalloc
+
+# Adicionar a raiz do projeto ao Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from src.dados import carregar_medicoes, aplicar_filtros
+from benchmarks.gerar_dados_sinteticos import gerar_banco
+
+DIR_BANCOS = os.path.join(project_root, 'benchmarks', 'bancos')
+
+
+def sessao_anterior(df_cache, filtros):
+    """Objetos que uma sessão mantinha vivos: cópia do st.cache_data, filtro e cópia das conclusões."""
+    df = pickle.loads(pickle.dumps(df_cache, protocol=pickle.HIGHEST_PROTOCOL))
+    # aplicar_filtros sempre indexava pela máscara, mesmo sem nenhuma linha excluída
+    dados_filtrados = aplicar_filtros(df, **filtros) if filtros else df[np.ones(len(df), dtype=bool)]
+    dados_conclusoes = dados_filtrados.copy()
+    return df, dados_filtrados, dados_conclusoes
+
+
+def sessao_compartilhada(df_compartilhado, filtros):
+    """Mesma sessão com o DataFrame único do processo: filtros sem exclusões não copiam nada."""
+    dados_filtrados = aplicar_filtros(df_compartilhado, **filtros)
+    dados_conclusoes = dados_filtrados
+    return dados_filtrados, dados_conclusoes
+
+
+def memoria_por_sessao(funcao, df, filtros, n_sessoes):
+    """Memória retida (MB) por sessão com n sessões simultâneas vivas."""
+    gc.collect()
+    tracemalloc.start()
+    sessoes = [funcao(df, filtros) for _ in range(n_sessoes)]
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sessoes
+    gc.collect()
+    return atual / 2**20 / n_sessoes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memória retida por sessão do dashboard: cópias por sessão x DataFrame compartilhado")
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--sessoes', type=int, default=8)
+    parser.add_argument('--db', default=None, help="Usar um banco existente em vez do sintético")
+    args = parser.parse_args()
+
+    caminho = args.db
+    if caminho is None:
+        os.makedirs(DIR_BANCOS, exist_ok=True)
+        caminho = os.path.join(DIR_BANCOS, f'sintetico_{args.linhas}.db')
+        if not os.path.exists(caminho):
+            gerar_banco(caminho, args.linhas)
+
+    if int(pd.__version__.split('.')[0]) < 3:
+        pd.set_option('mode.copy_on_write', True)
+    df = carregar_medicoes(caminho)
+    tamanho_mb = df.memory_usage(deep=True).sum() / 2**20
+    print(f"Banco: {caminho} ({len(df):,} linhas, DataFrame de {tamanho_mb:,.1f} MB)")
+
+    cenarios = {
+        'sem filtros': {},
+        'uma bateria': {'bateria': df['bateria_teste'].dropna().iloc[0]},
+    }
+    print(f"\n{'cenário':<14} {'antes (MB/sessão)':>18} {'depois (MB/sessão)':>19}")
+    for nome, filtros in cenarios.items():
+        antes = memoria_por_sessao(sessao_anterior, df, filtros, args.sessoes)
+        depois = memoria_por_sessao(sessao_compartilhada, df, filtros, args.sessoes)
+        print(f"{nome:<14} {antes:>18,.1f} {depois:>19,.1f}")
@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import argparse
+
+# Adicionar a raiz do projeto ao Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
+
+from src.pca import ajustar_pca, projetar_pca, variancia_explicada, VARIAVEIS_PCA
+
+
+def gerar_dados(n_linhas, semente=0):
+    """Gera um DataFrame sintético com as variáveis do PCA e o tratamento."""
+    rng = np.random.default_rng(semente)
+    idade = rng.integers(0, 50, n_linhas).astype(float)
+    return pd.DataFrame({
+        'NH3': np.clip(rng.normal(5 + 0.3 * idade, 4), 0, None),
+        'Temperatura': rng.normal(32 - 0.2 * idade, 2),
+        'Humedad': rng.normal(55 + 0.2 * idade, 8),
+        'idade_lote': idade,
+        'teste': pd.Categorical(rng.choice(['DIATEX', 'TESTEMUNHA'], n_linhas)),
+    })
+
+
+def cronometrar(funcao, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def ajuste_completo(df):
+    """Abordagem anterior: StandardScaler + PCA sobre todas as linhas."""
+    X = StandardScaler().fit_transform(df[VARIAVEIS_PCA])
+    pca = PCA(n_components=2)
+    pca.fit_transform(X)
+    return pca
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do serviço de PCA")
+    parser.add_argument('--linhas', type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    print(f"Gerando {args.linhas:,} linhas sintéticas...")
+    df = gerar_dados(args.linhas)
+
+    pca_completo, t_completo = cronometrar(ajuste_completo, df)
+    print(f"Ajuste completo (anterior):   {t_completo:8.2f} s  variância={pca_completo.explained_variance_ratio_}")
+
+    for metodo in ['amostra', 'incremental']:
+        modelo, t_ajuste = cronometrar(ajustar_pca, df, metodo=metodo)
+        df_pca, t_projecao = cronometrar(projetar_pca, modelo, df)
+        print(f"Ajuste '{metodo}':{' ' * (13 - len(metodo))}{t_ajuste:8.2f} s  "
+              f"variância={variancia_explicada(modelo)}  "
+              f"projeção de {len(df_pca):,} pontos: {t_projecao:.3f} s")
@@ -0,0 +1,152 @@
+import os
+import sys
+import sqlite3
+import argparse
+
+# Adicionar a raiz do projeto ao Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger('gerar_dados_sinteticos')
+
+# Lotes consecutivos (baterias) por aviário
+LOTES_POR_AVIARIO = 5
+# Dias entre alojamentos consecutivos do mesmo aviário (lote + vazio sanitário)
+INTERVALO_LOTES_DIAS = 60
+# Leituras gravadas por transação
+TAMANHO_BLOCO = 500_000
+LINHAGENS = ['ROSS', 'COBB MALE', 'MISTO']
+
+COLUNAS_MEDICOES = {
+    'Fecha': 'TEXT', 'Hora': 'TEXT', 'NH3': 'INTEGER', 'Rango_NH3': 'TEXT',
+    'Temperatura': 'REAL', 'Rango_Temperatura': 'TEXT', 'Humedad': 'INTEGER', 'Rango_Humedad': 'TEXT',
+    'Nome_Arquivo': 'TEXT', 'ID_Aviario': 'TEXT', 'lote_composto': 'TEXT', 'teste': 'TEXT',
+    'idade_lote': 'INTEGER', 'n_cama': 'INT', 'bateria_teste': 'VARCHAR(512)',
+}
+
+
+def montar_tratamentos(n_lotes, semente=0):
+    """Cria a tabela de tratamentos: pares DIATEX/TESTEMUNHA por granja, com lotes consecutivos."""
+    rng = np.random.default_rng(semente)
+    n_aviarios = max(2, int(np.ceil(n_lotes / LOTES_POR_AVIARIO)))
+    n_aviarios += n_aviarios % 2  # aviários sempre em pares
+    inicio = pd.Timestamp('2024-01-08')
+
+    linhas = []
+    for a in range(n_aviarios):
+        aviario = 1000 + a
+        granja = a // 2
+        defasagem = pd.Timedelta(days=int(rng.integers(0, INTERVALO_LOTES_DIAS)))
+        for b in range(LOTES_POR_AVIARIO):
+            if len(linhas) >= n_lotes:
+                break
+            alojamento = inicio + defasagem + pd.Timedelta(days=b * INTERVALO_LOTES_DIAS)
+            linhas.append({
+                'aviario': f'aviario_{aviario}',
+                'lote_composto': f'{aviario}-{b + 1}',
+                'bateria_teste': b + 1,
+                'data_alojamento': alojamento.strftime('%Y-%m-%d'),
+                'data_retirada': (alojamento + pd.Timedelta(days=47)).strftime('%Y-%m-%d'),
+                'linhagem': LINHAGENS[granja % len(LINHAGENS)],
+                'teste': 'DIATEX' if a % 2 == 0 else 'TESTEMUNHA',
+                'produtor': f'PRODUTOR {granja:04d}',
+                'n_cama': int(rng.integers(3, 9)),
+                'aves_alojadas': int(rng.integers(28000, 36000)),
+                'peso_7d': int(rng.normal(185, 8)),
+                'peso_14d': int(rng.normal(480, 20)),
+                'peso_21d': int(rng.normal(970, 40)),
+                'peso_28d': int(rng.normal(1480, 60)),
+                'peso_35d': int(rng.normal(2300, 80)),
+                'peso_42d': int(rng.normal(3000, 100)),
+                'peso_abate': int(rng.normal(3300, 120)),
+                'pc_cond_pes': round(float(rng.uniform(0, 20)), 2),
+                'pc_cond_aero': round(float(rng.uniform(0, 8)), 2),
+                'id_sensor': f'24M{a:04d}',
+            })
+        if len(linhas) >= n_lotes:
+            break
+    return pd.DataFrame(linhas)
+
+
+def gerar_leituras_lote(lote, n_leituras, rng):
+    """Gera as leituras de um lote com intervalos de 3 a 5 minutos, como os sensores reais."""
+    alojamento = pd.Timestamp(lote['data_alojamento'])
+    passos = rng.choice([180, 240, 300], n_leituras)
+    momentos = alojamento + pd.to_timedelta(np.cumsum(passos), unit='s')
+    idade = ((momentos - alojamento) // pd.Timedelta(days=1)).to_numpy()
+    hora_dia = momentos.hour.to_numpy()
+
+    efeito = -2.0 if lote['teste'] == 'DIATEX' else 0.0
+    nh3 = np.clip(rng.normal(4 + 0.35 * idade + efeito, 3), 0, None).round().astype(int)
+    temperatura = (32 - 0.2 * idade + 2 * np.sin((hora_dia - 9) / 24 * 2 * np.pi) + rng.normal(0, 1, n_leituras)).round(1)
+    umidade = np.clip(rng.normal(55 + 0.3 * idade, 8), 20, 100).round().astype(int)
+    parte = idade // 10 + 1
+    aviario = lote['aviario']
+
+    return pd.DataFrame({
+        'Fecha': momentos.strftime('%Y-%m-%d'),
+        'Hora': momentos.strftime('%H:%M'),
+        'NH3': nh3,
+        'Rango_NH3': '20-0 ppm',
+        'Temperatura': temperatura,
+        'Rango_Temperatura': '35-10 °C',
+        'Humedad': umidade,
+        'Rango_Humedad': '90-40 %',
+        'Nome_Arquivo': pd.Series(parte).astype(str).radd(f'{aviario}_pt').to_numpy(),
+        'ID_Aviario': aviario,
+        'lote_composto': lote['lote_composto'],
+        'teste': lote['teste'],
+        'idade_lote': idade,
+        'n_cama': lote['n_cama'],
+        'bateria_teste': str(lote['bateria_teste']),
+    })
+
+
+def gerar_banco(caminho_db, n_linhas, n_lotes=None, semente=0):
+    """Grava um banco com as tabelas medicoes/tratamentos no formato do TESTE_DIATEX_PROD.db."""
+    if n_lotes is None:
+        # ~16 mil leituras por lote (≈ 47 dias a cada 4 min), com no mínimo 200 lotes
+        n_lotes = max(200, n_linhas // 16_000)
+    rng = np.random.default_rng(semente)
+    tratamentos = montar_tratamentos(n_lotes, semente)
+    por_lote = np.full(len(tratamentos), n_linhas // len(tratamentos))
+    por_lote[:n_linhas % len(tratamentos)] += 1
+
+    if os.path.exists(caminho_db):
+        os.remove(caminho_db)
+    with sqlite3.connect(caminho_db) as conn:
+        conn.execute('PRAGMA journal_mode=OFF')
+        conn.execute('PRAGMA synchronous=OFF')
+        tratamentos.to_sql('tratamentos', conn, index=False)
+
+        bloco, tamanho, gravadas = [], 0, 0
+        for (_, lote), n in zip(tratamentos.iterrows(), por_lote):
+            bloco.append(gerar_leituras_lote(lote, int(n), rng))
+            tamanho += int(n)
+            if tamanho >= TAMANHO_BLOCO:
+                pd.concat(bloco).to_sql('medicoes', conn, if_exists='append', index=False, dtype=COLUNAS_MEDICOES)
+                gravadas += tamanho
+                bloco, tamanho = [], 0
+                logger.info(f"{gravadas:,} / {n_linhas:,} leituras gravadas")
+        if bloco:
+            pd.concat(bloco).to_sql('medicoes', conn, if_exists='append', index=False, dtype=COLUNAS_MEDICOES)
+        conn.commit()
+
+    logger.info(f"Banco sintético criado: {caminho_db} ({n_linhas:,} leituras, {len(tratamentos)} lotes)")
+    return caminho_db
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera bancos sintéticos medicoes/tratamentos para benchmarks")
+    parser.add_argument('caminho_db', help="Arquivo .db a ser criado (sobrescrito se existir)")
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--lotes', type=int, default=None)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    gerar_banco(args.caminho_db, args.linhas, args.lotes, args.semente)
@@ -9,9 +9,15 @@ setlocal
 
 set SOURCE_DB="TESTE_DIATEX.db"
 set TARGET_DB="TESTE_DIATEX_PROD.db"
+:: Copia de trabalho: os scripts rodam nela e o dashboard continua lendo o banco atual
+set STAGING_DB="TESTE_DIATEX_PROD.carga.db"
+set PUBLICAR_SCRIPT="..\src\utils\conexao.py"
+set PRECALCULO_SCRIPT="..\src\precalculo.py"
+set EXPOSICAO_SCRIPT="..\src\exposicao.py"
+set ALINHAMENTO_SCRIPT="..\src\alinhamento.py"
 
 echo.
-echo Executando scripts SQL na base: %TARGET_DB%
+echo Executando scripts SQL na copia de trabalho: %STAGING_DB%
 echo.
 
 :: Passo 1: Criar uma copia do arquivo original antes de rodar os scripts SQL
@@ -20,8 +26,8 @@ if not exist %SOURCE_DB% (
     pause
     exit /b
 )
-echo Copiando %SOURCE_DB% para %TARGET_DB%...
-copy %SOURCE_DB% %TARGET_DB% > nul
+echo Copiando %SOURCE_DB% para %STAGING_DB%...
+copy %SOURCE_DB% %STAGING_DB% > nul
 if %errorlevel% neq 0 (
     echo ERRO: Falha ao criar a copia do banco de dados.
     pause
@@ -30,7 +36,7 @@ if %errorlevel% neq 0 (
 
 echo.
 echo -- Executando 1_pop_tratamentos.sql na copia --
-sqlite3 %TARGET_DB% < "1_pop_tratamentos.sql"
+sqlite3 %STAGING_DB% < "1_pop_tratamentos.sql"
 if %errorlevel% neq 0 (
     echo ERRO: Falha ao executar 1_pop_tratamentos.sql
     pause
@@ -39,7 +45,7 @@ if %errorlevel% neq 0 (
 
 echo.
 echo -- Executando 2_pop_medicoes_meta.sql na copia --
-sqlite3 %TARGET_DB% < "2_pop_medicoes_meta.sql"
+sqlite3 %STAGING_DB% < "2_pop_medicoes_meta.sql"
 if %errorlevel% neq 0 (
     echo ERRO: Falha ao executar 2_pop_medicoes_meta.sql
     pause
@@ -48,7 +54,7 @@ if %errorlevel% neq 0 (
 
 echo.
 echo -- Executando 3_create_views.sql na copia --
-sqlite3 %TARGET_DB% < "3_create_views.sql"
+sqlite3 %STAGING_DB% < "3_create_views.sql"
 if %errorlevel% neq 0 (
     echo ERRO: Falha ao executar 3_create_views.sql
     pause
@@ -60,7 +66,38 @@ echo =========================================================
 echo == Verificando as 10 primeiras linhas da tabela medicoes ==
 echo =========================================================
 
-sqlite3 %TARGET_DB% ".headers on" ".mode column" "SELECT * FROM medicoes LIMIT 10;"
+sqlite3 %STAGING_DB% ".headers on" ".mode column" "SELECT * FROM medicoes LIMIT 10;"
+
+echo.
+echo -- Integrando a exposicao por lote e semana de vida na copia --
+python %EXPOSICAO_SCRIPT% --db %STAGING_DB% --anterior %TARGET_DB%
+if %errorlevel% neq 0 (
+    echo AVISO: Falha na integracao da exposicao; as tabelas exposicao_* nao serao publicadas.
+)
+
+echo.
+echo -- Alinhando as leituras com os logs dos chips na copia --
+python %ALINHAMENTO_SCRIPT% --db %STAGING_DB%
+if %errorlevel% neq 0 (
+    echo AVISO: Falha no alinhamento com os chips; a tabela medicoes_chip nao sera publicada.
+)
+
+echo.
+echo -- Publicando %STAGING_DB% em %TARGET_DB% (sem bloquear o dashboard) --
+python %PUBLICAR_SCRIPT% %STAGING_DB% %TARGET_DB%
+if %errorlevel% neq 0 (
+    echo ERRO: Falha ao publicar %TARGET_DB%
+    pause
+    exit /b
+)
+del %STAGING_DB%
+
+echo.
+echo -- Pre-calculando as analises dos recortes padrao (geral, bateria, lote, aviario) --
+python %PRECALCULO_SCRIPT% --db %TARGET_DB% --saida resultados_analises.db
+if %errorlevel% neq 0 (
+    echo AVISO: Falha no pre-calculo; o dashboard calculara as analises em cada sessao.
+)
 
 echo.
 echo Carga SQL finalizada com sucesso! O banco de dados final e %TARGET_DB%.
@@ -13,9 +13,15 @@ SOURCE_DB_PATH="$1"
 SOURCE_DB_FILE=$(basename "$SOURCE_DB_PATH")
 
 TARGET_DB_FILE="TESTE_DIATEX_PROD.db"
+# Copia de trabalho: os scripts rodam nela e o dashboard continua lendo o banco atual
+STAGING_DB_FILE="TESTE_DIATEX_PROD.carga.db"
+PUBLICAR_SCRIPT="../src/utils/conexao.py"
+PRECALCULO_SCRIPT="../src/precalculo.py"
+EXPOSICAO_SCRIPT="../src/exposicao.py"
+ALINHAMENTO_SCRIPT="../src/alinhamento.py"
 
 echo ""
-echo "Executando scripts SQL na base: ${TARGET_DB_FILE}"
+echo "Executando scripts SQL na copia de trabalho: ${STAGING_DB_FILE}"
 echo ""
 
 # Passo 1: Criar uma copia do arquivo original antes de rodar os scripts SQL
@@ -24,8 +30,8 @@ if [ ! -f "${SOURCE_DB_PATH}" ]; then
     read -p "Pressione Enter para continuar..."
     exit 1
 fi
-echo "Copiando ${SOURCE_DB_FILE} para ${TARGET_DB_FILE}..."
-cp "${SOURCE_DB_PATH}" "${TARGET_DB_FILE}"
+echo "Copiando ${SOURCE_DB_FILE} para ${STAGING_DB_FILE}..."
+cp "${SOURCE_DB_PATH}" "${STAGING_DB_FILE}"
 if [ $? -ne 0 ]; then
     echo "ERRO: Falha ao criar a copia do banco de dados."
     read -p "Pressione Enter para continuar..."
@@ -34,7 +40,7 @@ fi
 
 echo ""
 echo "-- Executando 1_pop_tratamentos.sql na copia --"
-sqlite3 "${TARGET_DB_FILE}" < "1_pop_tratamentos.sql"
+sqlite3 "${STAGING_DB_FILE}" < "1_pop_tratamentos.sql"
 if [ $? -ne 0 ]; then
     echo "ERRO: Falha ao executar 1_pop_tratamentos.sql"
     read -p "Pressione Enter para continuar..."
@@ -43,7 +49,7 @@ fi
 
 echo ""
 echo "-- Executando 2_pop_medicoes_meta.sql na copia --"
-sqlite3 "${TARGET_DB_FILE}" < "2_pop_medicoes_meta.sql"
+sqlite3 "${STAGING_DB_FILE}" < "2_pop_medicoes_meta.sql"
 if [ $? -ne 0 ]; then
     echo "ERRO: Falha ao executar 2_pop_medicoes_meta.sql"
     read -p "Pressione Enter para continuar..."
@@ -52,7 +58,7 @@ fi
 
 echo ""
 echo "-- Executando 3_create_views.sql na copia --"
-sqlite3 "${TARGET_DB_FILE}" < "3_create_views.sql"
+sqlite3 "${STAGING_DB_FILE}" < "3_create_views.sql"
 if [ $? -ne 0 ]; then
     echo "ERRO: Falha ao executar 3_create_views.sql"
     read -p "Pressione Enter para continuar..."
@@ -64,7 +70,38 @@ echo "========================================================="
 echo "== Verificando as 10 primeiras linhas da tabela medicoes =="
 echo "========================================================="
 
-sqlite3 "${TARGET_DB_FILE}" ".headers on" ".mode column" "SELECT * FROM medicoes LIMIT 10;"
+sqlite3 "${STAGING_DB_FILE}" ".headers on" ".mode column" "SELECT * FROM medicoes LIMIT 10;"
+
+echo ""
+echo "-- Integrando a exposicao por lote e semana de vida na copia --"
+python3 "${EXPOSICAO_SCRIPT}" --db "${STAGING_DB_FILE}" --anterior "${TARGET_DB_FILE}"
+if [ $? -ne 0 ]; then
+    echo "AVISO: Falha na integracao da exposicao; as tabelas exposicao_* nao serao publicadas."
+fi
+
+echo ""
+echo "-- Alinhando as leituras com os logs dos chips na copia --"
+python3 "${ALINHAMENTO_SCRIPT}" --db "${STAGING_DB_FILE}"
+if [ $? -ne 0 ]; then
+    echo "AVISO: Falha no alinhamento com os chips; a tabela medicoes_chip nao sera publicada."
+fi
+
+echo ""
+echo "-- Publicando ${STAGING_DB_FILE} em ${TARGET_DB_FILE} (sem bloquear o dashboard) --"
+python3 "${PUBLICAR_SCRIPT}" "${STAGING_DB_FILE}" "${TARGET_DB_FILE}"
+if [ $? -ne 0 ]; then
+    echo "ERRO: Falha ao publicar ${TARGET_DB_FILE}"
+    read -p "Pressione Enter para continuar..."
+    exit 1
+fi
+rm -f "${STAGING_DB_FILE}"
+
+echo ""
+echo "-- Pre-calculando as analises dos recortes padrao (geral, bateria, lote, aviario) --"
+python3 "${PRECALCULO_SCRIPT}" --db "${TARGET_DB_FILE}" --saida "resultados_analises.db"
+if [ $? -ne 0 ]; then
+    echo "AVISO: Falha no pre-calculo; o dashboard calculara as analises em cada sessao."
+fi
 
 echo ""
 echo "Carga SQL finalizada com sucesso! O banco de dados final e ${TARGET_DB_FILE}."
@@ -0,0 +1,123 @@
+import os
+import re
+import sys
+import glob
+import sqlite3
+import argparse
+
+# Adicionar a raiz do projeto ao Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from src.validacao import momentos_leitura
+from src.utils.logger import setup_logger
+
+logger = setup_logger('alinhamento')
+
+DIR_LOGS_CHIP = os.path.join(project_root, 'data', 'raw', 'csv')
+
+# Chip instalado em cada aviário (docs/DadosSensores.txt)
+CHIPS_AVIARIOS = {
+    '35a386': 'aviario_1203',
+    'f001f9': 'aviario_1204',
+}
+
+# Nome dos arquivos gravados pelos chips: Log_AAAA-MM-DD_<chip>.csv
+PADRAO_ARQUIVO_CHIP = re.compile(r'Log_(\d{4}-\d{2}-\d{2})_([0-9a-fA-F]+)\.csv$')
+COLUNAS_LOG_CHIP = ['hora', 'temperatura_chip', 'umidade_chip', 'canal_extra']
+
+# Diferença máxima entre a leitura do relatório e a do chip para considerá-las simultâneas
+TOLERANCIA_ALINHAMENTO = pd.Timedelta(minutes=5)
+
+COLUNAS_ENRIQUECIDAS = ['ID_Aviario', 'Fecha', 'Hora', 'NH3', 'Temperatura', 'Humedad',
+                        'chip', 'temperatura_chip', 'umidade_chip', 'defasagem_s']
+
+
+def ler_logs_chip(diretorio=DIR_LOGS_CHIP, chips_aviarios=CHIPS_AVIARIOS):
+    """Lê os CSVs dos chips (hora;temperatura;umidade;extra, data no nome do arquivo).
+
+    Arquivos de chips sem aviário associado são ignorados.
+    """
+    partes = []
+    for caminho in sorted(glob.glob(os.path.join(diretorio, 'Log_*.csv'))):
+        encontrado = PADRAO_ARQUIVO_CHIP.search(os.path.basename(caminho))
+        if not encontrado:
+            continue
+        data, chip = encontrado.group(1), encontrado.group(2).lower()
+        if chip not in chips_aviarios:
+            logger.warning(f"Chip {chip} sem aviário associado: {os.path.basename(caminho)} ignorado")
+            continue
+        log = pd.read_csv(caminho, sep=';', header=None, names=COLUNAS_LOG_CHIP,
+                          dtype={'hora': 'string'}, on_bad_lines='skip')
+        log['Fecha'] = data
+        log['chip'] = chip
+        partes.append(log)
+
+    if not partes:
+        return pd.DataFrame(columns=['ID_Aviario', 'momento', 'chip', 'temperatura_chip', 'umidade_chip'])
+
+    logs = pd.concat(partes, ignore_index=True)
+    logs['ID_Aviario'] = logs['chip'].map(chips_aviarios)
+    logs['momento'] = momentos_leitura(logs.rename(columns={'hora': 'Hora'}))
+    logs = logs.dropna(subset=['momento'])
+    return logs[['ID_Aviario', 'momento', 'chip', 'temperatura_chip', 'umidade_chip']]
+
+
+def alinhar_asof(leituras, logs, tolerancia=TOLERANCIA_ALINHAMENTO, direcao='nearest'):
+    """Associa a cada leitura do relatório a leitura do chip mais próxima no mesmo aviário.
+
+    Junção as-of ordenada (merge_asof por aviário), sem laços em Python. Leituras sem chip
+    dentro da tolerância ficam com NaN. `defasagem_s` é a diferença chip - relatório em segundos.
+    """
+    esquerda = leituras.assign(momento=momentos_leitura(leituras)).dropna(subset=['momento'])
+    esquerda = esquerda.sort_values('momento', kind='stable')
+    direita = logs.assign(momento_chip=logs['momento']).sort_values('momento', kind='stable')
+
+    alinhado = pd.merge_asof(esquerda, direita, on='momento', by='ID_Aviario',
+                             tolerance=tolerancia, direction=direcao)
+    alinhado['defasagem_s'] = (alinhado['momento_chip'] - alinhado['momento']).dt.total_seconds()
+    return alinhado.drop(columns=['momento_chip'])
+
+
+def carregar_leituras(caminho_db, aviarios):
+    """Leituras do relatório (tabela medicoes) dos aviários informados."""
+    marcadores = ', '.join('?' * len(aviarios))
+    with sqlite3.connect(caminho_db) as conn:
+        return pd.read_sql_query(
+            f"SELECT ID_Aviario, Fecha, Hora, NH3, Temperatura, Humedad FROM medicoes "
+            f"WHERE ID_Aviario IN ({marcadores})", conn, params=list(aviarios))
+
+
+def gerar_medicoes_chip(caminho_db, diretorio=DIR_LOGS_CHIP, tolerancia=TOLERANCIA_ALINHAMENTO):
+    """Monta a tabela medicoes_chip (leituras do relatório + chip mais próximo) no banco."""
+    logs = ler_logs_chip(diretorio)
+    if logs.empty:
+        logger.warning(f"Nenhum log de chip encontrado em {diretorio}")
+        return 0
+    leituras = carregar_leituras(caminho_db, logs['ID_Aviario'].unique())
+    alinhado = alinhar_asof(leituras, logs, tolerancia)
+    enriquecido = alinhado.loc[alinhado['chip'].notna(), COLUNAS_ENRIQUECIDAS]
+
+    with sqlite3.connect(caminho_db) as conn:
+        enriquecido.to_sql('medicoes_chip', conn, if_exists='replace', index=False)
+    logger.info(f"medicoes_chip: {len(enriquecido):,} de {len(leituras):,} leituras alinhadas a um chip", extra={'dados': {
+        'evento': 'alinhamento_chip', 'leituras': len(leituras), 'logs_chip': len(logs),
+        'alinhadas': len(enriquecido),
+        'defasagem_media_s': None if enriquecido.empty else float(np.abs(enriquecido['defasagem_s']).mean()),
+    }})
+    return len(enriquecido)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alinha as leituras dos relatórios com os logs dos chips")
+    # Roda na cópia de trabalho da carga (database/carga_sql.sh), publicada junto com as demais tabelas;
+    # gravar direto no banco publicado perderia a tabela na próxima carga
+    parser.add_argument('--db', default=os.path.join(project_root, 'database', 'TESTE_DIATEX_PROD.carga.db'))
+    parser.add_argument('--csv', default=DIR_LOGS_CHIP, help="Pasta com os Log_*.csv dos chips")
+    parser.add_argument('--tolerancia-min', type=float, default=TOLERANCIA_ALINHAMENTO.total_seconds() / 60)
+    args = parser.parse_args()
+
+    gerar_medicoes_chip(args.db, args.csv, pd.Timedelta(minutes=args.tolerancia_min))
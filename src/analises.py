@@ -0,0 +1,241 @@
+from src.pca import ajustar_pca, projetar_pca, variancia_explicada, VARIAVEIS_PCA, MAX_PONTOS_PCA
+from src.bootstrap import descrever_intervalo
+from src.tendencias import (acumular_somas, agregar_somas, estatisticas_tendencia, estatisticas_tendencia_intra,
+                            CHAVES_TENDENCIA, MIN_PONTOS_TENDENCIA)
+
+
+# Função para calcular métricas de desempenho
+def calcular_metricas_desempenho(df):
+    """Calcula métricas de desempenho do produto DIATEX"""
+    metricas = {}
+    
+    for tratamento in ['DIATEX', 'TESTEMUNHA']:
+        dados_trat = df[df['teste'] == tratamento]
+        
+        if len(dados_trat) > 0:  # Verificar se há dados para o tratamento
+            metricas[tratamento] = {
+                'nh3_media': dados_trat['NH3'].mean(),
+                'nh3_std': dados_trat['NH3'].std(),
+                'nh3_min': dados_trat['NH3'].min(),
+                'nh3_max': dados_trat['NH3'].max(),
+                'temp_media': dados_trat['Temperatura'].mean(),
+                'umid_media': dados_trat['Humedad'].mean(),
+                'n_medicoes': len(dados_trat),
+                'dias_monitoramento': dados_trat['Fecha'].nunique()
+            }
+    
+    # Calcular eficácia relativa apenas se ambos os tratamentos existirem
+    if 'DIATEX' in metricas and 'TESTEMUNHA' in metricas:
+        if metricas['TESTEMUNHA']['nh3_media'] > 0:  # Evitar divisão por zero
+            metricas['eficacia_nh3'] = ((metricas['TESTEMUNHA']['nh3_media'] - metricas['DIATEX']['nh3_media']) / 
+                                       metricas['TESTEMUNHA']['nh3_media']) * 100
+        
+        if metricas['TESTEMUNHA']['nh3_std'] > 0:  # Evitar divisão por zero
+            metricas['reducao_variabilidade'] = ((metricas['TESTEMUNHA']['nh3_std'] - metricas['DIATEX']['nh3_std']) / 
+                                               metricas['TESTEMUNHA']['nh3_std']) * 100
+    
+    return metricas
+
+# Função para análise de tendências temporais
+def analisar_tendencias(df, variavel, somas=None):
+    """Analisa tendências temporais dos dados a partir das somas acumuladas por lote
+
+    A tendência de cada tratamento é a inclinação dentro dos lotes (em unidades da variável por dia)
+    """
+    if somas is None:
+        somas = acumular_somas(df, variavel, CHAVES_TENDENCIA)
+    
+    resultados = {}
+    if len(somas) == 0:
+        return resultados
+    
+    resumo = estatisticas_tendencia_intra(somas, ['teste'])
+    
+    for tratamento in ['DIATEX', 'TESTEMUNHA']:
+        if tratamento in resumo.index and resumo.loc[tratamento, 'n'] > MIN_PONTOS_TENDENCIA:
+            linha = resumo.loc[tratamento]
+            resultados[tratamento] = {
+                'slope': linha['slope'],
+                'r_squared': linha['r_squared'],
+                'p_value': linha['p_value'],
+                'tendencia': linha['tendencia'],
+                'significativa': bool(linha['significativa'])
+            }
+    
+    return resultados
+
+# Função para tabela de tendências por grupo (lote, aviário)
+def tabela_tendencias(somas, chaves):
+    """Monta a tabela de tendências por grupo a partir das somas acumuladas"""
+    tabela = estatisticas_tendencia(agregar_somas(somas, chaves))
+    tabela = tabela[tabela['n'] > MIN_PONTOS_TENDENCIA].reset_index()
+    return tabela.rename(columns={
+        'teste': 'Tratamento',
+        'aviario': 'Aviário',
+        'lote_composto': 'Lote',
+        'n': 'Medições',
+        'slope': 'Inclinação (/dia)',
+        'r_squared': 'R²',
+        'p_value': 'P-valor',
+        'tendencia': 'Tendência',
+        'significativa': 'Significativa'
+    })
+
+# Função para análise PCA
+def realizar_pca(df, obter_modelo=ajustar_pca, max_pontos=MAX_PONTOS_PCA):
+    """Realiza análise de componentes principais"""
+    # Preparar dados para PCA
+    dados_pca = df[VARIAVEIS_PCA + ['teste']].dropna()
+    dados_pca = dados_pca[dados_pca['teste'].isin(['DIATEX', 'TESTEMUNHA'])]
+    
+    if len(dados_pca) == 0:
+        return None, None
+    
+    contagem = dados_pca['teste'].value_counts()
+    
+    if contagem.get('DIATEX', 0) > 10 and contagem.get('TESTEMUNHA', 0) > 10:
+        # Ajustar (ou obter do cache) o modelo e projetar só os pontos exibidos
+        modelo = obter_modelo(dados_pca)
+        df_pca = projetar_pca(modelo, dados_pca, max_pontos=max_pontos)
+        
+        return df_pca, variancia_explicada(modelo)
+    else:
+        return None, None
+
+
+# Função para alertas e recomendações
+def gerar_alertas(df, episodios=None, intervalos=None):
+    """Gera alertas baseados nos dados (e nos episódios de src/episodios.py e nos intervalos de
+    src/bootstrap.py, se informados)"""
+    alertas = []
+    
+    # Verificar níveis críticos de NH3
+    nh3_critico = 25  # ppm - limite considerado alto
+    medicoes_criticas = df[df['NH3'] > nh3_critico]
+    
+    if len(medicoes_criticas) > 0:
+        # Filtrar valores não nulos na coluna teste
+        tratamentos_afetados = medicoes_criticas['teste'].dropna().unique()
+        tratamentos_str = ', '.join(tratamentos_afetados) if len(tratamentos_afetados) > 0 else 'Não especificado'
+        
+        alertas.append({
+            'tipo': 'warning',
+            'titulo': 'Níveis Críticos de Amônia',
+            'mensagem': f'{len(medicoes_criticas)} medições acima de {nh3_critico} ppm detectadas.',
+            'detalhes': f"Tratamentos afetados: {tratamentos_str}"
+        })
+    
+    # Verificar exposição sustentada: qual aviário ficou acima do limite, quando e por quanto tempo
+    if episodios is not None and len(episodios) > 0:
+        exposicoes = episodios[episodios['tipo'] == 'exposicao']
+        if len(exposicoes) > 0:
+            mais_longos = exposicoes.sort_values('duracao_min', ascending=False).drop_duplicates('ID_Aviario')
+            detalhes = '; '.join(
+                f"{e.ID_Aviario}: {e.duracao_min:.0f} min acima de {e.limiar:.0f} ppm em {e.inicio:%d/%m/%Y %H:%M}"
+                for e in mais_longos.itertuples())
+            alertas.append({
+                'tipo': 'warning',
+                'titulo': 'Exposição Sustentada a Amônia',
+                'mensagem': f'{len(exposicoes)} episódios de NH3 acima do limite por tempo prolongado '
+                            f'em {len(mais_longos)} aviário(s).',
+                'detalhes': f"Episódio mais longo por aviário: {detalhes}"
+            })
+    
+    # Verificar eficácia do produto
+    metricas = calcular_metricas_desempenho(df)
+    if 'eficacia_nh3' in metricas:
+        if metricas['eficacia_nh3'] > 10:
+            # Só é "comprovada" se o intervalo do bootstrap por blocos excluir o zero
+            if intervalos is None:
+                alertas.append({
+                    'tipo': 'info',
+                    'titulo': 'Eficácia Estimada',
+                    'mensagem': f'DIATEX apresenta redução de {metricas["eficacia_nh3"]:.1f}% nos níveis de NH3.',
+                    'detalhes': 'Estimativa pontual: lotes insuficientes para um intervalo de confiança'
+                })
+            elif intervalos['eficacia_nh3']['inferior'] > 0:
+                alertas.append({
+                    'tipo': 'success',
+                    'titulo': 'Eficácia Comprovada',
+                    'mensagem': f'DIATEX apresenta redução de {metricas["eficacia_nh3"]:.1f}% nos níveis de NH3.',
+                    'detalhes': descrever_intervalo(intervalos)
+                })
+            else:
+                alertas.append({
+                    'tipo': 'info',
+                    'titulo': 'Eficácia Não Confirmada',
+                    'mensagem': f'DIATEX apresenta redução de {metricas["eficacia_nh3"]:.1f}% nos níveis de NH3, '
+                                f'mas o intervalo de confiança inclui zero.',
+                    'detalhes': descrever_intervalo(intervalos)
+                })
+        elif metricas['eficacia_nh3'] < -5:
+            alertas.append({
+                'tipo': 'error',
+                'titulo': 'Eficácia Questionável',
+                'mensagem': f'DIATEX apresenta aumento de {abs(metricas["eficacia_nh3"]):.1f}% nos níveis de NH3.',
+                'detalhes': 'Recomenda-se revisar aplicação do produto'
+            })
+    
+    # Verificar variabilidade dos dados
+    for tratamento in ['DIATEX', 'TESTEMUNHA']:
+        dados_trat = df[df['teste'] == tratamento]
+        if len(dados_trat) > 0:  # Verificar se há dados para o tratamento
+            cv_nh3 = (dados_trat['NH3'].std() / dados_trat['NH3'].mean()) * 100
+            
+            if cv_nh3 > 50:  # Coeficiente de variação alto
+                alertas.append({
+                    'tipo': 'info',
+                    'titulo': f'Alta Variabilidade - {tratamento}',
+                    'mensagem': f'Coeficiente de variação de NH3: {cv_nh3:.1f}%',
+                    'detalhes': 'Considerar fatores ambientais que podem estar influenciando'
+                })
+    
+    return alertas
+
+# Função para teste T entre tratamentos
+def realizar_teste_t(df, variavel):
+    # Separar dados por tratamento
+    diatex = df[df['teste'] == 'DIATEX'][variavel].dropna()
+    testemunha = df[df['teste'] == 'TESTEMUNHA'][variavel].dropna()
+    
+    # Verificar se há dados suficientes
+    if len(diatex) < 2 or len(testemunha) < 2:
+        return {
+            'estatistica': None,
+            'p_valor': None,
+            'significativo': None,
+            'interpretacao': 'Dados insuficientes para análise'
+        }
+    
+    # Realizar teste T (scipy.stats só é carregado aqui; os recortes pré-calculados não passam por este ponto)
+    from scipy import stats
+    estatistica, p_valor = stats.ttest_ind(diatex, testemunha, equal_var=False)
+    
+    # Interpretar resultado
+    significativo = p_valor < 0.05
+    
+    if significativo:
+        if diatex.mean() > testemunha.mean():
+            interpretacao = f"Há diferença significativa (p={p_valor:.4f}). DIATEX apresenta valores de {variavel} MAIORES que TESTEMUNHA."
+        else:
+            interpretacao = f"Há diferença significativa (p={p_valor:.4f}). DIATEX apresenta valores de {variavel} MENORES que TESTEMUNHA."
+    else:
+        interpretacao = f"Não há diferença significativa (p={p_valor:.4f}) entre os tratamentos para {variavel}."
+    
+    return {
+        'estatistica': estatistica,
+        'p_valor': p_valor,
+        'significativo': significativo,
+        'interpretacao': interpretacao
+    }
+
+# Função para classificar a eficácia segundo os critérios da conclusão final
+def classificar_eficacia(resultado_nh3, diff_nh3):
+    """Classifica a eficácia do DIATEX a partir do teste T e da diferença de NH3"""
+    if not resultado_nh3['significativo']:
+        return 'inconclusivo'
+    if diff_nh3 < -5:  # Redução de pelo menos 5%
+        return 'significativa'
+    if diff_nh3 < 0:
+        return 'moderada'
+    return 'ineficaz'
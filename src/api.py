@@ -0,0 +1,321 @@
+import os
+import sys
+import json
+import math
+import hashlib
+import argparse
+import datetime
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+# Adicionar a raiz do projeto ao Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from src.analises import analisar_tendencias
+from src.bootstrap import UNIDADES_REAMOSTRAGEM
+from src.dados import carregar_medicoes, carregar_episodios, aplicar_filtros
+from src.precalculo import (CAMINHO_RESULTADOS, RECORTES, COLUNAS_RECORTES, VALOR_GERAL, VARIAVEIS, TRATAMENTOS, ResultadosRecorte,
+                            calcular_recorte, carregar_resultados, listar_recortes, obter_recorte)
+from src.shards import carregar_medicoes_federado, agregar_federado, caminho_catalogo, EXPRESSOES_AGREGACAO
+from src.tendencias import agregar_somas, estatisticas_tendencia, MIN_PONTOS_TENDENCIA
+from src.utils.cache import versao_dados
+from src.utils.logger import setup_logger
+
+logger = setup_logger('api')
+
+PORTA_PADRAO = 8502
+# Respostas JSON mantidas em memória (por versão dos dados; a troca de versão esvazia o cache)
+MAX_RESPOSTAS_CACHE = 256
+# Colunas aceitas em /api/agregados?por=...
+CHAVES_AGREGADOS = ['teste', 'bateria_teste', 'lote_composto', 'aviario', 'produtor', 'linhagem',
+                    'semana_vida', 'idade_lote', 'Fecha']
+
+
+class ErroRequisicao(ValueError):
+    """Parâmetro inválido na requisição (resposta 400)."""
+
+
+def _json_compativel(valor):
+    """Converte tipos do numpy/pandas para JSON (NaN e infinitos viram null)."""
+    if isinstance(valor, dict):
+        return {str(k): _json_compativel(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_json_compativel(v) for v in valor]
+    if isinstance(valor, pd.DataFrame):
+        return _json_compativel(valor.to_dict('records'))
+    if isinstance(valor, (pd.Timestamp, datetime.date)):
+        return valor.isoformat()
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    if valor is pd.NA or valor is pd.NaT:
+        return None
+    return valor
+
+
+def agregar(df, chaves, variaveis=VARIAVEIS):
+    """Contagem, média, desvio padrão, mínimo e máximo por chave (mesmas colunas de shards.agregar_federado)."""
+    grupos = df.groupby(chaves, observed=True)
+    resultado = pd.DataFrame(index=grupos.size().index)
+    for v in variaveis:
+        estatisticas = grupos[v].agg(['count', 'mean', 'std', 'min', 'max'])
+        resultado[f'{v}_n'] = estatisticas['count']
+        resultado[f'{v}_media'] = estatisticas['mean']
+        resultado[f'{v}_std'] = estatisticas['std']
+        resultado[f'{v}_min'] = estatisticas['min']
+        resultado[f'{v}_max'] = estatisticas['max']
+    resultado = resultado.reset_index()
+    return resultado.astype({c: object for c in chaves if isinstance(resultado[c].dtype, pd.CategoricalDtype)})
+
+
+class ApiDiatex:
+    """Agregados do dashboard em JSON, independentes do servidor HTTP (testáveis sem rede).
+
+    `responder` recebe o caminho da requisição e os cabeçalhos e devolve (status, cabeçalhos,
+    corpo). O ETag é derivado da versão dos dados e da consulta: um cliente que repete a
+    mesma consulta com If-None-Match recebe 304 sem que nada seja calculado nem serializado.
+    """
+
+    def __init__(self, caminho_db, dir_shards=None, caminho_resultados=CAMINHO_RESULTADOS,
+                 max_respostas=MAX_RESPOSTAS_CACHE):
+        self.caminho_db = caminho_db
+        self.dir_shards = dir_shards
+        self.caminho_fonte = caminho_catalogo(dir_shards) if dir_shards else caminho_db
+        self.caminho_resultados = caminho_resultados
+        self.max_respostas = max_respostas
+        self.rotas = {
+            '/api/versao': self._versao,
+            '/api/recortes': self._recortes,
+            '/api/estatisticas': self._estatisticas,
+            '/api/metricas': self._metricas,
+            '/api/testes-t': self._testes_t,
+            '/api/tendencias': self._tendencias,
+            '/api/correlacoes': self._correlacoes,
+            '/api/alertas': self._alertas,
+            '/api/bootstrap': self._bootstrap,
+            '/api/agregados': self._agregados,
+        }
+        self._lock = threading.Lock()
+        self._versao_carregada = None
+        self._respostas = OrderedDict()
+        self._recortes_calculados = {}
+
+    # Dados da versão atual, carregados uma vez por versão
+    def _preparar(self, versao):
+        with self._lock:
+            if versao == self._versao_carregada:
+                return
+            df = carregar_medicoes_federado(self.dir_shards) if self.dir_shards else carregar_medicoes(self.caminho_db)
+            self._dados = df
+            self._episodios = carregar_episodios(self.caminho_db) if os.path.exists(self.caminho_db) else pd.DataFrame()
+            self._periodo = (df['Fecha'].min().date(), df['Fecha'].max().date()) if len(df) else None
+            self._valores = {(r, str(v)): v for r, v in listar_recortes(df)}
+            # Resultados de src/precalculo.py só valem para a mesma versão dos dados
+            versao_resultados, tabelas = carregar_resultados(self.caminho_resultados)
+            self._tabelas = tabelas if versao_resultados == versao else {}
+            self._respostas.clear()
+            self._recortes_calculados = {}
+            self._versao_carregada = versao
+            logger.info(f"API: dados da versão {versao} carregados ({len(df):,} linhas, "
+                        f"resultados pré-calculados: {'sim' if self._tabelas else 'não'})")
+
+    def _recorte(self, parametros):
+        """(recorte, valor) dos parâmetros, validado contra os recortes presentes nos dados."""
+        recorte = parametros.get('recorte', 'geral')
+        if recorte not in RECORTES:
+            raise ErroRequisicao(f"recorte inválido: {recorte} (use {', '.join(RECORTES)})")
+        valor = VALOR_GERAL if recorte == 'geral' else parametros.get('valor')
+        if (recorte, valor) not in self._valores:
+            raise ErroRequisicao(f"valor inexistente para o recorte {recorte}: {valor}")
+        return recorte, valor
+
+    def _resultados(self, parametros):
+        """Resultados pré-calculados do recorte ou, na falta deles, calculados uma vez e mantidos em memória."""
+        recorte, valor = self._recorte(parametros)
+        resultados = obter_recorte(self._tabelas, recorte, valor)
+        if resultados is not None:
+            return resultados
+        with self._lock:
+            resultados = self._recortes_calculados.get((recorte, valor))
+            if resultados is not None:
+                return resultados
+            versao, dados, episodios, periodo = self._versao_carregada, self._dados, self._episodios, self._periodo
+            valor_recorte = self._valores[(recorte, valor)]
+        # Calculado fora do lock: as demais requisições seguem respondendo enquanto isso
+        resultados = ResultadosRecorte.de_resultados(
+            calcular_recorte(dados, episodios, periodo, recorte, valor_recorte), recorte, valor)
+        with self._lock:
+            # Só guarda se os dados ainda forem desta versão (outra requisição pode ter trocado)
+            if self._versao_carregada == versao:
+                resultados = self._recortes_calculados.setdefault((recorte, valor), resultados)
+        return resultados
+
+    def _variavel(self, parametros):
+        variavel = parametros.get('variavel', 'NH3')
+        if variavel not in VARIAVEIS:
+            raise ErroRequisicao(f"variável inválida: {variavel} (use {', '.join(VARIAVEIS)})")
+        return variavel
+
+    # Rotas
+    def _versao(self, parametros):
+        return {'versao_dados': self._versao_carregada, 'fonte': os.path.basename(self.caminho_fonte),
+                'linhas': len(self._dados), 'resultados_precalculados': bool(self._tabelas)}
+
+    def _recortes(self, parametros):
+        return [{'recorte': recorte, 'valor': valor} for recorte, valor in self._valores]
+
+    def _estatisticas(self, parametros):
+        estatisticas = self._resultados(parametros).estatisticas()
+        return {teste: {variavel: estatisticas.loc[teste, variavel].to_dict() for variavel in VARIAVEIS}
+                for teste in estatisticas.index}
+
+    def _metricas(self, parametros):
+        return self._resultados(parametros).metricas()
+
+    def _testes_t(self, parametros):
+        resultados = self._resultados(parametros)
+        return {variavel: resultados.teste_t(variavel) for variavel in VARIAVEIS}
+
+    def _tendencias(self, parametros):
+        variavel = self._variavel(parametros)
+        somas = self._resultados(parametros).somas_tendencia(variavel)
+        resposta = {'variavel': variavel, 'por_tratamento': analisar_tendencias(None, variavel, somas=somas)}
+        for nome, chaves in [('por_aviario', ['teste', 'aviario']), ('por_lote', ['teste', 'aviario', 'lote_composto'])]:
+            tabela = estatisticas_tendencia(agregar_somas(somas, chaves)) if len(somas) else pd.DataFrame()
+            resposta[nome] = tabela[tabela['n'] > MIN_PONTOS_TENDENCIA].reset_index() if len(tabela) else []
+        return resposta
+
+    def _correlacoes(self, parametros):
+        resultados = self._resultados(parametros)
+        return {tratamento: resultados.correlacao(tratamento).to_dict() for tratamento in TRATAMENTOS}
+
+    def _alertas(self, parametros):
+        return self._resultados(parametros).alertas()
+
+    def _bootstrap(self, parametros):
+        unidade = parametros.get('unidade', 'lote')
+        if unidade not in UNIDADES_REAMOSTRAGEM:
+            raise ErroRequisicao(f"unidade inválida: {unidade} (use {', '.join(UNIDADES_REAMOSTRAGEM)})")
+        return self._resultados(parametros).bootstrap(unidade)
+
+    def _agregados(self, parametros):
+        chaves = [c for c in parametros.get('por', 'teste').split(',') if c]
+        invalidas = [c for c in chaves if c not in CHAVES_AGREGADOS]
+        if not chaves or invalidas:
+            raise ErroRequisicao(f"chave de agregação inválida: {', '.join(invalidas)} (use {', '.join(CHAVES_AGREGADOS)})")
+        if 'teste' not in chaves:
+            chaves.append('teste')
+        recorte, valor = self._recorte(parametros)
+        argumento = RECORTES[recorte]
+        # Com shards, os agregados parciais são calculados em cada shard e só eles são combinados aqui
+        filtros = {} if argumento is None else {COLUNAS_RECORTES[recorte]: self._valores[(recorte, valor)]}
+        if self.dir_shards and all(c in EXPRESSOES_AGREGACAO for c in list(chaves) + list(filtros)):
+            return agregar_federado(chaves, VARIAVEIS, self.dir_shards,
+                                    filtros={c: v.item() if isinstance(v, np.generic) else v for c, v in filtros.items()})
+        dados = aplicar_filtros(self._dados, periodo=self._periodo,
+                                **({} if argumento is None else {argumento: self._valores[(recorte, valor)]}))
+        return agregar(dados, chaves)
+
+    def _resposta(self, status, corpo, cabecalhos=None):
+        cabecalhos = dict(cabecalhos or {})
+        if corpo is not None:
+            cabecalhos['Content-Type'] = 'application/json; charset=utf-8'
+            cabecalhos['Content-Length'] = str(len(corpo))
+        return status, cabecalhos, corpo
+
+    def _erro(self, status, mensagem):
+        return self._resposta(status, json.dumps({'erro': mensagem}, ensure_ascii=False).encode('utf-8'))
+
+    def responder(self, caminho, cabecalhos=None):
+        """Trata um GET: devolve (status, cabeçalhos, corpo em bytes ou None)."""
+        cabecalhos = {k.lower(): v for k, v in (cabecalhos or {}).items()}
+        partes = urlsplit(caminho)
+        rota = partes.path.rstrip('/') or '/'
+        if rota not in self.rotas:
+            return self._erro(404, f"rota inexistente: {rota} (disponíveis: {', '.join(self.rotas)})")
+        parametros = {k: v[-1] for k, v in parse_qs(partes.query).items()}
+
+        try:
+            versao = versao_dados(self.caminho_fonte)
+        except FileNotFoundError:
+            return self._erro(503, f"banco de dados não encontrado: {self.caminho_fonte}")
+        consulta = f"{rota}?{'&'.join(f'{k}={parametros[k]}' for k in sorted(parametros))}"
+        etag = '"' + hashlib.sha1(f"{versao}|{consulta}".encode('utf-8')).hexdigest()[:20] + '"'
+        cabecalhos_resposta = {'ETag': etag, 'Cache-Control': 'no-cache', 'X-Versao-Dados': versao}
+
+        # Consulta repetida pelo mesmo cliente: nada a calcular nem a enviar
+        if etag in [e.strip() for e in cabecalhos.get('if-none-match', '').split(',')]:
+            return self._resposta(304, None, cabecalhos_resposta)
+
+        with self._lock:
+            corpo = self._respostas.get((versao, consulta))
+            if corpo is not None:
+                self._respostas.move_to_end((versao, consulta))
+        if corpo is None:
+            try:
+                self._preparar(versao)
+                dados = self.rotas[rota](parametros)
+                corpo = json.dumps(_json_compativel(dados), ensure_ascii=False, allow_nan=False).encode('utf-8')
+            except ErroRequisicao as e:
+                return self._erro(400, str(e))
+            except Exception:
+                logger.exception(f"API: erro ao responder {consulta}")
+                return self._erro(500, "erro interno ao processar a requisição")
+            with self._lock:
+                # Só guarda se os dados ainda forem desta versão (outra requisição pode ter trocado)
+                if self._versao_carregada == versao:
+                    self._respostas[(versao, consulta)] = corpo
+                    while len(self._respostas) > self.max_respostas:
+                        self._respostas.popitem(last=False)
+        return self._resposta(200, corpo, cabecalhos_resposta)
+
+
+def criar_servidor(api, host='127.0.0.1', porta=PORTA_PADRAO):
+    """Servidor HTTP (uma thread por requisição) que repassa os GETs para `api.responder`."""
+
+    class Manipulador(BaseHTTPRequestHandler):
+        def _enviar(self, com_corpo):
+            status, cabecalhos, corpo = api.responder(self.path, dict(self.headers.items()))
+            self.send_response(status)
+            for nome, valor in cabecalhos.items():
+                self.send_header(nome, valor)
+            self.end_headers()
+            if com_corpo and corpo is not None:
+                self.wfile.write(corpo)
+
+        def do_GET(self):
+            self._enviar(True)
+
+        def do_HEAD(self):
+            self._enviar(False)
+
+        def log_message(self, formato, *args):
+            logger.debug(f"{self.address_string()} {formato % args}")
+
+    return ThreadingHTTPServer((host, porta), Manipulador)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API HTTP/JSON somente leitura com os agregados do dashboard")
+    parser.add_argument('--db', default=os.path.join(project_root, 'database', 'TESTE_DIATEX_PROD.db'))
+    parser.add_argument('--shards', default=None, help="Pasta dos shards (src/shards.py), no lugar do --db")
+    parser.add_argument('--resultados', default=CAMINHO_RESULTADOS, help="Banco gerado por src/precalculo.py")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    args = parser.parse_args()
+
+    servidor = criar_servidor(ApiDiatex(args.db, args.shards, args.resultados), args.host, args.porta)
+    logger.info(f"API disponível em http://{args.host}:{args.porta}/api/versao")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
@@ -0,0 +1,121 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Unidades de reamostragem: leituras do mesmo lote (ou do mesmo lote no mesmo dia) são
+# correlacionadas, então o bootstrap sorteia blocos inteiros e não leituras individuais
+UNIDADES_REAMOSTRAGEM = {
+    'lote': ['lote_composto'],
+    'dia': ['lote_composto', 'Fecha'],
+}
+N_REAMOSTRAGENS = 10_000
+NIVEL_CONFIANCA = 0.95
+# Mínimo de blocos por tratamento para que o intervalo tenha sentido
+MIN_BLOCOS = 2
+# Reamostragens por tarefa: cada bloco de reamostragens tem sua própria semente, então o
+# resultado não depende do número de threads
+REAMOSTRAGENS_POR_TAREFA = 1_000
+SEMENTE = 2025
+
+
+def somas_por_bloco(df, variavel, unidade='lote'):
+    """Contagem, soma e soma dos quadrados de `variavel` por tratamento e bloco de reamostragem."""
+    chaves = UNIDADES_REAMOSTRAGEM[unidade]
+    dados = df[['teste'] + chaves + [variavel]].dropna()
+    y = dados[variavel].to_numpy(dtype=float)
+    parcelas = pd.DataFrame({'n': np.ones(len(y)), 'soma': y, 'soma2': y * y}, index=dados.index)
+    for chave in ['teste'] + chaves:
+        parcelas[chave] = dados[chave]
+    return parcelas.groupby(['teste'] + chaves, observed=True)[['n', 'soma', 'soma2']].sum()
+
+
+def _media_desvio(n, soma, soma2):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = soma / n
+        desvio = np.sqrt(np.clip((soma2 - soma * soma / n) / (n - 1), 0, None))
+    return media, desvio
+
+
+def _reamostrar(somas, n_reamostragens, rng):
+    """Média e desvio padrão de cada reamostragem, sorteando blocos com reposição.
+
+    `somas` tem as linhas n, soma e soma2 e uma coluna por bloco. Os sorteios viram uma
+    matriz de contagens (reamostragem x bloco); as somas de cada reamostragem saem de um
+    único produto matricial com as somas dos blocos.
+    """
+    k = somas.shape[1]
+    sorteio = rng.integers(0, k, size=(n_reamostragens, k))
+    deslocamento = np.arange(n_reamostragens)[:, None] * k
+    contagens = np.bincount((sorteio + deslocamento).ravel(), minlength=n_reamostragens * k)
+    contagens = contagens.reshape(n_reamostragens, k).astype(float)
+    return _media_desvio(*(contagens @ somas.T).T)
+
+
+def _tarefa(blocos_diatex, blocos_testemunha, n_reamostragens, semente):
+    rng = np.random.default_rng(semente)
+    media_d, desvio_d = _reamostrar(blocos_diatex, n_reamostragens, rng)
+    media_t, desvio_t = _reamostrar(blocos_testemunha, n_reamostragens, rng)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        eficacia = (media_t - media_d) / media_t * 100
+        reducao = (desvio_t - desvio_d) / desvio_t * 100
+    return eficacia, reducao
+
+
+def bootstrap_eficacia(df, unidade='lote', n_reamostragens=N_REAMOSTRAGENS, nivel=NIVEL_CONFIANCA,
+                       semente=SEMENTE, max_workers=None):
+    """Intervalos de confiança por bootstrap de blocos para a eficácia de NH3 e a redução de variabilidade.
+
+    Os blocos (lotes ou dias de cada lote) são sorteados com reposição dentro de cada
+    tratamento. As estimativas pontuais são as mesmas de calcular_metricas_desempenho.
+    Retorna None se algum tratamento tiver menos de MIN_BLOCOS blocos.
+    """
+    somas = somas_por_bloco(df, 'NH3', unidade)
+    tratamentos = somas.index.get_level_values('teste')
+    blocos = {t: somas[tratamentos == t].to_numpy().T for t in ['DIATEX', 'TESTEMUNHA']}
+    if any(b.shape[1] < MIN_BLOCOS for b in blocos.values()):
+        return None
+
+    # Estimativas pontuais sobre todos os dados
+    media, desvio = {}, {}
+    for t, b in blocos.items():
+        media[t], desvio[t] = _media_desvio(*b.sum(axis=1))
+    eficacia = (media['TESTEMUNHA'] - media['DIATEX']) / media['TESTEMUNHA'] * 100
+    reducao = (desvio['TESTEMUNHA'] - desvio['DIATEX']) / desvio['TESTEMUNHA'] * 100
+
+    tamanhos = [REAMOSTRAGENS_POR_TAREFA] * (n_reamostragens // REAMOSTRAGENS_POR_TAREFA)
+    if n_reamostragens % REAMOSTRAGENS_POR_TAREFA:
+        tamanhos.append(n_reamostragens % REAMOSTRAGENS_POR_TAREFA)
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    # O produto matricial do NumPy libera o GIL, então as tarefas rodam em paralelo nas threads
+    with ThreadPoolExecutor(max_workers=max_workers or min(len(tamanhos), os.cpu_count() or 1)) as executor:
+        partes = list(executor.map(_tarefa, [blocos['DIATEX']] * len(tamanhos), [blocos['TESTEMUNHA']] * len(tamanhos),
+                                   tamanhos, sementes))
+    eficacias = np.concatenate([p[0] for p in partes])
+    reducoes = np.concatenate([p[1] for p in partes])
+
+    caudas = [(1 - nivel) / 2 * 100, (1 + nivel) / 2 * 100]
+    ic_eficacia = np.nanpercentile(eficacias, caudas)
+    ic_reducao = np.nanpercentile(reducoes, caudas)
+    return {
+        'unidade': unidade,
+        'reamostragens': n_reamostragens,
+        'nivel': nivel,
+        'blocos': {t: int(b.shape[1]) for t, b in blocos.items()},
+        'eficacia_nh3': {'estimativa': float(eficacia), 'inferior': float(ic_eficacia[0]),
+                         'superior': float(ic_eficacia[1])},
+        'reducao_variabilidade': {'estimativa': float(reducao), 'inferior': float(ic_reducao[0]),
+                                  'superior': float(ic_reducao[1])},
+        # Fração das reamostragens em que o DIATEX reduziu o NH3
+        'prob_reducao': float(np.nanmean(eficacias > 0)),
+        'significativo': bool(ic_eficacia[0] > 0 or ic_eficacia[1] < 0),
+    }
+
+
+def descrever_intervalo(intervalos, chave='eficacia_nh3'):
+    """Texto do intervalo para alertas e relatórios (ex.: 'IC 95% (bootstrap por lote, 6 x 6 blocos): 3.1% a 18.2%')."""
+    ic = intervalos[chave]
+    return (f"IC {intervalos['nivel']:.0%} (bootstrap por {intervalos['unidade']}, "
+            f"{intervalos['blocos']['DIATEX']} x {intervalos['blocos']['TESTEMUNHA']} blocos): "
+            f"{ic['inferior']:.1f}% a {ic['superior']:.1f}%")
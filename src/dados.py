@@ -0,0 +1,198 @@
+import numpy as np
+import pandas as pd
+
+from src.validacao import momentos_leitura
+from src.utils.conexao import conexao_leitura
+
+
+# Medições com os metadados do tratamento (join na tabela tratamentos)
+CONSULTA_MEDICOES = """
+    SELECT 
+        m.Fecha, m.Hora, m.NH3, m.Temperatura, m.Humedad, 
+        m.Nome_Arquivo, m.lote_composto, m.idade_lote, m.n_cama, m.teste,
+        t.produtor, t.linhagem, t.bateria_teste
+    FROM medicoes m
+    LEFT JOIN tratamentos t ON m.lote_composto = t.lote_composto
+    WHERE m.teste IS NOT NULL AND m.teste != ''
+    """
+
+# Linhas lidas do banco por vez em carregar_medicoes
+TAMANHO_BLOCO_LEITURA = 1_000_000
+
+
+# Função para carregar os dados do banco SQLite
+def carregar_medicoes(caminho_db):
+    """Carrega as medições com os metadados do tratamento (DataFrame vazio se não houver tratamentos válidos)"""
+    # Conexão somente leitura do pool compartilhado entre as sessões do dashboard
+    with conexao_leitura(caminho_db) as conn:
+        # Carregar dados da tabela medicoes com join na tabela tratamentos, compactando bloco a bloco
+        # para que o texto bruto de todas as linhas nunca fique em memória ao mesmo tempo
+        blocos = [preparar_medicoes(bloco) for bloco in
+                  pd.read_sql_query(CONSULTA_MEDICOES, conn, chunksize=TAMANHO_BLOCO_LEITURA)]
+    
+    return concatenar_medicoes(blocos)
+
+
+# Rótulos com poucos valores distintos, guardados como categóricos
+COLUNAS_CATEGORICAS = ['teste', 'produtor', 'linhagem', 'bateria_teste', 'lote_composto']
+# Leituras inteiras: viram o menor inteiro que as comporta (ou float32 se houver ausentes)
+COLUNAS_INTEIRAS = ['NH3', 'Humedad', 'idade_lote', 'n_cama']
+# Texto que só serve para derivar data_hora e aviario, descartado em seguida
+COLUNAS_REDUNDANTES = ['Hora', 'Nome_Arquivo']
+
+
+def _aviarios(nomes_arquivo):
+    """Número do aviário extraído do nome do arquivo, uma vez por nome distinto (categórico)."""
+    codigos, distintos = pd.factorize(nomes_arquivo, use_na_sentinel=True)
+    aviarios = pd.Series(distintos, dtype='string').str.extract(r'(\d+)', expand=False).to_numpy(dtype=object)
+    # O código -1 (arquivo ausente) aponta para o NaN acrescentado no fim
+    return pd.Categorical(np.append(aviarios, np.nan)[codigos])
+
+
+def _inteiro_estreito(serie):
+    if serie.notna().all():
+        return pd.to_numeric(serie, downcast='integer')
+    return serie.astype('float32')
+
+
+# Função para criar as colunas derivadas usadas pelo dashboard
+def preparar_medicoes(df):
+    """Converte data/hora, cria semana de vida e aviário e compacta os tipos das colunas"""
+    if len(df) == 0:
+        return df
+    
+    # Converter colunas de data e hora (só os valores distintos de cada uma são interpretados)
+    df['data_hora'] = momentos_leitura(df)
+    df['Fecha'] = pd.to_datetime(df['Fecha'])
+    
+    # Criar coluna de aviário (extrair do nome do arquivo)
+    df['aviario'] = _aviarios(df['Nome_Arquivo'])
+    
+    # Tipos compactos: categóricos para rótulos e números estreitos para as leituras
+    for coluna in COLUNAS_CATEGORICAS:
+        df[coluna] = df[coluna].astype('category')
+    for coluna in COLUNAS_INTEIRAS:
+        df[coluna] = _inteiro_estreito(df[coluna])
+    df['Temperatura'] = df['Temperatura'].astype('float32')
+    
+    # Criar coluna de semana de vida
+    df['semana_vida'] = (df['idade_lote'] // 7) + 1
+    
+    return df.drop(columns=COLUNAS_REDUNDANTES)
+
+
+# Função para juntar blocos já preparados
+def concatenar_medicoes(blocos):
+    """Concatena os blocos mantendo as colunas categóricas (categorias diferentes entre blocos são unidas)"""
+    if not blocos:
+        return pd.DataFrame()
+    if len(blocos) == 1:
+        return blocos[0]
+    df = pd.concat(blocos, ignore_index=True)
+    for coluna in COLUNAS_CATEGORICAS + ['aviario']:
+        if not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype('category')
+    return df
+
+
+# Função para carregar as leituras alinhadas aos chips
+def carregar_medicoes_chip(caminho_db):
+    """Carrega a tabela medicoes_chip gerada por src/alinhamento.py (DataFrame vazio se ainda não existir)"""
+    with conexao_leitura(caminho_db) as conn:
+        existe = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'medicoes_chip'"
+        ).fetchone()
+        if not existe:
+            return pd.DataFrame()
+        df = pd.read_sql_query("SELECT * FROM medicoes_chip", conn)
+    
+    df['Fecha'] = pd.to_datetime(df['Fecha'])
+    df['aviario'] = df['ID_Aviario'].str.extract(r'(\d+)', expand=False).astype(str)
+    return df
+
+
+# Episódios de NH3 com o lote/tratamento do aviário na data de início (mesma regra de 2_pop_medicoes_meta.sql)
+CONSULTA_EPISODIOS = """
+    SELECT e.*, t.lote_composto, t.teste
+    FROM episodios_nh3 e
+    LEFT JOIN tratamentos t
+        ON t.aviario = e.ID_Aviario
+        AND DATE(e.inicio) BETWEEN t.data_alojamento AND COALESCE(t.data_retirada, '9999-12-31')
+    ORDER BY e.inicio DESC
+    """
+
+
+# Função para carregar os episódios de exposição e subida de NH3
+def carregar_episodios(caminho_db):
+    """Carrega a tabela episodios_nh3 gravada por src/episodios.py (DataFrame vazio se ainda não existir)"""
+    with conexao_leitura(caminho_db) as conn:
+        tabelas = {nome for (nome,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('episodios_nh3', 'tratamentos')")}
+        if 'episodios_nh3' not in tabelas:
+            return pd.DataFrame()
+        consulta = CONSULTA_EPISODIOS if 'tratamentos' in tabelas else "SELECT * FROM episodios_nh3 ORDER BY inicio DESC"
+        df = pd.read_sql_query(consulta, conn)
+    
+    df['inicio'] = pd.to_datetime(df['inicio'])
+    df['fim'] = pd.to_datetime(df['fim'])
+    df['Fecha'] = df['inicio'].dt.normalize()
+    df['aviario'] = df['ID_Aviario'].str.extract(r'(\d+)', expand=False).astype(str)
+    return df
+
+
+def carregar_falhas(caminho_db):
+    """Carrega a tabela falhas_sensor gravada por src/falhas.py (DataFrame vazio se ainda não existir)"""
+    with conexao_leitura(caminho_db) as conn:
+        existe = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'falhas_sensor'"
+        ).fetchone()
+        if not existe:
+            return pd.DataFrame()
+        df = pd.read_sql_query("SELECT * FROM falhas_sensor ORDER BY inicio DESC", conn)
+    
+    df['inicio'] = pd.to_datetime(df['inicio'])
+    df['fim'] = pd.to_datetime(df['fim'])
+    df['Fecha'] = df['inicio'].dt.normalize()
+    df['aviario'] = df['ID_Aviario'].str.extract(r'(\d+)', expand=False).astype(str)
+    return df
+
+
+def carregar_exposicao(caminho_db):
+    """Carrega a tabela exposicao_lote gravada por src/exposicao.py (DataFrame vazio se ainda não existir)"""
+    with conexao_leitura(caminho_db) as conn:
+        existe = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'exposicao_lote'"
+        ).fetchone()
+        if not existe:
+            return pd.DataFrame()
+        df = pd.read_sql_query("SELECT * FROM exposicao_lote ORDER BY lote_composto", conn)
+    
+    df = df.rename(columns={'aviario': 'ID_Aviario'})
+    df['aviario'] = df['ID_Aviario'].str.extract(r'(\d+)', expand=False).astype(str)
+    return df
+
+
+# Função para aplicar os filtros da sidebar
+def aplicar_filtros(df, periodo=None, produtor=None, linhagem=None, bateria=None, lote=None,
+                    aviario=None, idade=None, semana=None):
+    """Aplica os filtros em uma única máscara booleana (filtros None são ignorados)"""
+    mascara = np.ones(len(df), dtype=bool)
+    
+    if periodo is not None:
+        # Fecha não tem componente de hora, então comparar com as datas à meia-noite equivale a comparar datas
+        mascara &= (df['Fecha'] >= pd.Timestamp(periodo[0])).to_numpy(dtype=bool, na_value=False)
+        mascara &= (df['Fecha'] <= pd.Timestamp(periodo[1])).to_numpy(dtype=bool, na_value=False)
+    
+    for coluna, valor in [('produtor', produtor), ('linhagem', linhagem), ('bateria_teste', bateria),
+                          ('lote_composto', lote), ('aviario', aviario)]:
+        if valor is not None:
+            mascara &= (df[coluna] == valor).to_numpy(dtype=bool, na_value=False)
+    
+    for coluna, intervalo in [('idade_lote', idade), ('semana_vida', semana)]:
+        if intervalo is not None:
+            mascara &= df[coluna].between(intervalo[0], intervalo[1]).to_numpy(dtype=bool, na_value=False)
+    
+    # Sem nenhuma linha excluída, devolve o próprio DataFrame (compartilhado) em vez de uma cópia
+    if mascara.all():
+        return df
+    return df[mascara]
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+# Uma leitura é identificada pelo aviário e pelo horário
+CHAVES_DEDUPLICACAO = ['ID_Aviario', 'Fecha', 'Hora']
+COLUNAS_VALOR = ['NH3', 'Temperatura', 'Humedad']
+
+
+def codigo_chave(df, chaves=CHAVES_DEDUPLICACAO):
+    """Combina as chaves em um único inteiro (factorize de cada coluna + base mista)."""
+    codigo = np.zeros(len(df), dtype=np.int64)
+    for coluna in chaves:
+        codigos, distintos = pd.factorize(df[coluna], use_na_sentinel=False)
+        codigo = codigo * (len(distintos) + 1) + codigos
+    return codigo
+
+
+def remover_duplicatas(df, chaves=CHAVES_DEDUPLICACAO, coluna_arquivo='Nome_Arquivo'):
+    """Remove leituras repetidas de (aviário, data, hora) em tempo linear (uma passada de hash).
+
+    Regra para valores conflitantes: vale a primeira ocorrência na ordem do DataFrame, ou
+    seja, a do primeiro arquivo na ordem de processamento (pt1 antes de pt2). Retorna
+    (df sem duplicatas, resumo) com o total removido, quantas das removidas tinham valores
+    diferentes da mantida e as removidas por arquivo.
+    """
+    # factorize numera as chaves na ordem da primeira ocorrência: uma linha é a primeira
+    # da sua chave exatamente quando o número dela supera todos os anteriores
+    grupos, _ = pd.factorize(codigo_chave(df, chaves))
+    maximo_anterior = np.maximum.accumulate(np.concatenate(([-1], grupos[:-1])))
+    duplicada = grupos <= maximo_anterior
+    n_duplicadas = int(duplicada.sum())
+
+    conflitantes = 0
+    por_arquivo = {}
+    if n_duplicadas:
+        # Compara cada duplicata com a leitura mantida (primeira linha do mesmo grupo)
+        mantida = np.flatnonzero(~duplicada)[grupos[duplicada]]
+        valores = df[COLUNAS_VALOR].astype('float64').to_numpy()
+        a, b = valores[duplicada], valores[mantida]
+        conflitantes = int((~((a == b) | (np.isnan(a) & np.isnan(b))).all(axis=1)).sum())
+        if coluna_arquivo in df:
+            por_arquivo = df.loc[duplicada, coluna_arquivo].value_counts().to_dict()
+
+    resumo = {
+        'linhas_duplicadas': n_duplicadas,
+        'linhas_conflitantes': conflitantes,
+        'por_arquivo': {str(k): int(v) for k, v in por_arquivo.items()},
+    }
+    return df[~duplicada], resumo
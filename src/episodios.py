@@ -0,0 +1,200 @@
+import os
+import sys
+import sqlite3
+import argparse
+
+# Adicionar a raiz do projeto ao Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from src.validacao import momentos_leitura
+from src.utils.logger import setup_logger
+
+logger = setup_logger('episodios')
+
+# Exposição sustentada: NH3 acima do limiar (ppm) por pelo menos `minutos`
+REGRAS_EXPOSICAO = [
+    {'nivel': 'atencao', 'limiar': 20, 'minutos': 60},
+    {'nivel': 'critico', 'limiar': 25, 'minutos': 30},
+]
+# Subida rápida: NH3 (média móvel de `suavizacao` min, para ignorar leituras isoladas) pelo
+# menos `ppm` acima do seu mínimo nos últimos `minutos`
+REGRA_SUBIDA = {'nivel': 'subida', 'ppm': 10, 'minutos': 60, 'suavizacao': 15}
+
+# Intervalo entre leituras acima do qual uma sequência é interrompida (os sensores gravam a cada 3-5 min)
+LACUNA_MAXIMA = pd.Timedelta(minutes=15)
+
+COLUNAS_EPISODIOS = ['ID_Aviario', 'tipo', 'nivel', 'limiar', 'inicio', 'fim', 'duracao_min',
+                     'n_leituras', 'pico', 'media', 'variacao']
+
+
+def _janela_maxima(regras, subida):
+    return pd.Timedelta(minutes=max([r['minutos'] for r in regras] + [subida['minutos']]))
+
+
+def preparar_leituras(leituras):
+    """Leituras válidas ordenadas por aviário e momento (colunas ID_Aviario, momento, NH3)."""
+    dados = leituras.assign(momento=momentos_leitura(leituras))[['ID_Aviario', 'momento', 'NH3']]
+    dados = dados.dropna().sort_values(['ID_Aviario', 'momento'], kind='stable')
+    return dados.reset_index(drop=True)
+
+
+def _sequencias(dados, condicao):
+    """Numera as sequências de leituras consecutivas que satisfazem `condicao` no mesmo aviário.
+
+    Uma sequência termina quando a condição deixa de valer, o aviário muda ou há uma
+    lacuna maior que LACUNA_MAXIMA. Retorna o número da sequência de cada leitura selecionada.
+    """
+    aviario = dados['ID_Aviario'].to_numpy()
+    momento = dados['momento'].to_numpy()
+    quebra = np.ones(len(dados), dtype=bool)
+    quebra[1:] = ((aviario[1:] != aviario[:-1])
+                  | (np.diff(momento) > LACUNA_MAXIMA.to_timedelta64())
+                  | ~condicao[:-1])
+    return np.cumsum(condicao & quebra)[condicao]
+
+
+def _resumir(dados, condicao, valor_extra=None):
+    """Um registro por sequência: aviário, início, fim, duração, leituras, pico e média de NH3."""
+    selecionadas = dados[condicao].assign(variacao=np.nan if valor_extra is None else valor_extra[condicao])
+    grupos = selecionadas.groupby(_sequencias(dados, condicao), sort=False)
+    resumo = grupos.agg(ID_Aviario=('ID_Aviario', 'first'), inicio=('momento', 'min'), fim=('momento', 'max'),
+                        n_leituras=('NH3', 'size'), pico=('NH3', 'max'), media=('NH3', 'mean'),
+                        variacao=('variacao', 'max'))
+    resumo['duracao_min'] = (resumo['fim'] - resumo['inicio']) / pd.Timedelta(minutes=1)
+    return resumo.reset_index(drop=True)
+
+
+def janela_movel(dados, valores, minutos, funcao):
+    """Agregação móvel (`funcao`: 'mean', 'min', ...) de `valores` por aviário nos últimos `minutos`."""
+    janela = (dados[['ID_Aviario', 'momento']].assign(valor=valores)
+              .groupby('ID_Aviario', sort=False).rolling(f'{minutos}min', on='momento')['valor'].agg(funcao))
+    # `dados` vem ordenado por aviário e momento, então o resultado já está na mesma ordem
+    return janela.to_numpy(dtype=float)
+
+
+def detectar_episodios(dados, regras=REGRAS_EXPOSICAO, subida=REGRA_SUBIDA):
+    """Episódios de exposição sustentada e de subida rápida em leituras já preparadas.
+
+    Tudo é feito em passadas vetorizadas sobre todos os aviários ao mesmo tempo; não há
+    laço por leitura nem por aviário.
+    """
+    if dados.empty:
+        return pd.DataFrame(columns=COLUNAS_EPISODIOS)
+    nh3 = dados['NH3'].to_numpy(dtype=float)
+
+    partes = []
+    for regra in regras:
+        episodios = _resumir(dados, nh3 > regra['limiar'])
+        episodios = episodios[episodios['duracao_min'] >= regra['minutos']]
+        partes.append(episodios.assign(tipo='exposicao', nivel=regra['nivel'], limiar=float(regra['limiar'])))
+
+    suavizado = janela_movel(dados, nh3, subida['suavizacao'], 'mean')
+    variacao = suavizado - janela_movel(dados, suavizado, subida['minutos'], 'min')
+    partes.append(_resumir(dados, variacao >= subida['ppm'], variacao)
+                  .assign(tipo='subida', nivel=subida['nivel'], limiar=float(subida['ppm'])))
+
+    partes = [p for p in partes if len(p)]
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_EPISODIOS)
+    return pd.concat(partes, ignore_index=True)[COLUNAS_EPISODIOS]
+
+
+def _criar_tabelas(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS episodios_nh3 (
+            ID_Aviario TEXT, tipo TEXT, nivel TEXT, limiar REAL, inicio TEXT, fim TEXT,
+            duracao_min REAL, n_leituras INTEGER, pico REAL, media REAL, variacao REAL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_episodios_nh3 ON episodios_nh3 (ID_Aviario, inicio)")
+    # Última leitura já processada de cada aviário
+    conn.execute("CREATE TABLE IF NOT EXISTS episodios_nh3_controle (ID_Aviario TEXT PRIMARY KEY, processado_ate TEXT)")
+
+
+def _formatar(momentos):
+    return pd.to_datetime(momentos).dt.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def atualizar_episodios(caminho_db, regras=REGRAS_EXPOSICAO, subida=REGRA_SUBIDA, recalcular=False):
+    """Atualiza a tabela episodios_nh3 com as leituras novas da tabela medicoes.
+
+    Para cada aviário só a cauda é reprocessada: a partir do início do episódio ainda aberto
+    (que termina na última leitura processada) ou da janela mais longa das regras, o que vier
+    antes, com o histórico da janela de subida antes disso. Episódios já fechados não mudam.
+    Use `recalcular=True` quando leituras antigas forem alteradas. Retorna os episódios gravados.
+    """
+    janela = _janela_maxima(regras, subida)
+    historico = pd.Timedelta(minutes=subida['minutos'] + subida['suavizacao'])
+
+    with sqlite3.connect(caminho_db) as conn:
+        _criar_tabelas(conn)
+        if recalcular:
+            conn.execute("DELETE FROM episodios_nh3")
+            conn.execute("DELETE FROM episodios_nh3_controle")
+
+        controle = pd.read_sql_query("""
+            SELECT c.ID_Aviario, c.processado_ate, MIN(e.inicio) AS inicio_aberto
+            FROM episodios_nh3_controle c
+            LEFT JOIN episodios_nh3 e ON e.ID_Aviario = c.ID_Aviario AND e.fim = c.processado_ate
+            GROUP BY c.ID_Aviario, c.processado_ate
+        """, conn)
+        aviarios = [a for (a,) in conn.execute("SELECT DISTINCT ID_Aviario FROM medicoes WHERE ID_Aviario IS NOT NULL")]
+
+        controle = controle.set_index('ID_Aviario')
+        processado = pd.to_datetime(controle['processado_ate'])
+        corte = pd.to_datetime(pd.concat([processado - janela, pd.to_datetime(controle['inicio_aberto'])],
+                                         axis=1).min(axis=1))
+        leituras = []
+        for aviario in aviarios:
+            if aviario in corte.index:
+                desde = (corte[aviario] - historico).strftime('%Y-%m-%d')
+                parte = pd.read_sql_query("SELECT ID_Aviario, Fecha, Hora, NH3 FROM medicoes "
+                                          "WHERE ID_Aviario = ? AND Fecha >= ?", conn, params=(aviario, desde))
+            else:
+                parte = pd.read_sql_query("SELECT ID_Aviario, Fecha, Hora, NH3 FROM medicoes "
+                                          "WHERE ID_Aviario = ?", conn, params=(aviario,))
+            leituras.append(parte)
+
+        dados = preparar_leituras(pd.concat(leituras, ignore_index=True)) if leituras else preparar_leituras(
+            pd.DataFrame(columns=['ID_Aviario', 'Fecha', 'Hora', 'NH3']))
+        ultimas = dados.groupby('ID_Aviario')['momento'].max()
+        novas = ultimas[~ultimas.index.isin(processado.index) | (ultimas > processado.reindex(ultimas.index))]
+        if novas.empty:
+            logger.info("Episódios de NH3: nenhuma leitura nova")
+            return pd.DataFrame(columns=COLUNAS_EPISODIOS)
+
+        dados = dados[dados['ID_Aviario'].isin(novas.index)].reset_index(drop=True)
+        episodios = detectar_episodios(dados, regras, subida)
+        # Só os episódios que começam a partir do corte; os anteriores já estão gravados
+        limite = corte.reindex(episodios['ID_Aviario'].to_numpy())
+        episodios = episodios[limite.isna().to_numpy() | (episodios['inicio'].to_numpy() >= limite.to_numpy())]
+
+        for aviario in novas.index:
+            if aviario in corte.index:
+                conn.execute("DELETE FROM episodios_nh3 WHERE ID_Aviario = ? AND inicio >= ?",
+                             (aviario, corte[aviario].strftime('%Y-%m-%d %H:%M:%S')))
+        gravar = episodios.assign(inicio=_formatar(episodios['inicio']), fim=_formatar(episodios['fim']))
+        gravar.to_sql('episodios_nh3', conn, if_exists='append', index=False)
+        conn.executemany("INSERT OR REPLACE INTO episodios_nh3_controle VALUES (?, ?)",
+                         list(zip(novas.index, _formatar(pd.Series(novas.to_numpy())))))
+        conn.commit()
+
+    logger.info(f"Episódios de NH3: {len(episodios):,} gravados para {len(novas)} aviário(s)", extra={'dados': {
+        'evento': 'episodios_nh3', 'aviarios': len(novas), 'leituras_processadas': len(dados),
+        'episodios': int(len(episodios)),
+        'por_nivel': episodios['nivel'].value_counts().to_dict(),
+    }})
+    return episodios
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detecta episódios de exposição sustentada e subida rápida de NH3 por aviário")
+    parser.add_argument('--db', default=os.path.join(project_root, 'database', 'TESTE_DIATEX_PROD.db'))
+    parser.add_argument('--recalcular', action='store_true', help="Descarta os episódios gravados e processa todas as leituras")
+    args = parser.parse_args()
+
+    atualizar_episodios(args.db, recalcular=args.recalcular)
@@ -0,0 +1,90 @@
+import os
+import tempfile
+
+from src.utils.cache import limpar_arquivos_antigos
+
+# Diretório onde os arquivos exportados ficam guardados para reaproveitamento
+DIR_EXPORTACAO = os.path.join(tempfile.gettempdir(), 'diatex_exportacoes')
+
+# Linhas convertidas por vez; mantém o uso de memória constante em exportações grandes
+TAMANHO_BLOCO_EXPORTACAO = 250_000
+
+# Quantidade máxima de arquivos mantidos no diretório de exportação
+MAX_ARQUIVOS_EXPORTACAO = 20
+
+FORMATOS_EXPORTACAO = {
+    'csv': {'extensao': 'csv', 'mime': 'text/csv'},
+    'parquet': {'extensao': 'parquet', 'mime': 'application/vnd.apache.parquet'},
+}
+
+
+def _blocos(df, tamanho_bloco):
+    for inicio in range(0, len(df), tamanho_bloco):
+        yield df.iloc[inicio:inicio + tamanho_bloco]
+
+
+def _escrever_csv(df, caminho, tamanho_bloco):
+    with open(caminho, 'w', encoding='utf-8', newline='') as f:
+        if len(df) == 0:
+            df.to_csv(f, index=False)
+        for i, bloco in enumerate(_blocos(df, tamanho_bloco)):
+            bloco.to_csv(f, index=False, header=(i == 0))
+
+
+def _escrever_parquet(df, caminho, tamanho_bloco):
+    # O pyarrow só é carregado quando uma exportação Parquet é pedida
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(caminho, schema, compression='zstd') as writer:
+        for bloco in _blocos(df, tamanho_bloco):
+            writer.write_table(pa.Table.from_pandas(bloco, schema=schema, preserve_index=False))
+
+
+def caminho_exportacao(formato, versao, chave, diretorio=DIR_EXPORTACAO):
+    """Caminho do arquivo exportado para a versão dos dados e o filtro informados."""
+    extensao = FORMATOS_EXPORTACAO[formato]['extensao']
+    return os.path.join(diretorio, f"export_{versao}_{chave}.{extensao}")
+
+
+def exportar_dados(df, formato, versao, chave, diretorio=DIR_EXPORTACAO,
+                   tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO):
+    """Grava o DataFrame em blocos no formato pedido e retorna o caminho; reaproveita o arquivo se já existir."""
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+
+    caminho = caminho_exportacao(formato, versao, chave, diretorio)
+    if os.path.exists(caminho):
+        os.utime(caminho)  # Marca como usado recentemente
+        return caminho
+
+    os.makedirs(diretorio, exist_ok=True)
+    # Grava em arquivo temporário e renomeia ao final: downloads concorrentes
+    # nunca enxergam um arquivo pela metade
+    fd, parcial = tempfile.mkstemp(dir=diretorio, suffix='.parcial')
+    os.close(fd)
+    try:
+        if formato == 'csv':
+            _escrever_csv(df, parcial, tamanho_bloco)
+        else:
+            _escrever_parquet(df, parcial, tamanho_bloco)
+        os.replace(parcial, caminho)
+    finally:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+
+    limpar_arquivos_antigos(diretorio, 'export_*', MAX_ARQUIVOS_EXPORTACAO)
+    return caminho
+
+
+def gerador_exportacao(df, formato, versao, chave, diretorio=DIR_EXPORTACAO):
+    """Retorna uma função sem argumentos que gera (ou reaproveita) a exportação e devolve seus bytes.
+
+    Serve como `data` de `st.download_button`: nada é gerado até o usuário clicar. A escrita é feita
+    em blocos, mas o Streamlit guarda o arquivo inteiro em memória para servir o download.
+    """
+    def ler():
+        with open(exportar_dados(df, formato, versao, chave, diretorio), 'rb') as f:
+            return f.read()
+    return ler
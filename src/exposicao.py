@@ -0,0 +1,215 @@
+import os
+import sys
+import time
+import sqlite3
+import argparse
+from contextlib import closing
+
+# Adicionar a raiz do projeto ao Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from src.validacao import momentos_leitura
+from src.utils.logger import setup_logger
+
+logger = setup_logger('exposicao')
+
+# Minutos com NH3 acima de cada limiar (ppm)
+LIMIARES_NH3 = [10, 20, 25]
+# Graus-hora de estresse térmico: integral da temperatura acima deste limiar (°C)
+LIMIAR_TEMPERATURA = 30.0
+# Intervalo entre leituras acima do qual o trecho não é integrado (os sensores gravam a cada 3-5 min)
+LACUNA_MAXIMA = pd.Timedelta(minutes=15)
+
+# Somas por lote e semana de vida; todas são aditivas, então o lote inteiro é a soma das semanas
+COLUNAS_SOMAS = (['n_leituras', 'horas_nh3', 'ppm_horas_nh3']
+                 + [f'minutos_nh3_acima_{limiar}' for limiar in LIMIARES_NH3]
+                 + ['horas_temperatura', 'graus_hora_temperatura', f'graus_hora_acima_{LIMIAR_TEMPERATURA:g}'])
+COLUNAS_EXPOSICAO_SEMANA = ['lote_composto', 'semana_vida'] + COLUNAS_SOMAS
+
+# Resultados zootécnicos da tabela tratamentos juntados às somas de cada lote
+COLUNAS_RESULTADOS = ['aves_alojadas', 'peso_alojamento', 'peso_7d', 'peso_14d', 'peso_21d', 'peso_28d',
+                      'peso_35d', 'peso_42d', 'peso_abate', 'pc_cond_pes', 'pc_cond_aero']
+COLUNAS_LOTE = ['aviario', 'teste', 'bateria_teste', 'produtor', 'linhagem', 'data_alojamento', 'data_retirada']
+
+
+def _acima(inicio, fim, limiar, horas):
+    """Tempo (h) e área acima de `limiar` do segmento linear entre `inicio` e `fim` em cada intervalo."""
+    a, b = inicio - limiar, fim - limiar
+    maior, menor = np.maximum(a, b), np.minimum(a, b)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Segmento que cruza o limiar: só a fração maior / (maior - menor) fica acima
+        fracao = np.where(menor >= 0, 1.0, np.where(maior <= 0, 0.0, maior / (maior - menor)))
+        area = np.where(menor >= 0, (a + b) / 2, np.where(maior <= 0, 0.0, maior * fracao / 2))
+    return fracao * horas, area * horas
+
+
+def integrar_exposicao(leituras):
+    """Somas de exposição por lote e semana de vida, por integração trapezoidal entre leituras consecutivas.
+
+    `leituras` precisa das colunas lote_composto, idade_lote, Fecha, Hora, NH3 e Temperatura.
+    Cada intervalo entre duas leituras do mesmo lote (até LACUNA_MAXIMA) conta na semana da
+    leitura inicial; tudo é feito em uma passada vetorizada sobre todos os lotes.
+    """
+    dados = leituras.assign(momento=momentos_leitura(leituras))
+    dados = dados.dropna(subset=['lote_composto', 'momento', 'idade_lote'])
+    dados = dados[dados['idade_lote'] >= 0].sort_values(['lote_composto', 'momento'], kind='stable')
+    if dados.empty:
+        return pd.DataFrame(columns=COLUNAS_EXPOSICAO_SEMANA)
+
+    lote = dados['lote_composto'].to_numpy()
+    momento = dados['momento'].to_numpy()
+    intervalo = np.diff(momento)
+    # Intervalo que começa em cada leitura (a última de cada lote não começa nenhum)
+    continua = np.zeros(len(dados), dtype=bool)
+    continua[:-1] = ((lote[1:] == lote[:-1]) & (intervalo > np.timedelta64(0))
+                     & (intervalo <= LACUNA_MAXIMA.to_timedelta64()))
+    horas = np.zeros(len(dados))
+    horas[:-1] = intervalo / np.timedelta64(1, 'h')
+
+    somas = pd.DataFrame({
+        'lote_composto': lote,
+        'semana_vida': (dados['idade_lote'].to_numpy(dtype=int) // 7) + 1,
+        'n_leituras': 1,
+    })
+    for variavel, prefixo in [('NH3', 'nh3'), ('Temperatura', 'temperatura')]:
+        valores = pd.to_numeric(dados[variavel], errors='coerce').to_numpy(dtype=float)
+        inicio, fim = valores, np.append(valores[1:], np.nan)
+        valido = continua & ~np.isnan(inicio) & ~np.isnan(fim)
+        horas_validas = np.where(valido, horas, 0.0)
+        inicio, fim = np.where(valido, inicio, 0.0), np.where(valido, fim, 0.0)
+        somas[f'horas_{prefixo}'] = horas_validas
+        integral = (inicio + fim) / 2 * horas_validas
+        if variavel == 'NH3':
+            somas['ppm_horas_nh3'] = integral
+            for limiar in LIMIARES_NH3:
+                tempo, _ = _acima(inicio, fim, limiar, horas_validas)
+                somas[f'minutos_nh3_acima_{limiar}'] = tempo * 60
+        else:
+            somas['graus_hora_temperatura'] = integral
+            _, area = _acima(inicio, fim, LIMIAR_TEMPERATURA, horas_validas)
+            somas[f'graus_hora_acima_{LIMIAR_TEMPERATURA:g}'] = area
+
+    return somas.groupby(['lote_composto', 'semana_vida'], sort=True)[COLUNAS_SOMAS].sum().reset_index()
+
+
+def _medias_ponderadas(somas):
+    """Acrescenta as médias ponderadas pelo tempo (a média simples pesa mais os trechos com leituras a cada 3 min)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return somas.assign(
+            nh3_media_ponderada=np.where(somas['horas_nh3'] > 0, somas['ppm_horas_nh3'] / somas['horas_nh3'], np.nan),
+            temperatura_media_ponderada=np.where(somas['horas_temperatura'] > 0,
+                                                 somas['graus_hora_temperatura'] / somas['horas_temperatura'], np.nan),
+        )
+
+
+def montar_exposicao_lote(semanas, tratamentos):
+    """Uma linha por lote: somas de todas as semanas, médias ponderadas e os resultados zootécnicos."""
+    lotes = semanas.groupby('lote_composto')[COLUNAS_SOMAS].sum().reset_index()
+    lotes = lotes.assign(semanas=semanas.groupby('lote_composto')['semana_vida'].nunique().to_numpy())
+    colunas = ['lote_composto'] + [c for c in COLUNAS_LOTE + COLUNAS_RESULTADOS if c in tratamentos.columns]
+    resultados = tratamentos[colunas].copy()
+    # Resultados ainda não informados vêm como texto vazio do 1_pop_tratamentos.sql
+    for coluna in COLUNAS_RESULTADOS:
+        if coluna in resultados.columns:
+            resultados[coluna] = pd.to_numeric(resultados[coluna].replace('', np.nan), errors='coerce')
+    return _medias_ponderadas(lotes).merge(resultados, on='lote_composto', how='left')
+
+
+def _criar_tabelas(conn):
+    colunas = ', '.join(f'{c} REAL' for c in COLUNAS_SOMAS if c != 'n_leituras')
+    conn.execute(f"CREATE TABLE IF NOT EXISTS exposicao_semana "
+                 f"(lote_composto TEXT, semana_vida INTEGER, n_leituras INTEGER, {colunas})")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_exposicao_semana ON exposicao_semana (lote_composto, semana_vida)")
+
+
+def _copiar_anterior(conn, caminho_anterior):
+    """Reaproveita as somas de um banco já publicado (a cópia de trabalho da carga começa sem elas)."""
+    conn.execute("ATTACH DATABASE ? AS anterior", (caminho_anterior,))
+    try:
+        existe = conn.execute("SELECT 1 FROM anterior.sqlite_master WHERE type = 'table' "
+                              "AND name = 'exposicao_semana'").fetchone()
+        if existe:
+            colunas = ', '.join(COLUNAS_EXPOSICAO_SEMANA)
+            conn.execute(f"INSERT INTO exposicao_semana ({colunas}) SELECT {colunas} FROM anterior.exposicao_semana")
+            conn.commit()
+    except sqlite3.OperationalError as e:
+        # Colunas diferentes (regras alteradas): tudo é recalculado
+        logger.warning(f"Somas de exposição de {caminho_anterior} não reaproveitadas: {e}")
+        conn.execute("DELETE FROM exposicao_semana")
+        conn.commit()
+    finally:
+        conn.execute("DETACH DATABASE anterior")
+
+
+def atualizar_exposicao(caminho_db, anterior=None, recalcular=False):
+    """Atualiza as tabelas exposicao_semana (somas por lote e semana) e exposicao_lote (somas por lote
+    com os resultados zootécnicos de tratamentos).
+
+    Só as semanas cuja contagem de leituras mudou são reintegradas, a partir da semana anterior à
+    primeira alterada (o último intervalo dela termina na semana seguinte). `anterior` é um banco
+    já publicado cujas somas são reaproveitadas quando `caminho_db` ainda não as tem. Use
+    `recalcular=True` quando leituras antigas forem alteradas ou os lotes de tratamentos mudarem.
+    Retorna a tabela por lote.
+    """
+    inicio = time.perf_counter()
+    with closing(sqlite3.connect(caminho_db)) as conn, conn:
+        _criar_tabelas(conn)
+        if recalcular:
+            conn.execute("DELETE FROM exposicao_semana")
+        elif anterior and os.path.exists(anterior) and not conn.execute("SELECT 1 FROM exposicao_semana").fetchone():
+            _copiar_anterior(conn, anterior)
+
+        contagens = pd.read_sql_query("""
+            SELECT lote_composto, idade_lote / 7 + 1 AS semana_vida, COUNT(*) AS n_leituras
+            FROM medicoes
+            WHERE lote_composto IS NOT NULL AND idade_lote >= 0
+            GROUP BY lote_composto, semana_vida
+        """, conn)
+        gravadas = pd.read_sql_query("SELECT lote_composto, semana_vida, n_leituras FROM exposicao_semana", conn)
+        comparacao = contagens.merge(gravadas, on=['lote_composto', 'semana_vida'], how='outer',
+                                     suffixes=('', '_gravadas'))
+        alteradas = comparacao[comparacao['n_leituras'].fillna(-1) != comparacao['n_leituras_gravadas'].fillna(-1)]
+        primeira = alteradas.groupby('lote_composto')['semana_vida'].min()
+        desde = (primeira - 1).clip(lower=1)
+
+        partes = []
+        for lote, semana in desde.items():
+            conn.execute("DELETE FROM exposicao_semana WHERE lote_composto = ? AND semana_vida >= ?", (lote, int(semana)))
+            partes.append(pd.read_sql_query(
+                "SELECT lote_composto, idade_lote, Fecha, Hora, NH3, Temperatura FROM medicoes "
+                "WHERE lote_composto = ? AND idade_lote >= ?", conn, params=(lote, (int(semana) - 1) * 7)))
+        semanas_novas = integrar_exposicao(pd.concat(partes, ignore_index=True)) if partes else \
+            pd.DataFrame(columns=COLUNAS_EXPOSICAO_SEMANA)
+        semanas_novas.to_sql('exposicao_semana', conn, if_exists='append', index=False)
+
+        semanas = pd.read_sql_query("SELECT * FROM exposicao_semana ORDER BY lote_composto, semana_vida", conn)
+        tem_tratamentos = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                                       "AND name = 'tratamentos'").fetchone()
+        tratamentos = (pd.read_sql_query("SELECT * FROM tratamentos", conn) if tem_tratamentos
+                       else pd.DataFrame(columns=['lote_composto']))
+        # Tabela pequena (uma linha por lote): refeita a cada carga para acompanhar os resultados informados depois
+        lotes = montar_exposicao_lote(semanas, tratamentos)
+        lotes.to_sql('exposicao_lote', conn, if_exists='replace', index=False)
+        conn.commit()
+
+    logger.info(f"Exposição: {len(desde)} lote(s) atualizado(s), {len(semanas_novas)} semana(s) integrada(s) "
+                f"({time.perf_counter() - inicio:.2f} s)", extra={'dados': {
+                    'evento': 'exposicao', 'lotes_atualizados': len(desde), 'semanas_integradas': len(semanas_novas),
+                    'leituras_processadas': int(sum(len(p) for p in partes)), 'lotes': len(lotes),
+                }})
+    return lotes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Integra a exposição a NH3 e temperatura por lote e semana de vida "
+                                                 "e junta os resultados zootécnicos de cada lote")
+    parser.add_argument('--db', default=os.path.join(project_root, 'database', 'TESTE_DIATEX_PROD.db'))
+    parser.add_argument('--anterior', default=None, help="Banco publicado de onde as somas já calculadas são reaproveitadas")
+    parser.add_argument('--recalcular', action='store_true', help="Descarta as somas gravadas e integra todas as leituras")
+    args = parser.parse_args()
+
+    atualizar_exposicao(args.db, anterior=args.anterior, recalcular=args.recalcular)
@@ -25,25 +25,21 @@ import pandas as pd
 import os
 import glob
 from datetime import datetime
-import PyPDF2
 import logging
 import re
 import sqlite3
 from src.utils.logger import setup_logger
+from src.validacao import validar_medicoes
+from src.deduplicacao import remover_duplicatas
+from src.episodios import atualizar_episodios
+from src.falhas import atualizar_falhas
+from src.paginas import indice_paginas, paginas_tabela, formatar_intervalos
+from src.telemetria_ingestao import (medir_etapa, nova_execucao, resumo_arquivo,
+                                     finalizar_execucao, gravar_telemetria)
 
 # Configurar logging
 logger = setup_logger('extract_tables2')
 
-def get_total_pages(pdf_path):
-    """Obtém o número total de páginas de um PDF."""
-    try:
-        with open(pdf_path, 'rb') as f:
-            pdf_reader = PyPDF2.PdfReader(f)
-            return len(pdf_reader.pages)
-    except Exception as e:
-        logger.warning(f"Erro ao contar páginas de {pdf_path}: {e}")
-        return None
-
 def clean_data(df):
     """Aplica tratamento nos dados do DataFrame."""
     df_clean = df.copy()
@@ -53,17 +49,18 @@ def clean_data(df):
     df_clean['NH3'] = pd.to_numeric(df_clean['NH3'], errors='coerce').astype('Int64')
 
     # Temperatura: Remover '°C' ou variações, substituir vírgula por ponto, converter para float
-    logger.info("Valores brutos de Temperatura antes da limpeza:")
-    logger.info(df_clean['Temperatura'].head(10).to_string())
+    # Amostras dos valores brutos só são montadas quando o nível DEBUG está ativo
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Valores brutos de Temperatura antes da limpeza:\n" + df_clean['Temperatura'].head(10).to_string())
 
     df_clean['Temperatura'] = df_clean['Temperatura'].str.replace(r'\s*[°℃]\s*C?', '', regex=True).str.strip()
     df_clean['Temperatura'] = df_clean['Temperatura'].str.replace(',', '.', regex=False)
     df_clean['Temperatura'] = pd.to_numeric(df_clean['Temperatura'], errors='coerce').astype(float)
 
-    nan_temps = df_clean[df_clean['Temperatura'].isna()]['Temperatura'].index
-    if not nan_temps.empty:
-        logger.warning(f"Valores NaN encontrados em Temperatura nas linhas: {list(nan_temps)}")
-        logger.warning(f"Valores brutos correspondentes: {df.loc[nan_temps, 'Temperatura'].to_dict()}")
+    # Linhas não convertidas são rejeitadas na validação e ficam em medicoes_quarentena
+    n_nan_temps = int(df_clean['Temperatura'].isna().sum())
+    if n_nan_temps:
+        logger.warning(f"{n_nan_temps} valores de Temperatura não puderam ser convertidos")
 
     # Humedad: Remover '%' e converter para inteiro
     df_clean['Humedad'] = df_clean['Humedad'].str.replace(r'\s*%', '', regex=True).str.strip()
@@ -88,22 +85,26 @@ def get_aviario_id_from_filename(filename):
     else:
         return os.path.splitext(filename)[0]
 
-def create_sqlite_db(df, db_dir):
-    """Cria um banco SQLite com os dados filtrados e a tabela medicoes."""
+# Banco gerado pelo pipeline (tabela medicoes e telemetria das execuções)
+NOME_DB = "TESTE_DIATEX.db"
+
+def create_sqlite_db(df, db_dir, quarentena=None):
+    """Cria um banco SQLite com os dados validados (tabela medicoes) e as linhas rejeitadas
+    (tabela medicoes_quarentena); retorna as linhas gravadas em medicoes."""
     os.makedirs(db_dir, exist_ok=True)
-    db_file = os.path.join(db_dir, "TESTE_DIATEX.db")
+    db_file = os.path.join(db_dir, NOME_DB)
     logger.info(f"Criando banco SQLite e tabela 'medicoes': {db_file}")
 
-    # Filtrar dados onde NH3 > 0
-    df_filtered = df[df['NH3'] > 0].copy()
-    if df_filtered.empty:
-        logger.warning("Nenhum dado com NH3 > 0 para inserir no banco SQLite.")
-        return
+    if df.empty:
+        logger.warning("Nenhum dado válido para inserir no banco SQLite.")
+        return 0
 
     # Conectar ao banco SQLite
     with sqlite3.connect(db_file) as conn:
+        if quarentena is not None:
+            quarentena.to_sql('medicoes_quarentena', conn, if_exists='replace', index=False)
         # Criar tabela medicoes
-        df_filtered.to_sql('medicoes', conn, if_exists='replace', index=False, dtype={
+        df.to_sql('medicoes', conn, if_exists='replace', index=False, dtype={
             'Fecha': 'TEXT',
             'Hora': 'TEXT',
             'NH3': 'INTEGER',
@@ -117,32 +118,59 @@ def create_sqlite_db(df, db_dir):
         })
         conn.commit()
     logger.info(f"Tabela 'medicoes' criada e dados inseridos com sucesso em: {db_file}")
+    return len(df)
+
+# Estratégias de extração do tabula, tentadas em ordem até uma encontrar tabelas
+METODOS_EXTRACAO = [
+    ("stream", {"stream": True, "guess": True}),
+    ("lattice", {"lattice": True, "guess": True})
+]
+
+# Primeira página lida quando o PDF não pode ser classificado (capa e resumo ocupam as 4 primeiras)
+PAGINA_INICIAL_PADRAO = 5
+
+def extract_tables_with_tabula(pdf_path, metodos=None, indice=None):
+    """Extrai as tabelas de medição de um PDF.
 
-def extract_tables_with_tabula(pdf_path, start_page=5):
-    """Extrai todas as tabelas a partir da página 5 de um PDF."""
+    Só as páginas classificadas como tabela pelo índice de src/paginas.py (calculado aqui se
+    não for informado) vão para o tabula; se o PDF não puder ser classificado, são lidas as
+    páginas a partir de PAGINA_INICIAL_PADRAO. O método usado, as páginas lidas, o total de
+    páginas e os tempos de classificação/leitura/limpeza ficam em `df.attrs['metodo']`,
+    `df.attrs['paginas']`, `df.attrs['paginas_total']` e `df.attrs['etapas']`.
+    """
     logger.info(f"Iniciando extração do arquivo: {pdf_path}")
 
-    total_pages = get_total_pages(pdf_path)
-    pages = f"{start_page}-" if total_pages is None else f"{start_page}-{total_pages}"
-    logger.info(f"Extraindo páginas: {pages} (total estimado: {total_pages or 'desconhecido'})")
+    etapas = {}
+    if indice is None:
+        with medir_etapa(etapas, 'classificacao'):
+            indice = indice_paginas(pdf_path)
+    if indice is None:
+        pages = f"{PAGINA_INICIAL_PADRAO}-"
+        paginas_lidas = paginas_total = None
+        logger.warning(f"Páginas de {pdf_path} não classificadas; extraindo a partir da página {PAGINA_INICIAL_PADRAO}")
+    else:
+        paginas = paginas_tabela(indice)
+        pages = formatar_intervalos(paginas)
+        paginas_lidas, paginas_total = len(paginas), len(indice)
+        logger.info(f"Extraindo páginas: {pages or 'nenhuma'} ({paginas_lidas} de {paginas_total} com tabelas de medição)")
 
     file_name = os.path.splitext(os.path.basename(pdf_path))[0]
     aviario_id = get_aviario_id_from_filename(file_name)
     all_data = []
+    metodo_usado = None
 
-    for method, params in [
-        ("stream", {"stream": True, "guess": True}),
-        ("lattice", {"lattice": True, "guess": True})
-    ]:
+    # Sem páginas de tabela não há o que extrair (nem motivo para iniciar a JVM do tabula)
+    for method, params in ((metodos or METODOS_EXTRACAO) if pages else []):
         logger.info(f"Tentando extração com método: {method}")
         try:
-            tables = read_pdf(
-                pdf_path,
-                pages=pages,
-                multiple_tables=True,
-                encoding='utf-8',
-                **params
-            )
+            with medir_etapa(etapas, 'leitura'):
+                tables = read_pdf(
+                    pdf_path,
+                    pages=pages,
+                    multiple_tables=True,
+                    encoding='utf-8',
+                    **params
+                )
             # ... (restante da lógica de extração e tratamento permanece inalterada) ...
             if tables:
                 logger.info(f"Encontradas {len(tables)} tabelas com método {method}")
@@ -156,6 +184,7 @@ def extract_tables_with_tabula(pdf_path, start_page=5):
                     table['Nome_Arquivo'] = file_name
                     table['ID_Aviario'] = aviario_id
                     all_data.append(table)
+                metodo_usado = method
                 break
             else:
                 logger.warning(f"Nenhuma tabela encontrada com método {method}")
@@ -164,53 +193,126 @@ def extract_tables_with_tabula(pdf_path, start_page=5):
 
     if not all_data:
         logger.warning(f"Nenhum dado extraído de: {pdf_path}")
-        return pd.DataFrame()
+        vazio = pd.DataFrame()
+        vazio.attrs.update(metodo=None, paginas=paginas_lidas, paginas_total=paginas_total, etapas=etapas)
+        return vazio
 
     df = pd.concat(all_data, ignore_index=True)
-    df_clean = clean_data(df)
+    with medir_etapa(etapas, 'limpeza'):
+        df_clean = clean_data(df)
+    df_clean.attrs.update(metodo=metodo_usado, paginas=paginas_lidas, paginas_total=paginas_total, etapas=etapas)
 
-    logger.info(f"Dados extraídos de {pdf_path} após tratamento (primeiras 10 linhas):")
-    logger.info("\n" + df_clean.head(10).to_string(index=False))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Dados extraídos de {pdf_path} após tratamento (primeiras 10 linhas):\n"
+                     + df_clean.head(10).to_string(index=False))
 
     return df_clean
 
+def ordem_natural(caminho):
+    """Chave de ordenação que coloca aviario_1203_pt2 antes de aviario_1203_pt10."""
+    return [int(p) if p.isdigit() else p for p in re.split(r'(\d+)', os.path.basename(caminho).lower())]
+
+def registrar_execucao(db_dir, execucao, arquivos, status, linhas_gravadas=0):
+    """Grava a telemetria da execução em ingest_runs/ingest_files sem interromper o pipeline."""
+    finalizar_execucao(execucao, arquivos, status, linhas_gravadas)
+    try:
+        gravar_telemetria(os.path.join(db_dir, NOME_DB), execucao, arquivos)
+    except sqlite3.Error as e:
+        logger.warning(f"Não foi possível gravar a telemetria da execução {execucao['run_id']}: {e}")
+        return
+    logger.info(f"Execução {execucao['run_id']} finalizada: {status}", extra={'dados': {
+        'evento': 'ingest_run', 'run_id': execucao['run_id'], 'status': status,
+        'arquivos': execucao['arquivos_vistos'], 'linhas_gravadas': linhas_gravadas,
+        'segundos': round(execucao['segundos'], 3),
+    }})
+
 def process_pdf_batch(pdf_dir, csv_dir, db_dir):
     """Processa todos os PDFs na pasta pdf_dir, salva em csv_dir e cria banco em db_dir."""
     logger.info(f"Processando PDFs na pasta: {pdf_dir}")
+    execucao = nova_execucao(pdf_dir)
+    arquivos = []
 
     os.makedirs(csv_dir, exist_ok=True)
-    pdf_files = glob.glob(os.path.join(pdf_dir, "*.pdf"))
+    # Ordem determinística: define qual parte prevalece na deduplicação
+    pdf_files = sorted(glob.glob(os.path.join(pdf_dir, "*.pdf")), key=ordem_natural)
     if not pdf_files:
         logger.warning("Nenhum arquivo PDF encontrado na pasta.")
+        registrar_execucao(db_dir, execucao, arquivos, 'sem_arquivos')
         return None
 
     logger.info(f"Encontrados {len(pdf_files)} arquivos PDF: {pdf_files}")
 
     all_dfs = []
+    quarentenas = []
     for pdf_path in pdf_files:
-        df = extract_tables_with_tabula(pdf_path, start_page=5)
+        tempo_arquivo = {}
+        with medir_etapa(tempo_arquivo, 'total'):
+            # Índice de páginas gravado no banco da carga: PDFs já vistos não são relidos
+            with medir_etapa(execucao['etapas'], 'classificacao_paginas'):
+                indice = indice_paginas(pdf_path, os.path.join(db_dir, NOME_DB))
+            with medir_etapa(execucao['etapas'], 'extracao'):
+                df = extract_tables_with_tabula(pdf_path, indice=indice)
+        resumo = resumo_arquivo(execucao, pdf_path, df, **tempo_arquivo['total'])
+        arquivos.append(resumo)
+        logger.info(f"Extração concluída: {resumo['arquivo']}", extra={'dados': {
+            'evento': 'extracao_pdf', 'arquivo': resumo['arquivo'], 'linhas': len(df),
+            'paginas': resumo['paginas'], 'metodo': resumo['metodo'],
+            'segundos': round(resumo['segundos'], 3),
+            'linhas_por_segundo': round(len(df) / resumo['segundos'], 1) if resumo['segundos'] else None,
+        }})
         if not df.empty:
-            all_dfs.append(df)
+            # Validação em bloco contra as faixas do relatório e limites físicos
+            with medir_etapa(execucao['etapas'], 'validacao'):
+                validos, quarentena, resumo_validacao = validar_medicoes(df)
+            resumo.update(resumo_validacao)
+            if len(quarentena):
+                logger.warning(f"{len(quarentena)} linhas de {resumo['arquivo']} em quarentena: {resumo['motivos']}")
+                quarentenas.append(quarentena.assign(run_id=execucao['run_id']))
+            all_dfs.append(validos)
         else:
             logger.warning(f"Nenhum dado extraído de: {pdf_path}")
 
     if not all_dfs:
         logger.warning("Nenhum dado extraído de qualquer arquivo.")
+        registrar_execucao(db_dir, execucao, arquivos, 'sem_dados')
         return None
 
     final_df = pd.concat(all_dfs, ignore_index=True)
 
+    # Partes do mesmo aviário podem se sobrepor no tempo: mantém uma leitura por (aviário, data, hora)
+    with medir_etapa(execucao['etapas'], 'deduplicacao'):
+        final_df, resumo_duplicatas = remover_duplicatas(final_df)
+    execucao['linhas_conflitantes'] = resumo_duplicatas['linhas_conflitantes']
+    for resumo in arquivos:
+        resumo['linhas_duplicadas'] = resumo_duplicatas['por_arquivo'].get(os.path.splitext(resumo['arquivo'])[0], 0)
+    if resumo_duplicatas['linhas_duplicadas']:
+        logger.warning(f"{resumo_duplicatas['linhas_duplicadas']} leituras duplicadas removidas "
+                       f"({resumo_duplicatas['linhas_conflitantes']} com valores diferentes da leitura mantida): "
+                       f"{resumo_duplicatas['por_arquivo']}")
+
     # Salvar CSV
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    csv_file = os.path.join(csv_dir, f"dados_medicoes_nh3_{timestamp}.csv")
-    final_df.to_csv(csv_file, index=False, encoding='utf-8-sig')
+    with medir_etapa(execucao['etapas'], 'csv'):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        csv_file = os.path.join(csv_dir, f"dados_medicoes_nh3_{timestamp}.csv")
+        final_df.to_csv(csv_file, index=False, encoding='utf-8-sig')
     logger.info(f"Dados salvos em: {csv_file}")
 
-    # Criar banco SQLite e a tabela `medicoes`
-    create_sqlite_db(final_df, db_dir)
-
-    logger.info(f"Resumo dos dados extraídos após tratamento (primeiras 10 linhas):")
-    logger.info("\n" + final_df.head(10).to_string(index=False))
+    # Criar banco SQLite e as tabelas `medicoes` e `medicoes_quarentena`
+    quarentena_df = pd.concat(quarentenas, ignore_index=True) if quarentenas else final_df.head(0).assign(motivo='', run_id='')
+    with medir_etapa(execucao['etapas'], 'sqlite'):
+        linhas_gravadas = create_sqlite_db(final_df, db_dir, quarentena_df)
+    # Episódios de exposição/subida de NH3: só a cauda de cada aviário é reprocessada
+    if linhas_gravadas:
+        with medir_etapa(execucao['etapas'], 'episodios'):
+            atualizar_episodios(os.path.join(db_dir, NOME_DB))
+        # Sensores travados, picos e lacunas: recalculados sobre todas as leituras
+        with medir_etapa(execucao['etapas'], 'falhas_sensor'):
+            atualizar_falhas(os.path.join(db_dir, NOME_DB))
+    registrar_execucao(db_dir, execucao, arquivos, 'sucesso', linhas_gravadas)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Resumo dos dados extraídos após tratamento (primeiras 10 linhas):\n"
+                     + final_df.head(10).to_string(index=False))
 
     return final_df
 
@@ -0,0 +1,222 @@
+import os
+import sys
+import time
+import sqlite3
+import argparse
+
+# Adicionar a raiz do projeto ao Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from src.validacao import momentos_leitura
+from src.utils.logger import setup_logger
+
+logger = setup_logger('falhas')
+
+VARIAVEIS_SENSOR = ['NH3', 'Temperatura', 'Humedad']
+
+# Sensor travado: mesmo valor repetido sem interrupção por pelo menos `minutos`
+# (a resolução de NH3 é 1 ppm, então valores baixos estáveis precisam de uma janela maior)
+MINUTOS_PLANO = {'NH3': 240, 'Temperatura': 90, 'Humedad': 120}
+
+# Pico: escore z robusto |0,6745 (x - mediana) / MAD| acima do limiar, com mediana e MAD
+# numa janela móvel centrada de `JANELA_PICO`; o MAD tem como piso a resolução do sensor
+JANELA_PICO = '61min'
+LIMIAR_PICO = 6.0
+MAD_MINIMO = {'NH3': 1.0, 'Temperatura': 0.1, 'Humedad': 1.0}
+
+# Lacuna: intervalo entre leituras consecutivas acima de LACUNA_MINIMA (os sensores gravam a cada
+# 3-5 min); intervalos a partir de LACUNA_ENTRE_LOTES são o vazio sanitário, não falha do sensor
+LACUNA_MINIMA = pd.Timedelta(minutes=15)
+LACUNA_ENTRE_LOTES = pd.Timedelta(days=2)
+
+COLUNAS_FALHAS = ['ID_Aviario', 'tipo', 'variavel', 'inicio', 'fim', 'duracao_min', 'n_leituras', 'valor', 'escore']
+
+
+def preparar_leituras(leituras):
+    """Leituras ordenadas por aviário e momento (colunas ID_Aviario, momento e as variáveis do sensor)."""
+    dados = leituras.assign(momento=momentos_leitura(leituras))[['ID_Aviario', 'momento'] + VARIAVEIS_SENSOR]
+    dados = dados.dropna(subset=['ID_Aviario', 'momento']).sort_values(['ID_Aviario', 'momento'], kind='stable')
+    return dados.reset_index(drop=True)
+
+
+def _quebras(dados):
+    """True na primeira leitura de cada aviário e depois de cada lacuna."""
+    aviario = dados['ID_Aviario'].to_numpy()
+    momento = dados['momento'].to_numpy()
+    quebra = np.ones(len(dados), dtype=bool)
+    quebra[1:] = (aviario[1:] != aviario[:-1]) | (np.diff(momento) > LACUNA_MINIMA.to_timedelta64())
+    return quebra
+
+
+def _resumir(dados, selecao, sequencia, variavel, valores, escore=None):
+    """Um registro por sequência selecionada: início, fim, duração, leituras, valor e escore máximo."""
+    partes = pd.DataFrame({
+        'sequencia': sequencia[selecao],
+        'ID_Aviario': dados['ID_Aviario'].to_numpy()[selecao],
+        'momento': dados['momento'].to_numpy()[selecao],
+        'valor': valores[selecao],
+        'escore': np.nan if escore is None else np.abs(escore[selecao]),
+    })
+    resumo = partes.groupby('sequencia', sort=False).agg(
+        ID_Aviario=('ID_Aviario', 'first'), inicio=('momento', 'min'), fim=('momento', 'max'),
+        n_leituras=('momento', 'size'), valor=('valor', 'first'), escore=('escore', 'max'))
+    resumo['duracao_min'] = (resumo['fim'] - resumo['inicio']) / pd.Timedelta(minutes=1)
+    return resumo.reset_index(drop=True).assign(variavel=variavel)
+
+
+def detectar_planos(dados, quebra, variavel, minutos):
+    """Sequências do mesmo valor repetido (run-length) com duração de pelo menos `minutos`."""
+    valores = dados[variavel].to_numpy(dtype=float)
+    mudou = quebra.copy()
+    mudou[1:] |= valores[1:] != valores[:-1]
+    sequencia = np.cumsum(mudou)
+    # Duração de cada sequência: do primeiro ao último momento com o mesmo número
+    momento = dados['momento'].to_numpy()
+    inicio = np.flatnonzero(mudou)
+    fim = np.append(inicio[1:], len(valores)) - 1
+    duracao = (momento[fim] - momento[inicio]) / np.timedelta64(1, 'm')
+    longas = (duracao >= minutos) & ~np.isnan(valores[inicio])
+    selecao = longas[sequencia - 1]
+    return _resumir(dados, selecao, sequencia, variavel, valores).assign(tipo='plano')
+
+
+def escore_robusto(dados, variavel):
+    """Escore z robusto de cada leitura em relação à mediana e ao MAD da janela móvel centrada."""
+    valores = dados[variavel].to_numpy(dtype=float)
+    base = dados[['ID_Aviario', 'momento']].assign(valor=valores)
+    # `dados` vem ordenado por aviário e momento, então os resultados já estão na mesma ordem
+    mediana = (base.groupby('ID_Aviario', sort=False)
+               .rolling(JANELA_PICO, on='momento', center=True)['valor'].median().to_numpy(dtype=float))
+    desvio = valores - mediana
+    mad = (base.assign(valor=np.abs(desvio)).groupby('ID_Aviario', sort=False)
+           .rolling(JANELA_PICO, on='momento', center=True)['valor'].median().to_numpy(dtype=float))
+    return 0.6745 * desvio / np.maximum(mad, MAD_MINIMO[variavel])
+
+
+def detectar_picos(dados, quebra, variavel, limiar=LIMIAR_PICO):
+    """Leituras (ou sequências de leituras consecutivas) com |escore z robusto| acima do limiar."""
+    valores = dados[variavel].to_numpy(dtype=float)
+    escore = escore_robusto(dados, variavel)
+    selecao = np.abs(escore) > limiar
+    mudou = quebra.copy()
+    mudou[1:] |= selecao[1:] != selecao[:-1]
+    return _resumir(dados, selecao, np.cumsum(mudou), variavel, valores, escore).assign(tipo='pico')
+
+
+def detectar_lacunas(dados):
+    """Intervalos sem leitura entre LACUNA_MINIMA e LACUNA_ENTRE_LOTES no mesmo aviário."""
+    aviario = dados['ID_Aviario'].to_numpy()
+    momento = dados['momento'].to_numpy()
+    intervalo = np.diff(momento)
+    lacuna = ((aviario[1:] == aviario[:-1])
+              & (intervalo > LACUNA_MINIMA.to_timedelta64())
+              & (intervalo < LACUNA_ENTRE_LOTES.to_timedelta64()))
+    antes = np.flatnonzero(lacuna)
+    return pd.DataFrame({
+        'ID_Aviario': aviario[antes],
+        'tipo': 'lacuna',
+        'variavel': None,
+        'inicio': momento[antes],
+        'fim': momento[antes + 1],
+        'duracao_min': intervalo[antes] / np.timedelta64(1, 'm'),
+        'n_leituras': 0,
+        'valor': np.nan,
+        'escore': np.nan,
+    })
+
+
+def detectar_falhas(dados, minutos_plano=MINUTOS_PLANO, limiar_pico=LIMIAR_PICO):
+    """Sensores travados, picos e lacunas em leituras já preparadas.
+
+    Cada detecção é uma passada vetorizada (ou agrupada por aviário) sobre todas as leituras.
+    """
+    if dados.empty:
+        return pd.DataFrame(columns=COLUNAS_FALHAS)
+    quebra = _quebras(dados)
+    partes = [detectar_lacunas(dados)]
+    for variavel in VARIAVEIS_SENSOR:
+        partes.append(detectar_planos(dados, quebra, variavel, minutos_plano[variavel]))
+        partes.append(detectar_picos(dados, quebra, variavel, limiar_pico))
+
+    partes = [p for p in partes if len(p)]
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_FALHAS)
+    return pd.concat(partes, ignore_index=True)[COLUNAS_FALHAS]
+
+
+def mascarar_falhas(df, falhas, coluna_tempo='data_hora'):
+    """Cópia de `df` com NaN nas variáveis das leituras cobertas por um plano ou pico.
+
+    `df` e `falhas` precisam da coluna `aviario` (dígitos do aviário). Lacunas não têm
+    leituras e não alteram nada; as demais variáveis da mesma leitura são mantidas.
+    """
+    falhas = falhas[falhas['tipo'].isin(['plano', 'pico'])]
+    resultado = df.copy()
+    if falhas.empty:
+        return resultado
+    momento = df[coluna_tempo].to_numpy()
+    aviario = df['aviario'].astype(str).to_numpy()
+    for (variavel, codigo), grupo in falhas.groupby(['variavel', 'aviario'], sort=False):
+        if variavel not in resultado.columns:
+            continue
+        grupo = grupo.sort_values('inicio')
+        inicios = grupo['inicio'].to_numpy()
+        # Intervalos sobrepostos: o fim efetivo é o maior fim até ali
+        fins = np.maximum.accumulate(grupo['fim'].to_numpy())
+        linhas = np.flatnonzero(aviario == codigo)
+        posicao = np.searchsorted(inicios, momento[linhas], side='right') - 1
+        dentro = (posicao >= 0) & (momento[linhas] <= fins[np.maximum(posicao, 0)])
+        if dentro.any():
+            if not pd.api.types.is_float_dtype(resultado[variavel]):
+                resultado[variavel] = resultado[variavel].astype('float32')
+            resultado.iloc[linhas[dentro], resultado.columns.get_loc(variavel)] = np.nan
+    return resultado
+
+
+def _formatar(momentos):
+    return pd.to_datetime(momentos).dt.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def atualizar_falhas(caminho_db, minutos_plano=MINUTOS_PLANO, limiar_pico=LIMIAR_PICO):
+    """Recalcula a tabela falhas_sensor a partir de todas as leituras da tabela medicoes.
+
+    Retorna as falhas gravadas.
+    """
+    inicio = time.perf_counter()
+    with sqlite3.connect(caminho_db) as conn:
+        leituras = pd.read_sql_query(
+            f"SELECT ID_Aviario, Fecha, Hora, {', '.join(VARIAVEIS_SENSOR)} FROM medicoes WHERE ID_Aviario IS NOT NULL",
+            conn)
+        dados = preparar_leituras(leituras)
+        falhas = detectar_falhas(dados, minutos_plano, limiar_pico)
+
+        gravar = falhas.assign(inicio=_formatar(falhas['inicio']), fim=_formatar(falhas['fim']))
+        conn.execute("DROP TABLE IF EXISTS falhas_sensor")
+        conn.execute("""
+            CREATE TABLE falhas_sensor (
+                ID_Aviario TEXT, tipo TEXT, variavel TEXT, inicio TEXT, fim TEXT,
+                duracao_min REAL, n_leituras INTEGER, valor REAL, escore REAL
+            )
+        """)
+        gravar.to_sql('falhas_sensor', conn, if_exists='append', index=False)
+        conn.execute("CREATE INDEX idx_falhas_sensor ON falhas_sensor (ID_Aviario, inicio)")
+        conn.commit()
+
+    logger.info(f"Falhas de sensor: {len(falhas):,} em {len(dados):,} leituras "
+                f"({time.perf_counter() - inicio:.2f} s)", extra={'dados': {
+                    'evento': 'falhas_sensor', 'leituras_processadas': len(dados), 'falhas': int(len(falhas)),
+                    'por_tipo': falhas['tipo'].value_counts().to_dict(),
+                }})
+    return falhas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detecta sensores travados, picos e lacunas nas leituras de cada aviário")
+    parser.add_argument('--db', default=os.path.join(project_root, 'database', 'TESTE_DIATEX_PROD.db'))
+    args = parser.parse_args()
+
+    atualizar_falhas(args.db)
@@ -0,0 +1,140 @@
+import os
+import re
+import sys
+import glob
+import sqlite3
+import argparse
+
+# Adicionar a raiz do projeto ao Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+import PyPDF2
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger('paginas')
+
+# Linha de medição na camada de texto: data DD/MM/AAAA, hora e NH3 em ppm, nessa ordem
+# (as células podem vir separadas por espaços ou quebras de linha)
+PADRAO_MEDICAO = re.compile(r'\d{2}/\d{2}/\d{4}\s+\d{1,2}:\d{2}(?::\d{2})?(?:\s*[AaPp]\.?\s*[Mm]\.?)?\s+-?\d+\s*ppm')
+# Mínimo de linhas de medição para uma página ser de tabela (resumos citam uma ou outra leitura)
+MIN_LINHAS_TABELA = 3
+# Páginas com menos caracteres visíveis que isto são consideradas em branco
+MIN_CARACTERES = 20
+
+TIPOS_PAGINA = ['tabela', 'resumo', 'vazia']
+COLUNAS_INDICE = ['pagina', 'tipo', 'linhas_medicao', 'caracteres']
+
+# Índice gravado no banco da carga: uma linha por página, refeito quando o PDF muda
+COLUNAS_PDF_PAGINAS = {
+    'arquivo': 'TEXT',
+    'tamanho': 'INTEGER',
+    'modificado_ns': 'INTEGER',
+    'pagina': 'INTEGER',
+    'tipo': 'TEXT',
+    'linhas_medicao': 'INTEGER',
+    'caracteres': 'INTEGER',
+}
+
+
+def classificar_texto(texto):
+    """(tipo, linhas de medição, caracteres visíveis) de uma página a partir do seu texto."""
+    caracteres = len(re.sub(r'\s', '', texto or ''))
+    if caracteres < MIN_CARACTERES:
+        return 'vazia', 0, caracteres
+    linhas = len(PADRAO_MEDICAO.findall(texto))
+    return ('tabela' if linhas >= MIN_LINHAS_TABELA else 'resumo'), linhas, caracteres
+
+
+def classificar_paginas(pdf_path):
+    """Classifica cada página do PDF (tabela de medições, resumo ou em branco) em uma única passada."""
+    registros = []
+    with open(pdf_path, 'rb') as f:
+        for numero, pagina in enumerate(PyPDF2.PdfReader(f).pages, start=1):
+            tipo, linhas, caracteres = classificar_texto(pagina.extract_text())
+            registros.append({'pagina': numero, 'tipo': tipo, 'linhas_medicao': linhas, 'caracteres': caracteres})
+    return pd.DataFrame(registros, columns=COLUNAS_INDICE)
+
+
+def _assinatura(pdf_path):
+    estado = os.stat(pdf_path)
+    return os.path.basename(pdf_path), estado.st_size, estado.st_mtime_ns
+
+
+def _ler_indice(conn, arquivo, tamanho, modificado_ns):
+    indice = pd.read_sql_query(
+        f"SELECT {', '.join(COLUNAS_INDICE)} FROM pdf_paginas WHERE arquivo = ? AND tamanho = ? AND modificado_ns = ? "
+        "ORDER BY pagina", conn, params=(arquivo, tamanho, modificado_ns))
+    return indice if len(indice) else None
+
+
+def _gravar_indice(conn, arquivo, tamanho, modificado_ns, indice):
+    conn.execute("DELETE FROM pdf_paginas WHERE arquivo = ?", (arquivo,))
+    indice.assign(arquivo=arquivo, tamanho=tamanho, modificado_ns=modificado_ns)[list(COLUNAS_PDF_PAGINAS)].to_sql(
+        'pdf_paginas', conn, if_exists='append', index=False)
+
+
+def indice_paginas(pdf_path, db_file=None):
+    """Índice de páginas do PDF, ou None se o arquivo não puder ser lido.
+
+    Com `db_file`, o índice fica na tabela pdf_paginas e só é refeito quando o tamanho ou a
+    data de modificação do PDF mudam.
+    """
+    arquivo, tamanho, modificado_ns = _assinatura(pdf_path)
+    if db_file is not None:
+        os.makedirs(os.path.dirname(db_file) or '.', exist_ok=True)
+        with sqlite3.connect(db_file) as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS pdf_paginas "
+                         f"({', '.join(f'{c} {t}' for c, t in COLUNAS_PDF_PAGINAS.items())})")
+            indice = _ler_indice(conn, arquivo, tamanho, modificado_ns)
+        if indice is not None:
+            return indice
+
+    try:
+        indice = classificar_paginas(pdf_path)
+    except Exception as e:
+        logger.warning(f"Erro ao classificar as páginas de {pdf_path}: {e}")
+        return None
+
+    contagem = indice['tipo'].value_counts()
+    logger.info(f"Páginas de {arquivo}: " + ', '.join(f"{contagem.get(t, 0)} {t}" for t in TIPOS_PAGINA),
+                extra={'dados': {'evento': 'indice_paginas', 'arquivo': arquivo, 'paginas': len(indice),
+                                 **{t: int(contagem.get(t, 0)) for t in TIPOS_PAGINA}}})
+    if db_file is not None:
+        with sqlite3.connect(db_file) as conn:
+            _gravar_indice(conn, arquivo, tamanho, modificado_ns, indice)
+            conn.commit()
+    return indice
+
+
+def paginas_tabela(indice):
+    """Números das páginas com tabelas de medição."""
+    return indice.loc[indice['tipo'] == 'tabela', 'pagina'].astype(int).tolist()
+
+
+def formatar_intervalos(paginas):
+    """Páginas no formato do tabula, agrupando as consecutivas (ex.: [5, 6, 7, 9] -> '5-7,9')."""
+    intervalos = []
+    for pagina in sorted(paginas):
+        if intervalos and pagina == intervalos[-1][1] + 1:
+            intervalos[-1][1] = pagina
+        else:
+            intervalos.append([pagina, pagina])
+    return ','.join(str(a) if a == b else f"{a}-{b}" for a, b in intervalos)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classifica as páginas dos PDFs (tabela de medições, resumo, em branco)")
+    parser.add_argument('pdfs', nargs='*', help="PDFs a classificar (padrão: data/raw/pdf/*.pdf)")
+    parser.add_argument('--db', default=None, help="Banco onde o índice é gravado (tabela pdf_paginas)")
+    args = parser.parse_args()
+
+    for pdf_path in args.pdfs or sorted(glob.glob(os.path.join(project_root, 'data', 'raw', 'pdf', '*.pdf'))):
+        indice = indice_paginas(pdf_path, args.db)
+        if indice is None:
+            print(f"{os.path.basename(pdf_path)}: não foi possível ler o arquivo")
+            continue
+        print(f"{os.path.basename(pdf_path)}: {len(indice)} páginas; tabelas: "
+              f"{formatar_intervalos(paginas_tabela(indice)) or 'nenhuma'}")
@@ -0,0 +1,307 @@
+import os
+import sys
+import sqlite3
+import argparse
+
+# Adicionar a raiz do projeto ao Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+from scipy.special import stdtr
+
+from src.validacao import momentos_leitura
+from src.exposicao import LACUNA_MAXIMA
+from src.utils.logger import setup_logger
+
+logger = setup_logger('pareamento')
+
+VARIAVEIS_GRADE = ['NH3', 'Temperatura', 'Humedad']
+# Passo da grade comum (os sensores gravam a cada 3-5 min)
+PASSO_GRADE = pd.Timedelta(minutes=5)
+# Defasagem máxima da correlação cruzada, em passos da grade (12 x 5 min = 1 h para cada lado)
+MAX_DEFASAGEM = 12
+# Mínimo de instantes com os dois aviários medidos para o teste pareado
+MIN_PONTOS_PAREADOS = 30
+
+COLUNAS_RESUMO = ['produtor', 'bateria_teste', 'lote_diatex', 'lote_testemunha', 'variavel', 'pontos',
+                  'diferenca_media', 'desvio_diferenca', 'autocorrelacao', 'n_efetivo', 't_stat', 'p_valor',
+                  'correlacao', 'defasagem_max_min', 'correlacao_max']
+
+
+class GradeAlinhada:
+    """Séries de cada lote (um aviário em um ciclo) interpoladas em uma grade regular comum.
+
+    `valores[variavel]` é uma matriz lote x instante (float64) com NaN onde não há leitura
+    dos dois lados do instante a até LACUNA_MAXIMA uma da outra; `mascara(variavel)` é o
+    inverso desses NaN. As linhas seguem `lotes` e as colunas seguem `tempos`.
+    """
+
+    def __init__(self, lotes, tempos, passo, valores):
+        self.lotes = list(lotes)
+        self.tempos = tempos
+        self.passo = passo
+        self.valores = valores
+        self._posicao = {lote: i for i, lote in enumerate(self.lotes)}
+
+    def __len__(self):
+        return len(self.tempos)
+
+    def mascara(self, variavel):
+        return ~np.isnan(self.valores[variavel])
+
+    def indices(self, lotes):
+        """Linhas da matriz de cada lote (-1 para lotes fora da grade)."""
+        return np.array([self._posicao.get(lote, -1) for lote in lotes], dtype=int)
+
+    def salvar(self, caminho):
+        """Grava a grade em um .npz (tempos como datetime64, uma matriz por variável)."""
+        np.savez_compressed(caminho, lotes=np.array(self.lotes, dtype=str), tempos=self.tempos,
+                            passo=np.array(self.passo.to_timedelta64()), **self.valores)
+
+
+def _interpolar(momentos, valores, grade, lacuna):
+    """Interpolação linear de uma série irregular nos instantes da grade, sem atravessar lacunas."""
+    validos = ~np.isnan(valores)
+    momentos, valores = momentos[validos], valores[validos]
+    resultado = np.full(len(grade), np.nan)
+    if len(momentos) == 0:
+        return resultado
+    # Leitura imediatamente anterior (ou no próprio instante) e a seguinte
+    anterior = np.searchsorted(momentos, grade, side='right') - 1
+    seguinte = np.minimum(anterior + 1, len(momentos) - 1)
+    dentro = anterior >= 0
+    anterior = np.maximum(anterior, 0)
+    exato = dentro & (momentos[anterior] == grade)
+    intervalo = momentos[seguinte] - momentos[anterior]
+    ponte = dentro & (seguinte > anterior) & (intervalo <= lacuna)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fracao = (grade - momentos[anterior]) / intervalo
+        interpolado = valores[anterior] + fracao * (valores[seguinte] - valores[anterior])
+    resultado[ponte] = interpolado[ponte]
+    resultado[exato] = valores[anterior][exato]
+    return resultado
+
+
+def _series_por_lote(leituras, variaveis, coluna_tempo):
+    """Momentos (ns) e valores de cada lote, ordenados no tempo: {lote: (momentos, {variável: valores})}."""
+    dados = leituras[['lote_composto', coluna_tempo] + variaveis].dropna(subset=['lote_composto', coluna_tempo])
+    dados = dados.assign(lote_composto=dados['lote_composto'].astype(str))
+    dados = dados.sort_values(['lote_composto', coluna_tempo], kind='stable')
+    momentos = dados[coluna_tempo].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    valores = {v: pd.to_numeric(dados[v], errors='coerce').to_numpy(dtype=float) for v in variaveis}
+    codigos, lotes = pd.factorize(dados['lote_composto'], sort=True)
+    fronteiras = np.flatnonzero(np.diff(codigos)) + 1
+    return {lote: (momentos[a:b], {v: valores[v][a:b] for v in variaveis})
+            for lote, a, b in zip(lotes, np.r_[0, fronteiras], np.r_[fronteiras, len(dados)])}
+
+
+def _alinhar(series, lotes, inicio, fim, passo, lacuna):
+    """GradeAlinhada dos `lotes` entre `inicio` e `fim` (ns), ou None se a janela não tiver instantes."""
+    passo_ns = passo.to_timedelta64().astype('timedelta64[ns]').astype(np.int64)
+    lacuna_ns = lacuna.to_timedelta64().astype('timedelta64[ns]').astype(np.int64)
+    grade = np.arange(-(-inicio // passo_ns) * passo_ns, fim + 1, passo_ns, dtype=np.int64)
+    if len(grade) == 0:
+        return None
+    variaveis = list(series[lotes[0]][1])
+    valores = {v: np.vstack([_interpolar(series[lote][0], series[lote][1][v], grade, lacuna_ns) for lote in lotes])
+               for v in variaveis}
+    return GradeAlinhada(lotes, grade.astype('datetime64[ns]'), passo, valores)
+
+
+def montar_grade(leituras, passo=PASSO_GRADE, lacuna=LACUNA_MAXIMA, variaveis=VARIAVEIS_GRADE,
+                 coluna_tempo='data_hora'):
+    """Alinha as leituras de todos os lotes em uma grade regular comum (GradeAlinhada).
+
+    `leituras` precisa de lote_composto, `coluna_tempo` e das variáveis. A grade cobre do
+    primeiro ao último instante múltiplo de `passo` com alguma leitura; instantes sem leitura
+    a até `lacuna` de cada lado ficam NaN. A matriz cresce com o período total coberto, então
+    é para poucos lotes simultâneos; a comparação dos pares usa alinhar_pares.
+    """
+    variaveis = [v for v in variaveis if v in leituras.columns]
+    series = _series_por_lote(leituras, variaveis, coluna_tempo)
+    grade = None
+    if series:
+        grade = _alinhar(series, sorted(series), min(m[0] for m, _ in series.values()),
+                         max(m[-1] for m, _ in series.values()), passo, lacuna)
+    if grade is None:
+        return GradeAlinhada([], np.array([], dtype='datetime64[ns]'), passo, {v: np.empty((0, 0)) for v in variaveis})
+    return grade
+
+
+def alinhar_pares(leituras, pares, passo=PASSO_GRADE, lacuna=LACUNA_MAXIMA, variaveis=VARIAVEIS_GRADE,
+                  coluna_tempo='data_hora', margem=pd.Timedelta(0)):
+    """Uma GradeAlinhada de duas linhas (DIATEX, TESTEMUNHA) por par, só na janela em que os dois lotes têm leituras.
+
+    A janela é estendida por `margem` de cada lado (para as defasagens da correlação cruzada).
+    Retorna uma lista na ordem de `pares`, com None para pares sem período em comum; a
+    memória fica limitada à duração de um ciclo por par, e não ao período total dos dados.
+    """
+    variaveis = [v for v in variaveis if v in leituras.columns]
+    series = _series_por_lote(leituras, variaveis, coluna_tempo)
+    grades = []
+    for lote_d, lote_t in zip(pares['lote_diatex'], pares['lote_testemunha']):
+        if lote_d not in series or lote_t not in series:
+            grades.append(None)
+            continue
+        (momentos_d, _), (momentos_t, _) = series[lote_d], series[lote_t]
+        inicio, fim = max(momentos_d[0], momentos_t[0]), min(momentos_d[-1], momentos_t[-1])
+        if inicio > fim:
+            grades.append(None)
+            continue
+        margem_ns = margem.to_timedelta64().astype('timedelta64[ns]').astype(np.int64)
+        grades.append(_alinhar(series, [lote_d, lote_t], inicio - margem_ns, fim + margem_ns, passo, lacuna))
+    return grades
+
+
+def pares_lotes(tratamentos):
+    """Pares DIATEX x TESTEMUNHA do mesmo produtor e da mesma bateria de teste.
+
+    `tratamentos` pode ser a tabela tratamentos ou as próprias medições (uma linha por
+    lote basta); o resultado tem produtor, bateria_teste, lote_diatex e lote_testemunha.
+    """
+    chaves = ['produtor', 'bateria_teste']
+    lotes = tratamentos[chaves + ['lote_composto', 'teste']].dropna().drop_duplicates()
+    lotes = lotes.astype({'lote_composto': str, 'teste': str, 'produtor': str})
+    lotes['bateria_teste'] = pd.to_numeric(lotes['bateria_teste'].astype(str), errors='coerce')
+    pares = lotes[lotes['teste'] == 'DIATEX'].merge(lotes[lotes['teste'] == 'TESTEMUNHA'], on=chaves,
+                                                    suffixes=('_diatex', '_testemunha'))
+    pares = pares.rename(columns={'lote_composto_diatex': 'lote_diatex', 'lote_composto_testemunha': 'lote_testemunha'})
+    return pares[chaves + ['lote_diatex', 'lote_testemunha']].sort_values(chaves + ['lote_diatex']).reset_index(drop=True)
+
+
+def diferencas_pareadas(grade, pares, variavel):
+    """Matriz par x instante com DIATEX - TESTEMUNHA (NaN onde algum dos dois não tem leitura)."""
+    matriz = np.vstack([grade.valores[variavel], np.full((1, len(grade)), np.nan)])
+    # Lotes fora da grade apontam para a linha de NaN acrescentada no fim
+    return matriz[grade.indices(pares['lote_diatex'])] - matriz[grade.indices(pares['lote_testemunha'])]
+
+
+def teste_pareado(diferencas):
+    """Teste T pareado de cada linha de `diferencas`, com o tamanho de amostra efetivo.
+
+    Instantes vizinhos da grade não são independentes: o n efetivo desconta a
+    autocorrelação de defasagem 1 das diferenças, n * (1 - r) / (1 + r).
+    """
+    validas = ~np.isnan(diferencas)
+    n = validas.sum(axis=1)
+    x = np.where(validas, diferencas, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = x.sum(axis=1) / n
+        centrado = np.where(validas, diferencas - media[:, None], 0.0)
+        desvio = np.sqrt((centrado ** 2).sum(axis=1) / (n - 1))
+        vizinhos = validas[:, 1:] & validas[:, :-1]
+        r = ((centrado[:, 1:] * centrado[:, :-1] * vizinhos).sum(axis=1)
+             / np.sqrt((centrado[:, 1:] ** 2 * vizinhos).sum(axis=1) * (centrado[:, :-1] ** 2 * vizinhos).sum(axis=1)))
+        # Autocorrelação negativa não aumenta a amostra: só a positiva é descontada
+        r = np.clip(np.nan_to_num(r), 0.0, 0.99)
+        n_efetivo = np.clip(n * (1 - r) / (1 + r), 2, None)
+        t_stat = media / (desvio / np.sqrt(n_efetivo))
+    suficiente = n >= MIN_PONTOS_PAREADOS
+    p_valor = np.where(suficiente, 2 * stdtr(n_efetivo - 1, -np.abs(t_stat)), np.nan)
+    return {'pontos': n, 'diferenca_media': media, 'desvio_diferenca': np.where(n > 1, desvio, np.nan),
+            'autocorrelacao': np.where(suficiente, r, np.nan),
+            'n_efetivo': np.where(suficiente, n_efetivo, np.nan), 't_stat': np.where(suficiente, t_stat, np.nan),
+            'p_valor': p_valor}
+
+
+def correlacao_defasada(grade, pares, variavel, max_defasagem=MAX_DEFASAGEM):
+    """Correlação de Pearson entre DIATEX no instante t e TESTEMUNHA em t + k, para k em ±max_defasagem.
+
+    Retorna (defasagens, matriz par x defasagem). Cada defasagem é uma única operação
+    sobre todos os pares, usando só os instantes em que as duas séries têm leitura.
+    """
+    matriz = np.vstack([grade.valores[variavel], np.full((1, len(grade)), np.nan)])
+    a = matriz[grade.indices(pares['lote_diatex'])]
+    b = matriz[grade.indices(pares['lote_testemunha'])]
+    defasagens = np.arange(-max_defasagem, max_defasagem + 1)
+    correlacoes = np.full((len(a), len(defasagens)), np.nan)
+    tamanho = a.shape[1]
+    for j, k in enumerate(defasagens):
+        if abs(k) >= tamanho:
+            continue
+        x = a[:, max(0, -k):tamanho - max(0, k)]
+        y = b[:, max(0, k):tamanho - max(0, -k)]
+        validas = ~np.isnan(x) & ~np.isnan(y)
+        n = validas.sum(axis=1)
+        x, y = np.where(validas, x, 0.0), np.where(validas, y, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sx, sy = x.sum(axis=1), y.sum(axis=1)
+            cov = (x * y).sum(axis=1) - sx * sy / n
+            var_x = (x * x).sum(axis=1) - sx * sx / n
+            var_y = (y * y).sum(axis=1) - sy * sy / n
+            correlacoes[:, j] = np.where(n >= MIN_PONTOS_PAREADOS, cov / np.sqrt(var_x * var_y), np.nan)
+    return defasagens, correlacoes
+
+
+def comparar_pares(leituras, pares, variaveis=VARIAVEIS_GRADE, max_defasagem=MAX_DEFASAGEM, passo=PASSO_GRADE,
+                   lacuna=LACUNA_MAXIMA, coluna_tempo='data_hora'):
+    """Resumo por par e variável: teste pareado das diferenças e correlação cruzada defasada.
+
+    Cada par é alinhado na sua própria janela em comum (alinhar_pares); pares sem leituras
+    simultâneas ficam com 0 pontos e as estatísticas em NaN.
+    """
+    variaveis = [v for v in variaveis if v in leituras.columns]
+    if pares.empty or not variaveis:
+        return pd.DataFrame(columns=COLUNAS_RESUMO)
+    grades = alinhar_pares(leituras, pares, passo, lacuna, variaveis, coluna_tempo, margem=max_defasagem * passo)
+    passo_min = passo / pd.Timedelta(minutes=1)
+    vazio = {'pontos': 0, **{c: np.nan for c in COLUNAS_RESUMO[COLUNAS_RESUMO.index('diferenca_media'):]}}
+    registros = []
+    for par, grade in zip(pares.to_dict('records'), grades):
+        for variavel in variaveis:
+            if grade is None:
+                registros.append({**par, 'variavel': variavel, **vazio})
+                continue
+            um_par = pd.DataFrame({'lote_diatex': grade.lotes[:1], 'lote_testemunha': grade.lotes[1:]})
+            teste = teste_pareado(diferencas_pareadas(grade, um_par, variavel))
+            defasagens, correlacoes = correlacao_defasada(grade, um_par, variavel, max_defasagem)
+            correlacoes = correlacoes[0]
+            tem_correlacao = not np.isnan(correlacoes).all()
+            melhor = int(np.argmax(np.where(np.isnan(correlacoes), -np.inf, correlacoes)))
+            registros.append({
+                **par, 'variavel': variavel, **{c: v[0] for c, v in teste.items()},
+                'correlacao': correlacoes[max_defasagem],
+                'defasagem_max_min': defasagens[melhor] * passo_min if tem_correlacao else np.nan,
+                'correlacao_max': correlacoes[melhor] if tem_correlacao else np.nan,
+            })
+    resumo = pd.DataFrame(registros, columns=COLUNAS_RESUMO)
+    ordem = {v: i for i, v in enumerate(variaveis)}
+    return resumo.sort_values('variavel', key=lambda s: s.map(ordem), kind='stable').reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alinha os aviários em uma grade regular e compara os pares "
+                                                 "DIATEX x TESTEMUNHA do mesmo produtor e bateria")
+    parser.add_argument('--db', default=os.path.join(project_root, 'database', 'TESTE_DIATEX_PROD.db'))
+    parser.add_argument('--passo', type=float, default=PASSO_GRADE / pd.Timedelta(minutes=1),
+                        help="Passo da grade em minutos")
+    parser.add_argument('--max-defasagem', type=int, default=MAX_DEFASAGEM,
+                        help="Defasagem máxima da correlação cruzada, em passos da grade")
+    parser.add_argument('--saida', default=None, help="Pasta onde a grade de cada par é gravada (.npz)")
+    args = parser.parse_args()
+
+    with sqlite3.connect(args.db) as conn:
+        leituras = pd.read_sql_query(
+            f"SELECT lote_composto, Fecha, Hora, {', '.join(VARIAVEIS_GRADE)} FROM medicoes "
+            "WHERE lote_composto IS NOT NULL", conn)
+        tratamentos = pd.read_sql_query("SELECT lote_composto, teste, produtor, bateria_teste FROM tratamentos", conn)
+
+    leituras = leituras.assign(data_hora=momentos_leitura(leituras))
+    pares = pares_lotes(tratamentos)
+    passo = pd.Timedelta(minutes=args.passo)
+    if args.saida:
+        os.makedirs(args.saida, exist_ok=True)
+        for grade in alinhar_pares(leituras, pares, passo=passo):
+            if grade is not None:
+                grade.salvar(os.path.join(args.saida, f"{grade.lotes[0]}_x_{grade.lotes[1]}.npz"))
+        print(f"Grades gravadas em: {args.saida}")
+
+    resumo = comparar_pares(leituras, pares, max_defasagem=args.max_defasagem, passo=passo)
+    logger.info(f"Comparação pareada: {len(pares)} par(es) em grade de {args.passo:g} min",
+                extra={'dados': {'evento': 'comparacao_pareada', 'pares': len(pares),
+                                 'pares_sem_periodo_comum': int((resumo.groupby(['lote_diatex', 'lote_testemunha'])
+                                                                 ['pontos'].max() == 0).sum())}})
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        print(resumo.round(3).to_string(index=False))
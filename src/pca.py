@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+VARIAVEIS_PCA = ['NH3', 'Temperatura', 'Humedad', 'idade_lote']
+
+# Acima deste tamanho o ajuste é feito sobre uma amostra estratificada
+TAMANHO_AMOSTRA_PCA = 200_000
+# Tamanho dos mini-lotes no ajuste incremental
+TAMANHO_LOTE_PCA = 100_000
+# Limite de pontos enviados ao gráfico de dispersão
+MAX_PONTOS_PCA = 20_000
+
+
+def amostra_estratificada(df, tamanho_max, estrato='teste', semente=42):
+    """Retorna uma amostra proporcional por estrato com no máximo ~tamanho_max linhas."""
+    if len(df) <= tamanho_max:
+        return df
+    # Amostragem de Bernoulli com a mesma fração em todas as linhas: cada estrato
+    # mantém sua proporção sem precisar de uma passada agrupada
+    rng = np.random.default_rng(semente)
+    selecionadas = rng.random(len(df)) < tamanho_max / len(df)
+    amostra = df[selecionadas]
+    # Garante que nenhum estrato presente nos dados desapareça da amostra
+    ausentes = set(df[estrato].unique()) - set(amostra[estrato].unique())
+    if ausentes:
+        extras = df[df[estrato].isin(ausentes)].groupby(estrato, observed=True).head(1)
+        amostra = pd.concat([amostra, extras])
+    return amostra
+
+
+def _mini_lotes(X, tamanho_lote):
+    for inicio in range(0, len(X), tamanho_lote):
+        yield X[inicio:inicio + tamanho_lote]
+
+
+def ajustar_pca(df, metodo='amostra', n_componentes=2, tamanho_amostra=TAMANHO_AMOSTRA_PCA,
+                tamanho_lote=TAMANHO_LOTE_PCA):
+    """Ajusta padronização + PCA sobre uma amostra estratificada ou incrementalmente em mini-lotes."""
+    # O scikit-learn é carregado no primeiro ajuste, não na abertura do dashboard
+    from sklearn.decomposition import PCA, IncrementalPCA
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    if metodo == 'amostra':
+        amostra = amostra_estratificada(df, tamanho_amostra)
+        modelo = Pipeline([('scaler', StandardScaler()), ('pca', PCA(n_components=n_componentes))])
+        modelo.fit(amostra[VARIAVEIS_PCA].to_numpy(dtype=float))
+        return modelo
+
+    if metodo == 'incremental':
+        X = df[VARIAVEIS_PCA].to_numpy(dtype=float)
+        scaler = StandardScaler()
+        for lote in _mini_lotes(X, tamanho_lote):
+            scaler.partial_fit(lote)
+        pca = IncrementalPCA(n_components=n_componentes)
+        for lote in _mini_lotes(X, tamanho_lote):
+            # O IncrementalPCA exige pelo menos n_componentes linhas por lote
+            if len(lote) >= n_componentes:
+                pca.partial_fit(scaler.transform(lote))
+        return Pipeline([('scaler', scaler), ('pca', pca)])
+
+    raise ValueError(f"Método de ajuste PCA desconhecido: {metodo}")
+
+
+def projetar_pca(modelo, df, max_pontos=MAX_PONTOS_PCA):
+    """Projeta nos componentes apenas as linhas que serão plotadas (amostra limitada a max_pontos)."""
+    pontos = amostra_estratificada(df, max_pontos)
+    X_pca = modelo.transform(pontos[VARIAVEIS_PCA].to_numpy(dtype=float))
+
+    df_pca = pd.DataFrame(X_pca[:, :2], columns=['PC1', 'PC2'], index=pontos.index)
+    df_pca['teste'] = pontos['teste'].to_numpy()
+    return df_pca.reset_index(drop=True)
+
+
+def variancia_explicada(modelo):
+    """Retorna a razão de variância explicada por componente."""
+    return np.asarray(modelo.named_steps['pca'].explained_variance_ratio_)
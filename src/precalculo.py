@@ -0,0 +1,331 @@
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+# Adicionar a raiz do projeto ao Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from src.analises import calcular_metricas_desempenho, realizar_teste_t, gerar_alertas
+from src.bootstrap import bootstrap_eficacia, UNIDADES_REAMOSTRAGEM
+from src.dados import carregar_medicoes, carregar_episodios, aplicar_filtros
+from src.shards import carregar_medicoes_federado, caminho_catalogo
+from src.tendencias import acumular_somas, CHAVES_TENDENCIA, COLUNAS_SOMAS
+from src.utils.cache import versao_dados
+from src.utils.conexao import conexao_leitura
+from src.utils.logger import setup_logger
+
+logger = setup_logger('precalculo')
+
+CAMINHO_RESULTADOS = os.path.join(project_root, 'database', 'resultados_analises.db')
+
+# Recortes padrão: nome do recorte -> argumento de aplicar_filtros (None = todos os dados)
+RECORTES = {'geral': None, 'bateria': 'bateria', 'lote': 'lote', 'aviario': 'aviario'}
+COLUNAS_RECORTES = {'bateria': 'bateria_teste', 'lote': 'lote_composto', 'aviario': 'aviario'}
+VALOR_GERAL = 'todos'
+
+VARIAVEIS = ['NH3', 'Temperatura', 'Humedad']
+VARIAVEIS_CORRELACAO = ['NH3', 'Temperatura', 'Humedad', 'idade_lote']
+TRATAMENTOS = ['DIATEX', 'TESTEMUNHA']
+COLUNAS_METRICAS = ['nh3_media', 'nh3_std', 'nh3_min', 'nh3_max', 'temp_media', 'umid_media',
+                    'n_medicoes', 'dias_monitoramento']
+ORDEM_ESTATISTICAS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+INDICADORES_BOOTSTRAP = ['eficacia_nh3', 'reducao_variabilidade']
+COLUNAS_BOOTSTRAP = ['unidade', 'indicador', 'estimativa', 'inferior', 'superior', 'reamostragens', 'nivel',
+                     'blocos_diatex', 'blocos_testemunha', 'prob_reducao', 'significativo']
+
+# Tabelas gravadas no banco de resultados (todas com as colunas recorte e valor)
+TABELAS_RESULTADOS = ['resultados_estatisticas', 'resultados_metricas', 'resultados_comparacao',
+                      'resultados_testes_t', 'resultados_somas_tendencia', 'resultados_correlacoes',
+                      'resultados_alertas', 'resultados_bootstrap']
+
+# Dados de cada processo do pool (recebidos uma vez, na inicialização)
+_dados = None
+_episodios = None
+_periodo = None
+
+
+def listar_recortes(df):
+    """Recortes padrão presentes nos dados: geral, cada bateria, cada lote e cada aviário."""
+    recortes = [('geral', VALOR_GERAL)]
+    for recorte, coluna in COLUNAS_RECORTES.items():
+        recortes += [(recorte, valor) for valor in sorted(df[coluna].dropna().unique().tolist())]
+    return recortes
+
+
+def _iniciar_processo(dados, episodios, periodo):
+    global _dados, _episodios, _periodo
+    _dados, _episodios, _periodo = dados, episodios, periodo
+
+
+def _longo(serie, nomes):
+    """Série com índice múltiplo -> DataFrame longo com uma coluna por nível e a coluna `valor_resultado`."""
+    return serie.rename('valor_resultado').rename_axis(nomes).reset_index()
+
+
+def _sem_categoricos(df):
+    """Categóricos de volta a texto, como ficam depois de gravados no SQLite."""
+    return df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+
+
+def calcular_resultados(dados, episodios=None):
+    """Todas as análises do dashboard para um recorte, como DataFrames prontos para gravar."""
+    resultados = {}
+
+    estatisticas = dados.groupby('teste', observed=True)[VARIAVEIS].describe()
+    resultados['resultados_estatisticas'] = _longo(estatisticas.unstack(), ['variavel', 'estatistica', 'teste'])
+
+    metricas = calcular_metricas_desempenho(dados)
+    resultados['resultados_metricas'] = pd.DataFrame(
+        [dict(metricas[t], teste=t) for t in TRATAMENTOS if t in metricas],
+        columns=['teste'] + COLUNAS_METRICAS)
+    resultados['resultados_comparacao'] = pd.DataFrame([{
+        'eficacia_nh3': metricas.get('eficacia_nh3'),
+        'reducao_variabilidade': metricas.get('reducao_variabilidade'),
+    }])
+
+    testes = []
+    for variavel in VARIAVEIS:
+        teste_t = realizar_teste_t(dados, variavel)
+        testes.append({
+            'variavel': variavel,
+            'estatistica': None if teste_t['estatistica'] is None else float(teste_t['estatistica']),
+            'p_valor': None if teste_t['p_valor'] is None else float(teste_t['p_valor']),
+            'significativo': None if teste_t['significativo'] is None else bool(teste_t['significativo']),
+            'interpretacao': teste_t['interpretacao'],
+        })
+    resultados['resultados_testes_t'] = pd.DataFrame(testes)
+
+    somas = [acumular_somas(dados, variavel, CHAVES_TENDENCIA).reset_index().assign(variavel=variavel)
+             for variavel in VARIAVEIS]
+    resultados['resultados_somas_tendencia'] = pd.concat(somas, ignore_index=True)
+
+    correlacoes = []
+    for tratamento in TRATAMENTOS:
+        corr = dados.loc[(dados['teste'] == tratamento).to_numpy(dtype=bool, na_value=False), VARIAVEIS_CORRELACAO].corr()
+        correlacoes.append(_longo(corr.unstack(), ['variavel_2', 'variavel_1']).assign(teste=tratamento))
+    resultados['resultados_correlacoes'] = pd.concat(correlacoes, ignore_index=True)
+
+    # Os recortes já rodam em paralelo nos processos do pool, então o bootstrap usa uma thread só
+    intervalos = {unidade: bootstrap_eficacia(dados, unidade, max_workers=1) for unidade in UNIDADES_REAMOSTRAGEM}
+    resultados['resultados_bootstrap'] = pd.DataFrame(
+        [{'unidade': unidade, 'indicador': indicador, **ic[indicador], 'reamostragens': ic['reamostragens'],
+          'nivel': ic['nivel'], 'blocos_diatex': ic['blocos']['DIATEX'], 'blocos_testemunha': ic['blocos']['TESTEMUNHA'],
+          'prob_reducao': ic['prob_reducao'], 'significativo': ic['significativo']}
+         for unidade, ic in intervalos.items() if ic is not None for indicador in INDICADORES_BOOTSTRAP],
+        columns=COLUNAS_BOOTSTRAP)
+
+    alertas = gerar_alertas(dados, episodios, intervalos['lote'])
+    resultados['resultados_alertas'] = pd.DataFrame(
+        [{'ordem': i, 'tipo': a['tipo'], 'titulo': a['titulo'], 'mensagem': a['mensagem'],
+          'detalhes': a.get('detalhes')} for i, a in enumerate(alertas)],
+        columns=['ordem', 'tipo', 'titulo', 'mensagem', 'detalhes'])
+    return resultados
+
+
+def calcular_recorte(df, episodios, periodo, recorte, valor):
+    """Filtra o recorte como o dashboard faria e calcula todas as análises."""
+    argumento = RECORTES[recorte]
+    filtros = {} if argumento is None else {argumento: valor}
+    dados = aplicar_filtros(df, periodo=periodo, **filtros)
+    # O dashboard filtra os episódios só por período, lote e aviário
+    if episodios is not None and not episodios.empty:
+        episodios = aplicar_filtros(episodios, periodo=periodo,
+                                    **{k: v for k, v in filtros.items() if k in ('lote', 'aviario')})
+    return calcular_resultados(dados, episodios)
+
+
+def analisar_recorte(recorte, valor):
+    """Executado em um processo do pool com os dados recebidos na inicialização."""
+    return recorte, valor, calcular_recorte(_dados, _episodios, _periodo, recorte, valor)
+
+
+def precalcular(caminho_db, dir_shards=None, caminho_resultados=CAMINHO_RESULTADOS, processos=None):
+    """Calcula as análises de todos os recortes padrão em um pool de processos e grava as tabelas de resultados.
+
+    O banco de resultados é gravado em um arquivo temporário e publicado com os.replace,
+    junto com a versão dos dados de origem: o dashboard só usa resultados da versão que está lendo.
+    """
+    inicio = time.perf_counter()
+    caminho_fonte = caminho_catalogo(dir_shards) if dir_shards else caminho_db
+    versao = versao_dados(caminho_fonte)
+    df = carregar_medicoes_federado(dir_shards) if dir_shards else carregar_medicoes(caminho_db)
+    episodios = carregar_episodios(caminho_db) if os.path.exists(caminho_db) else pd.DataFrame()
+    # Mesmo período padrão da sidebar (leituras sem data ficam de fora, como no dashboard)
+    periodo = (df['Fecha'].min().date(), df['Fecha'].max().date())
+
+    recortes = listar_recortes(df)
+    partes = {tabela: [] for tabela in TABELAS_RESULTADOS}
+    with ProcessPoolExecutor(max_workers=processos or os.cpu_count() or 1, initializer=_iniciar_processo,
+                             initargs=(df, episodios, periodo)) as executor:
+        futuros = [executor.submit(analisar_recorte, recorte, valor) for recorte, valor in recortes]
+        for futuro in futuros:
+            recorte, valor, resultados = futuro.result()
+            for tabela, resultado in resultados.items():
+                partes[tabela].append(resultado.assign(recorte=recorte, valor=str(valor)))
+
+    temporario = caminho_resultados + '.parcial'
+    if os.path.exists(temporario):
+        os.remove(temporario)
+    with sqlite3.connect(temporario) as conn:
+        for tabela, resultados in partes.items():
+            resultados = pd.concat(resultados, ignore_index=True)
+            _sem_categoricos(resultados).to_sql(tabela, conn, index=False)
+            conn.execute(f"CREATE INDEX idx_{tabela} ON {tabela} (recorte, valor)")
+        conn.execute("CREATE TABLE resultados_execucao (versao_dados TEXT, fonte TEXT, gerado_em TEXT, "
+                     "recortes INTEGER, linhas INTEGER, segundos REAL)")
+        conn.execute("INSERT INTO resultados_execucao VALUES (?, ?, ?, ?, ?, ?)", (
+            versao, os.path.abspath(caminho_fonte), datetime.datetime.now().isoformat(timespec='seconds'),
+            len(recortes), len(df), time.perf_counter() - inicio))
+        conn.commit()
+    os.replace(temporario, caminho_resultados)
+
+    logger.info(f"Resultados pré-calculados: {len(recortes)} recortes de {len(df):,} leituras "
+                f"({time.perf_counter() - inicio:.1f} s) em {caminho_resultados}", extra={'dados': {
+                    'evento': 'precalculo', 'recortes': len(recortes), 'linhas': len(df),
+                    'segundos': time.perf_counter() - inicio, 'versao_dados': versao,
+                }})
+    return caminho_resultados
+
+
+def carregar_resultados(caminho_resultados=CAMINHO_RESULTADOS):
+    """Tabelas de resultados e a versão dos dados de origem (None, {} se ainda não foram gerados)."""
+    if not os.path.exists(caminho_resultados):
+        return None, {}
+    with conexao_leitura(caminho_resultados) as conn:
+        versao = conn.execute("SELECT versao_dados FROM resultados_execucao").fetchone()[0]
+        tabelas = {tabela: pd.read_sql_query(f"SELECT * FROM {tabela}", conn).set_index(['recorte', 'valor']).sort_index()
+                   for tabela in TABELAS_RESULTADOS}
+    return versao, tabelas
+
+
+def identificar_recorte(produtor=None, linhagem=None, bateria=None, lote=None, aviario=None,
+                        periodo_completo=True, idade=None, semana=None):
+    """(recorte, valor) quando os filtros da sidebar correspondem a um recorte padrão; senão None."""
+    if produtor is not None or linhagem is not None or idade is not None or semana is not None:
+        return None
+    if not periodo_completo:
+        return None
+    escolhidos = [(recorte, valor) for recorte, valor in [('bateria', bateria), ('lote', lote), ('aviario', aviario)]
+                  if valor is not None]
+    if not escolhidos:
+        return 'geral', VALOR_GERAL
+    if len(escolhidos) == 1:
+        return escolhidos[0][0], str(escolhidos[0][1])
+    return None
+
+
+def obter_recorte(tabelas, recorte, valor):
+    """Resultados do recorte, ou None se ele não foi pré-calculado."""
+    if not tabelas or (recorte, str(valor)) not in tabelas['resultados_testes_t'].index:
+        return None
+    return ResultadosRecorte(tabelas, recorte, valor)
+
+
+class ResultadosRecorte:
+    """Resultados pré-calculados de um recorte, nos mesmos formatos das funções de src/analises.py."""
+
+    def __init__(self, tabelas, recorte, valor):
+        chave = (recorte, str(valor))
+        self.tabelas = {tabela: df.loc[[chave]].reset_index(drop=True) if chave in df.index else df.iloc[:0].reset_index(drop=True)
+                        for tabela, df in tabelas.items()}
+
+    @classmethod
+    def de_resultados(cls, resultados, recorte, valor):
+        """Resultados de calcular_resultados (calculados na hora) no mesmo formato das tabelas gravadas."""
+        tabelas = {tabela: _sem_categoricos(resultado).assign(recorte=recorte, valor=str(valor)).set_index(['recorte', 'valor'])
+                   for tabela, resultado in resultados.items()}
+        return cls(tabelas, recorte, valor)
+
+    def estatisticas(self):
+        """Mesma tabela de dados.groupby('teste')[VARIAVEIS].describe()."""
+        longo = self.tabelas['resultados_estatisticas']
+        tabela = longo.pivot_table(index='teste', columns=['variavel', 'estatistica'], values='valor_resultado',
+                                   aggfunc='first', dropna=False)
+        colunas = pd.MultiIndex.from_product([VARIAVEIS, ORDEM_ESTATISTICAS])
+        return tabela.reindex(columns=colunas).rename_axis(index='teste', columns=[None, None])
+
+    def metricas(self):
+        """Mesmo dicionário de calcular_metricas_desempenho."""
+        metricas = {}
+        for linha in self.tabelas['resultados_metricas'].to_dict('records'):
+            metricas[linha['teste']] = {c: linha[c] for c in COLUNAS_METRICAS}
+            for coluna in ('n_medicoes', 'dias_monitoramento'):
+                metricas[linha['teste']][coluna] = int(linha[coluna])
+        comparacao = self.tabelas['resultados_comparacao']
+        for coluna in ('eficacia_nh3', 'reducao_variabilidade'):
+            if len(comparacao) and pd.notna(comparacao[coluna].iloc[0]):
+                metricas[coluna] = float(comparacao[coluna].iloc[0])
+        return metricas
+
+    def teste_t(self, variavel):
+        """Mesmo dicionário de realizar_teste_t."""
+        linha = self.tabelas['resultados_testes_t'].set_index('variavel').loc[variavel]
+        return {
+            'estatistica': None if pd.isna(linha['estatistica']) else float(linha['estatistica']),
+            'p_valor': None if pd.isna(linha['p_valor']) else float(linha['p_valor']),
+            'significativo': None if pd.isna(linha['significativo']) else bool(linha['significativo']),
+            'interpretacao': linha['interpretacao'],
+        }
+
+    def somas_tendencia(self, variavel):
+        """Mesmas somas de acumular_somas(dados, variavel, CHAVES_TENDENCIA)."""
+        somas = self.tabelas['resultados_somas_tendencia']
+        somas = somas[somas['variavel'] == variavel]
+        return somas.set_index(CHAVES_TENDENCIA)[COLUNAS_SOMAS].astype({'n': 'int64'})
+
+    def correlacao(self, tratamento):
+        """Mesma matriz de dados[dados['teste'] == tratamento][VARIAVEIS_CORRELACAO].corr()."""
+        longo = self.tabelas['resultados_correlacoes']
+        longo = longo[longo['teste'] == tratamento]
+        matriz = longo.pivot_table(index='variavel_1', columns='variavel_2', values='valor_resultado',
+                                   aggfunc='first', dropna=False)
+        return matriz.reindex(index=VARIAVEIS_CORRELACAO, columns=VARIAVEIS_CORRELACAO).rename_axis(index=None, columns=None)
+
+    def alertas(self):
+        """Mesma lista de gerar_alertas."""
+        alertas = []
+        for linha in self.tabelas['resultados_alertas'].sort_values('ordem').to_dict('records'):
+            alerta = {'tipo': linha['tipo'], 'titulo': linha['titulo'], 'mensagem': linha['mensagem']}
+            if linha['detalhes'] is not None and not (isinstance(linha['detalhes'], float) and np.isnan(linha['detalhes'])):
+                alerta['detalhes'] = linha['detalhes']
+            alertas.append(alerta)
+        return alertas
+
+    def bootstrap(self, unidade='lote'):
+        """Mesmo dicionário de bootstrap_eficacia (None se o recorte não tinha blocos suficientes)."""
+        linhas = self.tabelas['resultados_bootstrap']
+        linhas = linhas[linhas['unidade'] == unidade].set_index('indicador')
+        if linhas.empty:
+            return None
+        primeira = linhas.iloc[0]
+        intervalos = {
+            'unidade': unidade,
+            'reamostragens': int(primeira['reamostragens']),
+            'nivel': float(primeira['nivel']),
+            'blocos': {'DIATEX': int(primeira['blocos_diatex']), 'TESTEMUNHA': int(primeira['blocos_testemunha'])},
+            'prob_reducao': float(primeira['prob_reducao']),
+            'significativo': bool(primeira['significativo']),
+        }
+        for indicador in INDICADORES_BOOTSTRAP:
+            intervalos[indicador] = {c: float(linhas.loc[indicador, c]) for c in ('estimativa', 'inferior', 'superior')}
+        return intervalos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pré-calcula as análises do dashboard para os recortes padrão "
+                                                 "(geral, bateria, lote, aviário)")
+    parser.add_argument('--db', default=os.path.join(project_root, 'database', 'TESTE_DIATEX_PROD.db'))
+    parser.add_argument('--shards', default=None, help="Pasta dos shards (src/shards.py), no lugar do --db")
+    parser.add_argument('--saida', default=CAMINHO_RESULTADOS, help="Banco onde os resultados são gravados")
+    parser.add_argument('--processos', type=int, default=None, help="Processos do pool (padrão: número de CPUs)")
+    args = parser.parse_args()
+
+    precalcular(args.db, args.shards, args.saida, args.processos)
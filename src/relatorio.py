@@ -0,0 +1,218 @@
+import os
+import tempfile
+import textwrap
+import threading
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.cache import limpar_arquivos_antigos
+
+# Diretório onde os relatórios prontos ficam guardados
+DIR_RELATORIOS = os.path.join(tempfile.gettempdir(), 'diatex_relatorios')
+
+# Quantidade máxima de relatórios mantidos no diretório (os usados há mais tempo são removidos)
+MAX_RELATORIOS = 20
+
+CORES_TRATAMENTO = {'DIATEX': '#1f77b4', 'TESTEMUNHA': '#ff7f0e'}
+
+# Tamanho A4 em polegadas
+TAMANHO_PAGINA = (8.27, 11.69)
+
+CONCLUSOES = {
+    'significativa': ('DIATEX DEMONSTRA EFICÁCIA SIGNIFICATIVA',
+                      'Implementação do produto DIATEX é recomendada.'),
+    'moderada': ('DIATEX APRESENTA EFICÁCIA MODERADA',
+                 'Considerar implementação com monitoramento contínuo.'),
+    'ineficaz': ('DIATEX NÃO DEMONSTRA EFICÁCIA',
+                 'Não implementar o produto. Revisar formulação ou aplicação.'),
+    'inconclusivo': ('RESULTADOS INCONCLUSIVOS',
+                     'Coletar mais dados ou revisar protocolo experimental.'),
+}
+
+VARIAVEIS_RELATORIO = [('NH3', 'NH3 (ppm)'), ('Temperatura', 'Temperatura (°C)'), ('Humedad', 'Umidade (%)')]
+
+
+def caminho_relatorio(versao, chave, diretorio=DIR_RELATORIOS):
+    """Caminho do relatório para a versão dos dados e o filtro informados."""
+    return os.path.join(diretorio, f"relatorio_{versao}_{chave}.pdf")
+
+
+
+def ler_relatorio(caminho):
+    """Bytes do relatório pronto; marca o arquivo como usado recentemente para a limpeza dos antigos."""
+    os.utime(caminho)
+    with open(caminho, 'rb') as f:
+        return f.read()
+
+def _pagina_texto(pdf, titulo, linhas):
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=TAMANHO_PAGINA)
+    fig.text(0.08, 0.95, titulo, fontsize=16, weight='bold', va='top')
+    y = 0.90
+    for linha in linhas:
+        for trecho in textwrap.wrap(linha, 95) or ['']:
+            fig.text(0.08, y, trecho, fontsize=10, va='top')
+            y -= 0.022
+    pdf.savefig(fig)
+
+
+def _pagina_tabela(pdf, titulo, cabecalho, linhas):
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=TAMANHO_PAGINA)
+    ax = fig.add_axes([0.08, 0.1, 0.84, 0.8])
+    ax.axis('off')
+    ax.set_title(titulo, fontsize=14, weight='bold', loc='left')
+    tabela = ax.table(cellText=linhas, colLabels=cabecalho, loc='upper center', cellLoc='center')
+    tabela.auto_set_font_size(False)
+    tabela.set_fontsize(9)
+    tabela.scale(1, 1.5)
+    pdf.savefig(fig)
+
+
+def _pagina_series(pdf, titulo, dados, coluna_grupo, rotulo_x):
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=TAMANHO_PAGINA)
+    fig.suptitle(titulo, fontsize=14, weight='bold')
+    medias = dados.groupby([coluna_grupo, 'teste'], observed=True)[[v for v, _ in VARIAVEIS_RELATORIO]].mean()
+    for i, (variavel, rotulo) in enumerate(VARIAVEIS_RELATORIO):
+        ax = fig.add_subplot(len(VARIAVEIS_RELATORIO), 1, i + 1)
+        for tratamento, cor in CORES_TRATAMENTO.items():
+            if tratamento in medias.index.get_level_values('teste'):
+                serie = medias.xs(tratamento, level='teste')[variavel]
+                ax.plot(serie.index, serie.values, marker='o', markersize=3, color=cor, label=tratamento)
+        ax.set_ylabel(rotulo)
+        ax.grid(alpha=0.3)
+        if i == 0:
+            ax.legend()
+    ax.set_xlabel(rotulo_x)
+    fig.autofmt_xdate()
+    pdf.savefig(fig)
+
+
+def gerar_relatorio_pdf(caminho, conteudo, dados, progresso=None):
+    """Gera o relatório em PDF a partir das conclusões, métricas, testes T e gráficos.
+
+    `progresso` é um dicionário atualizado a cada etapa ('etapa' e 'fracao').
+    """
+    def avancar(etapa, fracao):
+        if progresso is not None:
+            progresso.update(etapa=etapa, fracao=fracao)
+
+    # O matplotlib só é carregado quando um relatório é pedido, na thread de geração
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    parcial = caminho + '.parcial'
+
+    # Grava em arquivo temporário e renomeia ao final; se a geração falhar, o temporário é removido
+    try:
+        with PdfPages(parcial) as pdf:
+            avancar('Resumo e conclusões', 0.1)
+            titulo_conclusao, recomendacao = CONCLUSOES[conteudo['classificacao']]
+            linhas = [
+                f"Gerado em: {conteudo['gerado_em']}",
+                f"Filtros: {conteudo['filtros']}",
+                f"Tamanho da amostra: {conteudo['n_medicoes']:,} medições",
+                f"Período de estudo: {conteudo['periodo']}",
+                '',
+                'RESUMO EXECUTIVO',
+                f"Diferença de NH3 (DIATEX vs TESTEMUNHA): {conteudo['diff_nh3']:.2f}%",
+                f"Diferença de Temperatura: {conteudo['diff_temp']:.2f}%",
+                f"Diferença de Umidade: {conteudo['diff_umid']:.2f}%",
+                '',
+                'CONCLUSÃO FINAL',
+                titulo_conclusao,
+                f"Recomendação: {recomendacao}",
+                '',
+                'ANÁLISE ESTATÍSTICA (TESTE T DE WELCH)',
+            ]
+            for variavel, resultado in conteudo['testes_t'].items():
+                linhas.append(f"{variavel}: {resultado['interpretacao']}")
+            if conteudo['alertas']:
+                linhas += ['', 'ALERTAS']
+                for alerta in conteudo['alertas']:
+                    linhas.append(f"{alerta['titulo']}: {alerta['mensagem']} {alerta.get('detalhes', '')}")
+            _pagina_texto(pdf, 'Relatório DIATEX - Eficácia em Aviários', linhas)
+
+            avancar('Métricas de desempenho', 0.3)
+            metricas = conteudo['metricas']
+            if 'DIATEX' in metricas and 'TESTEMUNHA' in metricas:
+                nomes = [('nh3_media', 'NH3 Média (ppm)', '.2f'), ('nh3_std', 'NH3 Desvio Padrão', '.2f'),
+                         ('nh3_min', 'NH3 Mínimo', '.2f'), ('nh3_max', 'NH3 Máximo', '.2f'),
+                         ('temp_media', 'Temperatura Média (°C)', '.1f'), ('umid_media', 'Umidade Média (%)', '.1f'),
+                         ('n_medicoes', 'Número de Medições', ','), ('dias_monitoramento', 'Dias de Monitoramento', '')]
+                linhas_tabela = [[rotulo, format(metricas['DIATEX'][chave], fmt), format(metricas['TESTEMUNHA'][chave], fmt)]
+                                 for chave, rotulo, fmt in nomes]
+                if 'eficacia_nh3' in metricas:
+                    linhas_tabela.append(['Eficácia NH3 (%)', f"{metricas['eficacia_nh3']:.1f}", ''])
+                if 'reducao_variabilidade' in metricas:
+                    linhas_tabela.append(['Redução Variabilidade (%)', f"{metricas['reducao_variabilidade']:.1f}", ''])
+                _pagina_tabela(pdf, 'Métricas Detalhadas de Desempenho', ['Métrica', 'DIATEX', 'TESTEMUNHA'], linhas_tabela)
+
+            avancar('Gráficos diários', 0.5)
+            dados_dia = dados.assign(dia=dados['Fecha'].dt.date)
+            _pagina_series(pdf, 'Comparativo Diário entre Tratamentos', dados_dia, 'dia', 'Data')
+
+            avancar('Gráficos por semana de vida', 0.8)
+            _pagina_series(pdf, 'Médias por Semana de Vida', dados, 'semana_vida', 'Semana de Vida')
+
+            avancar('Finalizando', 0.95)
+
+        os.replace(parcial, caminho)
+    finally:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+    limpar_arquivos_antigos(os.path.dirname(caminho), 'relatorio_*.pdf', MAX_RELATORIOS)
+    avancar('Concluído', 1.0)
+    return caminho
+
+
+class GerenciadorRelatorios:
+    """Executa a geração de relatórios em segundo plano e acompanha o progresso de cada tarefa."""
+
+    def __init__(self, max_workers=2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='relatorio')
+        self._tarefas = {}
+        self._lock = threading.Lock()
+
+    def solicitar(self, caminho, conteudo, dados):
+        """Agenda a geração do relatório; não duplica uma tarefa já em andamento para o mesmo caminho."""
+        with self._lock:
+            tarefa = self._tarefas.get(caminho)
+            if tarefa is not None and not tarefa['futuro'].done():
+                return tarefa
+            progresso = {'etapa': 'Na fila', 'fracao': 0.0}
+            futuro = self._executor.submit(gerar_relatorio_pdf, caminho, conteudo, dados, progresso)
+            tarefa = {'futuro': futuro, 'progresso': progresso}
+            self._tarefas[caminho] = tarefa
+            return tarefa
+
+    def tarefa(self, caminho):
+        """Retorna a tarefa associada ao caminho (ou None)."""
+        with self._lock:
+            return self._tarefas.get(caminho)
+
+    def descartar(self, caminho):
+        """Esquece a tarefa (ex.: depois de exibir um erro)."""
+        with self._lock:
+            self._tarefas.pop(caminho, None)
+
+
+def montar_conteudo(filtros, n_medicoes, periodo, metricas, testes_t, alertas,
+                    classificacao, diff_nh3, diff_temp, diff_umid):
+    """Reúne os resultados já calculados pelo dashboard no formato usado pelo relatório."""
+    return {
+        'gerado_em': datetime.datetime.now().strftime('%d/%m/%Y %H:%M'),
+        'filtros': filtros,
+        'n_medicoes': n_medicoes,
+        'periodo': periodo,
+        'metricas': metricas,
+        'testes_t': testes_t,
+        'alertas': alertas,
+        'classificacao': classificacao,
+        'diff_nh3': diff_nh3,
+        'diff_temp': diff_temp,
+        'diff_umid': diff_umid,
+    }
@@ -0,0 +1,207 @@
+import os
+import re
+import sys
+import sqlite3
+import argparse
+import datetime
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+
+# Adicionar a raiz do projeto ao Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from src.dados import CONSULTA_MEDICOES, preparar_medicoes
+from src.utils.logger import setup_logger
+
+logger = setup_logger('shards')
+
+DIR_SHARDS = os.path.join(project_root, 'database', 'shards')
+NOME_CATALOGO = 'catalogo.db'
+# Colunas de tratamentos que podem definir a partição
+PARTICOES = ['produtor', 'bateria_teste']
+SEM_PARTICAO = 'sem_particao'
+# Chaves de agregação calculáveis dentro de cada shard, com a expressão SQL equivalente à de
+# preparar_medicoes (semana de vida com divisão inteira arredondada para baixo, como o // do pandas).
+# O aviário sai do nome do arquivo por expressão regular e não entra aqui.
+EXPRESSOES_AGREGACAO = {
+    'teste': 'teste',
+    'bateria_teste': 'bateria_teste',
+    'lote_composto': 'lote_composto',
+    'produtor': 'produtor',
+    'linhagem': 'linhagem',
+    'idade_lote': 'idade_lote',
+    'Fecha': 'Fecha',
+    'semana_vida': '(idade_lote - ((idade_lote % 7) + 7) % 7) / 7 + 1',
+}
+
+
+def caminho_catalogo(dir_shards=DIR_SHARDS):
+    return os.path.join(dir_shards, NOME_CATALOGO)
+
+
+def nome_shard(particao, valor):
+    """Nome do arquivo do shard (ex.: produtor_darlan_simon.db)."""
+    if valor is None or str(valor).strip() == '':
+        return f"{particao}_{SEM_PARTICAO}.db"
+    return f"{particao}_{re.sub(r'[^0-9a-z]+', '_', str(valor).strip().lower()).strip('_')}.db"
+
+
+def _abrir_catalogo(dir_shards):
+    os.makedirs(dir_shards, exist_ok=True)
+    conn = sqlite3.connect(caminho_catalogo(dir_shards))
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS shards (
+            arquivo TEXT PRIMARY KEY, particao TEXT, valor TEXT, linhas INTEGER,
+            data_min TEXT, data_max TEXT, publicado_em TEXT
+        )
+    """)
+    return conn
+
+
+def publicar_shards(caminho_db, particao='produtor', dir_shards=DIR_SHARDS, valores=None):
+    """Copia as medições do banco de origem para um shard por valor da partição e atualiza o catálogo.
+
+    Apenas os shards dos valores presentes na origem (ou em `valores`) são regravados; os
+    demais ficam intocados. Cada shard é gravado em um arquivo temporário e publicado com
+    os.replace, então leitores nunca veem um shard pela metade.
+    """
+    if particao not in PARTICOES:
+        raise ValueError(f"Partição inválida: {particao} (use {', '.join(PARTICOES)})")
+    os.makedirs(dir_shards, exist_ok=True)
+
+    with closing(sqlite3.connect(caminho_db)) as origem:
+        if valores is None:
+            valores = [v for (v,) in origem.execute(f"SELECT DISTINCT {particao} FROM tratamentos")]
+
+    publicados = []
+    for valor in valores:
+        arquivo = nome_shard(particao, valor)
+        destino = os.path.join(dir_shards, arquivo)
+        temporario = destino + '.parcial'
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+        # A conexão é fechada antes do os.replace (no Windows um arquivo aberto não pode ser substituído)
+        with closing(sqlite3.connect(temporario)) as conn:
+            conn.execute("ATTACH DATABASE ? AS origem", (caminho_db,))
+            conn.execute(f"CREATE TABLE tratamentos AS SELECT * FROM origem.tratamentos WHERE {particao} IS ?", (valor,))
+            conn.execute("""
+                CREATE TABLE medicoes AS
+                SELECT m.* FROM origem.medicoes m
+                WHERE m.lote_composto IN (SELECT lote_composto FROM tratamentos)
+            """)
+            conn.execute("CREATE INDEX idx_medicoes_lote ON medicoes (lote_composto)")
+            linhas, data_min, data_max = conn.execute("SELECT COUNT(*), MIN(Fecha), MAX(Fecha) FROM medicoes").fetchone()
+            conn.commit()
+            conn.execute("DETACH DATABASE origem")
+        os.replace(temporario, destino)
+
+        with closing(_abrir_catalogo(dir_shards)) as catalogo, catalogo:
+            catalogo.execute("INSERT OR REPLACE INTO shards VALUES (?, ?, ?, ?, ?, ?, ?)", (
+                arquivo, particao, None if valor is None else str(valor), linhas, data_min, data_max,
+                datetime.datetime.now().isoformat(timespec='seconds')))
+        publicados.append(arquivo)
+        logger.info(f"Shard publicado: {arquivo} ({linhas:,} medições)")
+
+    # Medições sem tratamento correspondente não pertencem a nenhuma partição
+    with closing(sqlite3.connect(caminho_db)) as origem:
+        sem_tratamento = origem.execute(
+            "SELECT COUNT(*) FROM medicoes WHERE lote_composto IS NULL "
+            "OR lote_composto NOT IN (SELECT lote_composto FROM tratamentos)").fetchone()[0]
+    if sem_tratamento:
+        logger.warning(f"{sem_tratamento:,} medições sem tratamento não foram copiadas para nenhum shard")
+    return publicados
+
+
+def listar_shards(dir_shards=DIR_SHARDS, periodo=None, valores=None):
+    """Shards do catálogo, opcionalmente só os que cobrem o período ou os valores da partição."""
+    with closing(_abrir_catalogo(dir_shards)) as catalogo, catalogo:
+        shards = pd.read_sql_query("SELECT * FROM shards ORDER BY arquivo", catalogo)
+    if periodo is not None:
+        inicio, fim = (pd.Timestamp(p).strftime('%Y-%m-%d') for p in periodo)
+        shards = shards[(shards['data_max'] >= inicio) & (shards['data_min'] <= fim)]
+    if valores is not None:
+        shards = shards[shards['valor'].isin([str(v) for v in valores])]
+    return shards
+
+
+def consultar_federado(sql, params=(), dir_shards=DIR_SHARDS, shards=None, max_workers=None):
+    """Executa a mesma consulta em todos os shards em paralelo e concatena os resultados."""
+    if shards is None:
+        shards = listar_shards(dir_shards)
+    caminhos = [os.path.join(dir_shards, a) for a in shards['arquivo']]
+    if not caminhos:
+        return pd.DataFrame()
+
+    def consultar(caminho):
+        # Uma conexão somente leitura por thread; o sqlite libera o GIL durante a consulta
+        with closing(sqlite3.connect(f"file:{caminho}?mode=ro", uri=True)) as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    with ThreadPoolExecutor(max_workers=max_workers or min(len(caminhos), os.cpu_count() or 1)) as executor:
+        partes = [p for p in executor.map(consultar, caminhos) if len(p)]
+    return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+
+
+def carregar_medicoes_federado(dir_shards=DIR_SHARDS, periodo=None):
+    """Equivalente a carregar_medicoes lendo todos os shards do catálogo."""
+    df = consultar_federado(CONSULTA_MEDICOES, dir_shards=dir_shards,
+                            shards=listar_shards(dir_shards, periodo=periodo))
+    return preparar_medicoes(df)
+
+
+def agregar_federado(chaves, variaveis, dir_shards=DIR_SHARDS, shards=None, filtros=None):
+    """Média, desvio padrão, mínimo e máximo por chave combinando agregados parciais de cada shard.
+
+    Cada shard devolve apenas contagem, soma, soma dos quadrados, mínimo e máximo por grupo;
+    a combinação é exata para a média e para o desvio padrão (amostral). `chaves` e as
+    colunas de `filtros` ({coluna: valor}) precisam estar em EXPRESSOES_AGREGACAO.
+    """
+    invalidas = [c for c in list(chaves) + list(filtros or {}) if c not in EXPRESSOES_AGREGACAO]
+    if invalidas:
+        raise ValueError(f"Colunas sem expressão SQL nos shards: {', '.join(invalidas)}")
+    colunas = [f"{EXPRESSOES_AGREGACAO[c]} AS {c}" for c in chaves]
+    for v in variaveis:
+        colunas += [f"COUNT({v}) AS n_{v}", f"SUM({v}) AS soma_{v}", f"SUM({v} * {v}) AS soma2_{v}",
+                    f"MIN({v}) AS min_{v}", f"MAX({v}) AS max_{v}"]
+    condicoes = [f"{EXPRESSOES_AGREGACAO[c]} = ?" for c in (filtros or {})]
+    sql = (f"SELECT {', '.join(colunas)} FROM ({CONSULTA_MEDICOES})"
+           f"{' WHERE ' + ' AND '.join(condicoes) if condicoes else ''} GROUP BY {', '.join(chaves)}")
+    parciais = consultar_federado(sql, tuple((filtros or {}).values()), dir_shards=dir_shards, shards=shards)
+    if parciais.empty:
+        return parciais
+    if 'Fecha' in chaves:
+        parciais['Fecha'] = pd.to_datetime(parciais['Fecha'])
+
+    regras = {}
+    for v in variaveis:
+        regras.update({f'n_{v}': 'sum', f'soma_{v}': 'sum', f'soma2_{v}': 'sum', f'min_{v}': 'min', f'max_{v}': 'max'})
+    total = parciais.groupby(chaves, dropna=False).agg(regras)
+
+    resultado = pd.DataFrame(index=total.index)
+    for v in variaveis:
+        n, soma, soma2 = total[f'n_{v}'], total[f'soma_{v}'], total[f'soma2_{v}']
+        resultado[f'{v}_n'] = n
+        resultado[f'{v}_media'] = soma / n
+        resultado[f'{v}_std'] = np.sqrt(((soma2 - soma ** 2 / n) / (n - 1)).clip(lower=0))
+        resultado[f'{v}_min'] = total[f'min_{v}']
+        resultado[f'{v}_max'] = total[f'max_{v}']
+    return resultado.reset_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publica medições em shards por granja ou bateria e consulta o catálogo")
+    parser.add_argument('--db', default=os.path.join(project_root, 'database', 'TESTE_DIATEX_PROD.db'),
+                        help="Banco de origem (o banco completo ou apenas a carga de uma nova bateria)")
+    parser.add_argument('--por', default='produtor', choices=PARTICOES)
+    parser.add_argument('--dir', default=DIR_SHARDS)
+    parser.add_argument('--listar', action='store_true', help="Apenas lista o catálogo")
+    args = parser.parse_args()
+
+    if not args.listar:
+        publicar_shards(args.db, args.por, args.dir)
+    print(listar_shards(args.dir).to_string(index=False))
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import datetime
+from contextlib import contextmanager
+
+# Colunas das tabelas de telemetria; colunas novas são adicionadas aos bancos existentes
+COLUNAS_INGEST_RUNS = {
+    'run_id': 'TEXT',
+    'inicio': 'TEXT',
+    'fim': 'TEXT',
+    'status': 'TEXT',
+    'pdf_dir': 'TEXT',
+    'arquivos_vistos': 'INTEGER',
+    'arquivos_com_dados': 'INTEGER',
+    'paginas_lidas': 'INTEGER',
+    'linhas_extraidas': 'INTEGER',
+    'linhas_quarentena': 'INTEGER',
+    'linhas_fora_faixa': 'INTEGER',
+    'linhas_duplicadas': 'INTEGER',
+    'linhas_conflitantes': 'INTEGER',
+    'linhas_gravadas': 'INTEGER',
+    'segundos': 'REAL',
+    'cpu_segundos': 'REAL',
+    'etapas': 'TEXT',
+}
+
+COLUNAS_INGEST_FILES = {
+    'run_id': 'TEXT',
+    'arquivo': 'TEXT',
+    'paginas': 'INTEGER',
+    'paginas_total': 'INTEGER',
+    'metodo': 'TEXT',
+    'linhas_extraidas': 'INTEGER',
+    'linhas_quarentena': 'INTEGER',
+    'linhas_fora_faixa': 'INTEGER',
+    'linhas_duplicadas': 'INTEGER',
+    'motivos': 'TEXT',
+    'nulos': 'TEXT',
+    'segundos': 'REAL',
+    'cpu_segundos': 'REAL',
+    'etapas': 'TEXT',
+}
+
+
+def _cpu():
+    # Inclui os processos filhos: o tabula executa a leitura em uma JVM separada
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+@contextmanager
+def medir_etapa(etapas, nome):
+    """Acumula o tempo de parede e de CPU do trecho em `etapas[nome]`."""
+    inicio, inicio_cpu = time.perf_counter(), _cpu()
+    try:
+        yield
+    finally:
+        etapa = etapas.setdefault(nome, {'segundos': 0.0, 'cpu_segundos': 0.0})
+        etapa['segundos'] += time.perf_counter() - inicio
+        etapa['cpu_segundos'] += _cpu() - inicio_cpu
+
+
+def nova_execucao(pdf_dir):
+    """Registro inicial de uma execução do pipeline de extração."""
+    return {
+        'run_id': uuid.uuid4().hex[:12],
+        'inicio': datetime.datetime.now().isoformat(timespec='seconds'),
+        'pdf_dir': pdf_dir,
+        'etapas': {},
+        '_inicio': time.perf_counter(),
+        '_inicio_cpu': _cpu(),
+    }
+
+
+def resumo_arquivo(execucao, pdf_path, df, segundos, cpu_segundos):
+    """Telemetria de um PDF a partir do DataFrame limpo (e dos attrs gravados na extração).
+
+    Os campos da validação e da deduplicação são preenchidos depois, com os resumos de
+    `validar_medicoes` e `remover_duplicatas`.
+    """
+    return {
+        'run_id': execucao['run_id'],
+        'arquivo': os.path.basename(pdf_path),
+        'paginas': df.attrs.get('paginas'),
+        'paginas_total': df.attrs.get('paginas_total'),
+        'metodo': df.attrs.get('metodo'),
+        'linhas_extraidas': len(df),
+        'linhas_quarentena': 0,
+        'linhas_fora_faixa': 0,
+        'linhas_duplicadas': 0,
+        'motivos': '{}',
+        'nulos': json.dumps({c: int(n) for c, n in df.isna().sum().items()}, ensure_ascii=False),
+        'segundos': segundos,
+        'cpu_segundos': cpu_segundos,
+        'etapas': json.dumps(df.attrs.get('etapas', {})),
+    }
+
+
+def finalizar_execucao(execucao, arquivos, status, linhas_gravadas=0):
+    """Fecha a execução somando os totais dos arquivos."""
+    execucao.update({
+        'fim': datetime.datetime.now().isoformat(timespec='seconds'),
+        'status': status,
+        'arquivos_vistos': len(arquivos),
+        'arquivos_com_dados': sum(1 for a in arquivos if a['linhas_extraidas']),
+        'paginas_lidas': sum(a['paginas'] or 0 for a in arquivos),
+        'linhas_extraidas': sum(a['linhas_extraidas'] for a in arquivos),
+        'linhas_quarentena': sum(a['linhas_quarentena'] for a in arquivos),
+        'linhas_fora_faixa': sum(a['linhas_fora_faixa'] for a in arquivos),
+        'linhas_duplicadas': sum(a['linhas_duplicadas'] for a in arquivos),
+        'linhas_gravadas': linhas_gravadas,
+        'segundos': time.perf_counter() - execucao['_inicio'],
+        'cpu_segundos': _cpu() - execucao['_inicio_cpu'],
+    })
+    return execucao
+
+
+def _garantir_tabela(conn, tabela, colunas):
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {tabela} ({', '.join(f'{c} {t}' for c, t in colunas.items())})")
+    existentes = {linha[1] for linha in conn.execute(f"PRAGMA table_info({tabela})")}
+    for coluna, tipo in colunas.items():
+        if coluna not in existentes:
+            conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}")
+
+
+def _inserir(conn, tabela, colunas, registros):
+    conn.executemany(
+        f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+        [tuple(r.get(c) for c in colunas) for r in registros]
+    )
+
+
+def gravar_telemetria(db_file, execucao, arquivos):
+    """Grava a execução em ingest_runs e um registro por PDF em ingest_files."""
+    os.makedirs(os.path.dirname(db_file) or '.', exist_ok=True)
+    registro = dict(execucao, etapas=json.dumps(execucao['etapas']))
+    with sqlite3.connect(db_file) as conn:
+        _garantir_tabela(conn, 'ingest_runs', COLUNAS_INGEST_RUNS)
+        _garantir_tabela(conn, 'ingest_files', COLUNAS_INGEST_FILES)
+        _inserir(conn, 'ingest_runs', list(COLUNAS_INGEST_RUNS), [registro])
+        _inserir(conn, 'ingest_files', list(COLUNAS_INGEST_FILES), arquivos)
+        conn.commit()
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+from scipy.special import stdtr
+
+# Origem fixa do eixo de tempo (em dias). Como todas as somas usam a mesma
+# origem, somas de lotes, aviários ou cargas diferentes podem ser combinadas
+# por simples adição, sem realinhamento.
+ORIGEM_TEMPO = pd.Timestamp('2025-01-01')
+
+COLUNAS_SOMAS = ['n', 'soma_t', 'soma_y', 'soma_tt', 'soma_ty', 'soma_yy']
+
+# Hierarquia padrão usada pelo dashboard: tratamento > aviário > lote
+CHAVES_TENDENCIA = ['teste', 'aviario', 'lote_composto']
+
+# Mínimo de pontos para considerar uma regressão válida
+MIN_PONTOS_TENDENCIA = 10
+
+
+def acumular_somas(df, variavel, chaves=CHAVES_TENDENCIA, coluna_tempo='data_hora'):
+    """Calcula as somas suficientes (n, Σt, Σy, Σt², Σty, Σy²) por grupo em uma única passada agrupada."""
+    chaves = list(chaves)
+    dados = df[chaves + [coluna_tempo, variavel]].dropna(subset=[coluna_tempo, variavel])
+
+    t = ((dados[coluna_tempo] - ORIGEM_TEMPO) / pd.Timedelta(days=1)).to_numpy(dtype=float)
+    y = dados[variavel].to_numpy(dtype=float)
+
+    parcelas = pd.DataFrame({
+        'n': np.ones(len(t)),
+        'soma_t': t,
+        'soma_y': y,
+        'soma_tt': t * t,
+        'soma_ty': t * y,
+        'soma_yy': y * y,
+    }, index=dados.index)
+    for chave in chaves:
+        parcelas[chave] = dados[chave]
+
+    somas = parcelas.groupby(chaves, observed=True)[COLUNAS_SOMAS].sum()
+    somas['n'] = somas['n'].astype('int64')
+    return somas
+
+
+def agregar_somas(somas, chaves):
+    """Consolida as somas em um nível mais alto da hierarquia (ex.: lote -> aviário -> tratamento)."""
+    return somas.groupby(level=list(chaves), observed=True)[COLUNAS_SOMAS].sum()
+
+
+def _estatisticas(n, sxx, sxy, syy, graus_liberdade, indice):
+    """Inclinação, R² e p-valor a partir das somas de quadrados centradas de cada grupo."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(sxx > 0, sxy / sxx, np.nan)
+        # Mesma convenção de stats.linregress: série constante tem r = 0
+        r_squared = np.where((sxx > 0) & (syy > 0), sxy * sxy / (sxx * syy), 0.0)
+        r_squared = np.clip(r_squared, 0.0, 1.0)
+
+        t_stat = np.sqrt(r_squared * graus_liberdade / (1.0 - r_squared))
+        # Bicaudal pela distribuição t (o mesmo que 2 * stats.t.sf; scipy.special carrega bem mais rápido que scipy.stats)
+        p_value = np.where(graus_liberdade > 0, 2 * stdtr(graus_liberdade, -np.abs(t_stat)), np.nan)
+        p_value = np.where(np.isnan(slope), np.nan, p_value)
+
+    resultado = pd.DataFrame({
+        'n': n,
+        'slope': slope,
+        'r_squared': r_squared,
+        'p_value': p_value,
+    }, index=indice)
+    resultado['tendencia'] = np.select(
+        [resultado['slope'] > 0, resultado['slope'] < 0],
+        ['crescente', 'decrescente'],
+        default='estável'
+    )
+    resultado['significativa'] = resultado['p_value'] < 0.05
+    return resultado
+
+
+def _centradas(somas):
+    n = somas['n'].to_numpy(dtype=float)
+    soma_t = somas['soma_t'].to_numpy()
+    soma_y = somas['soma_y'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sxx = somas['soma_tt'].to_numpy() - soma_t * soma_t / n
+        sxy = somas['soma_ty'].to_numpy() - soma_t * soma_y / n
+        syy = somas['soma_yy'].to_numpy() - soma_y * soma_y / n
+    return n, sxx, sxy, syy
+
+
+def estatisticas_tendencia(somas):
+    """Calcula inclinação (por dia), R² e p-valor de cada grupo a partir das somas acumuladas."""
+    n, sxx, sxy, syy = _centradas(somas)
+    return _estatisticas(somas['n'].to_numpy(), sxx, sxy, syy, n - 2, somas.index)
+
+
+def estatisticas_tendencia_intra(somas, chaves, bloco='lote_composto'):
+    """Inclinação (por dia) dentro dos blocos, combinada por grupo de `chaves`.
+
+    As somas de quadrados são centradas em cada bloco (lote) antes de somadas, então lotes
+    alojados em datas diferentes não viram uma tendência: é a regressão com um intercepto
+    por lote. Os graus de liberdade descontam um intercepto por bloco.
+    """
+    blocos = agregar_somas(somas, list(chaves) + [bloco])
+    n, sxx, sxy, syy = _centradas(blocos)
+    centradas = pd.DataFrame({'n': n, 'sxx': sxx, 'sxy': sxy, 'syy': syy, 'blocos': 1.0}, index=blocos.index)
+    # Blocos com uma única leitura não têm variação própria
+    centradas = centradas[centradas['n'] > 1]
+    grupos = centradas.groupby(level=list(chaves), observed=True).sum()
+    return _estatisticas(grupos['n'].to_numpy().astype('int64'), grupos['sxx'].to_numpy(), grupos['sxy'].to_numpy(),
+                         grupos['syy'].to_numpy(), (grupos['n'] - grupos['blocos'] - 1).to_numpy(), grupos.index)
@@ -0,0 +1,42 @@
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+
+from src.utils.conexao import conexao_leitura
+
+
+def _numero_publicacao(caminho_db):
+    """PRAGMA user_version gravado por publicar_banco (0 se o arquivo não for um banco SQLite)."""
+    try:
+        with conexao_leitura(caminho_db) as conn:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+    except sqlite3.DatabaseError:
+        return 0
+
+
+def versao_dados(caminho_db):
+    """Identifica a versão dos dados pelo tamanho e data de modificação do arquivo do banco.
+
+    Com leitores abertos, a publicação fica no -wal e o arquivo principal não muda: o número
+    de publicação (PRAGMA user_version) entra na versão para que ela mude mesmo assim.
+    """
+    info = os.stat(caminho_db)
+    return f"{info.st_mtime_ns}-{info.st_size}-{_numero_publicacao(caminho_db)}"
+
+
+def chave_filtro(**filtros):
+    """Gera uma chave estável (hash curto) para um conjunto de filtros."""
+    texto = json.dumps(filtros, sort_keys=True, default=str)
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()[:16]
+
+
+def limpar_arquivos_antigos(diretorio, padrao, manter):
+    """Remove os arquivos de `diretorio` que casam com `padrao`, mantendo só os `manter` usados mais recentemente."""
+    arquivos = sorted(glob.glob(os.path.join(diretorio, padrao)), key=os.path.getmtime, reverse=True)
+    for caminho in arquivos[manter:]:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+import queue
+import sqlite3
+import argparse
+import threading
+from contextlib import closing, contextmanager
+from urllib.request import pathname2url
+
+# Adicionar a raiz do projeto ao Python path (o módulo também é executado pelos scripts de carga)
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+sys.path.insert(0, project_root)
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger('conexao')
+
+# Conexões somente leitura mantidas por banco (sessões além disso aguardam uma conexão livre)
+TAMANHO_POOL = 8
+# PRAGMAs de cada conexão de leitura: leitura via mmap, cache de páginas de 32 MB e temporários em memória
+PRAGMAS_LEITURA = {
+    'query_only': 'ON',
+    'mmap_size': 256 * 2**20,
+    'cache_size': -32 * 2**10,
+    'temp_store': 'MEMORY',
+}
+# Tempo máximo (s) que a publicação espera por outro escritor
+TIMEOUT_ESCRITA = 60
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def _identidade(caminho_db):
+    """Inode e dispositivo do arquivo: mudam quando o banco é substituído por outro arquivo."""
+    info = os.stat(caminho_db)
+    return info.st_dev, info.st_ino
+
+
+class PoolLeitura:
+    """Pool de conexões somente leitura para um banco SQLite, compartilhado entre threads (sessões)."""
+
+    def __init__(self, caminho_db, tamanho=TAMANHO_POOL):
+        self.caminho_db = os.path.abspath(caminho_db)
+        self._livres = queue.LifoQueue()
+        self._vagas = threading.BoundedSemaphore(tamanho)
+
+    def _abrir(self):
+        uri = f"file:{pathname2url(self.caminho_db)}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        try:
+            conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        except sqlite3.OperationalError:
+            # Banco em WAL numa pasta somente leitura (sem -shm): como ninguém escreve ali, abre como imutável
+            conn.close()
+            conn = sqlite3.connect(f"{uri}&immutable=1", uri=True, check_same_thread=False)
+        for pragma, valor in PRAGMAS_LEITURA.items():
+            conn.execute(f"PRAGMA {pragma} = {valor}")
+        return conn, _identidade(self.caminho_db)
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão do pool; conexões de um arquivo já substituído são descartadas."""
+        with self._vagas:
+            try:
+                conn, identidade = self._livres.get_nowait()
+                if identidade != _identidade(self.caminho_db):
+                    conn.close()
+                    conn, identidade = self._abrir()
+            except queue.Empty:
+                conn, identidade = self._abrir()
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._livres.put((conn, identidade))
+
+    def fechar(self):
+        while True:
+            try:
+                conn, _ = self._livres.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+
+
+def obter_pool(caminho_db):
+    """Pool do banco, criado uma vez por processo."""
+    chave = os.path.abspath(caminho_db)
+    with _lock:
+        if chave not in _pools:
+            _pools[chave] = PoolLeitura(chave)
+        return _pools[chave]
+
+
+@contextmanager
+def conexao_leitura(caminho_db):
+    """Conexão somente leitura do pool do banco (não abre nem cria o arquivo se ele não existir)."""
+    if not os.path.exists(caminho_db):
+        raise FileNotFoundError(caminho_db)
+    with obter_pool(caminho_db).conexao() as conn:
+        yield conn
+
+
+def ativar_wal(caminho_db):
+    """Coloca o banco em modo WAL (persistente): escritores não bloqueiam leitores e vice-versa."""
+    with closing(sqlite3.connect(caminho_db, timeout=TIMEOUT_ESCRITA)) as conn:
+        return conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+
+
+def publicar_banco(origem, destino):
+    """Substitui o conteúdo de `destino` pelo de `origem` sem bloquear os leitores.
+
+    A cópia é feita pela API de backup do SQLite em uma única transação sobre o destino em
+    modo WAL: quem já está lendo continua vendo a versão anterior, e as leituras seguintes
+    veem a nova versão completa, nunca um banco pela metade.
+
+    Cada publicação grava um número novo em PRAGMA user_version, copiado na mesma transação:
+    com leitores abertos o checkpoint não devolve o WAL ao arquivo principal, e é por esse
+    número que versao_dados percebe a nova versão.
+    """
+    inicio = time.perf_counter()
+    with closing(sqlite3.connect(origem)) as fonte, \
+            closing(sqlite3.connect(destino, timeout=TIMEOUT_ESCRITA)) as alvo:
+        # Em WAL o tamanho de página do destino não muda mais; a origem é ajustada se for diferente
+        pagina_alvo = alvo.execute("PRAGMA page_size").fetchone()[0]
+        if fonte.execute("PRAGMA page_size").fetchone()[0] != pagina_alvo:
+            fonte.execute(f"PRAGMA page_size = {pagina_alvo}")
+            fonte.execute("VACUUM")
+        publicacao = max(fonte.execute("PRAGMA user_version").fetchone()[0],
+                         alvo.execute("PRAGMA user_version").fetchone()[0]) + 1
+        fonte.execute(f"PRAGMA user_version = {publicacao}")
+        fonte.commit()
+        alvo.execute("PRAGMA journal_mode = WAL")
+        fonte.backup(alvo)
+        # Devolve ao arquivo principal as páginas que nenhum leitor está usando
+        alvo.execute("PRAGMA wal_checkpoint(PASSIVE)")
+    logger.info(f"Banco publicado: {origem} -> {destino}, publicação {publicacao} "
+                f"({time.perf_counter() - inicio:.2f} s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publica um banco preparado sobre o banco do dashboard sem bloquear leitores")
+    parser.add_argument('origem', help="Banco já carregado (ex.: cópia de trabalho gerada pela carga)")
+    parser.add_argument('destino', help="Banco lido pelo dashboard (ex.: TESTE_DIATEX_PROD.db)")
+    args = parser.parse_args()
+
+    publicar_banco(args.origem, args.destino)
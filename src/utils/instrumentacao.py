@@ -0,0 +1,122 @@
+import time
+import uuid
+import sqlite3
+import datetime
+from contextlib import closing, contextmanager
+
+import pandas as pd
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger('instrumentacao')
+
+COLUNAS_TELEMETRIA = ['rodada', 'momento', 'tipo', 'nome', 'secao', 'segundos', 'linhas', 'bytes']
+# Registros da tabela telemetria_dashboard mais antigos que isto são apagados a cada gravação
+DIAS_RETENCAO_TELEMETRIA = 30
+
+
+class Instrumentacao:
+    """Mede o tempo de cada seção do dashboard e das análises chamadas dentro dela.
+
+    Cada rerun do Streamlit cria uma instância: `secao()` marca o início de um
+    bloco da página (encerrando o anterior), `medir()` envolve chamadas de
+    análise e `grafico()` registra o tamanho aproximado do JSON de cada figura.
+    """
+
+    def __init__(self, detalhado=False):
+        self.rodada = uuid.uuid4().hex[:12]
+        self.momento = datetime.datetime.now().isoformat(timespec='seconds')
+        # O tamanho do payload exige serializar a figura; só é medido no modo detalhado
+        self.detalhado = detalhado
+        self.registros = []
+        self._inicio_rodada = time.perf_counter()
+        self._secao_atual = None
+        self._inicio_secao = None
+
+    def _registrar(self, tipo, nome, segundos=None, linhas=None, tamanho=None):
+        self.registros.append({
+            'rodada': self.rodada,
+            'momento': self.momento,
+            'tipo': tipo,
+            'nome': nome,
+            'secao': self._secao_atual,
+            'segundos': segundos,
+            'linhas': linhas,
+            'bytes': tamanho,
+        })
+
+    def _fechar_secao(self):
+        if self._secao_atual is not None:
+            self._registrar('secao', self._secao_atual, time.perf_counter() - self._inicio_secao)
+
+    def secao(self, nome):
+        """Encerra a seção corrente e inicia uma nova."""
+        self._fechar_secao()
+        self._secao_atual = nome
+        self._inicio_secao = time.perf_counter()
+
+    @contextmanager
+    def medir(self, nome, linhas=None):
+        """Mede o tempo de um trecho (ex.: uma função de análise) dentro da seção corrente."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._registrar('funcao', nome, time.perf_counter() - inicio, linhas)
+
+    def grafico(self, nome, fig):
+        """Registra o tamanho aproximado (bytes do JSON) de uma figura Plotly e a devolve."""
+        if self.detalhado:
+            inicio = time.perf_counter()
+            tamanho = len(fig.to_json())
+            self._registrar('grafico', nome, time.perf_counter() - inicio, tamanho=tamanho)
+        return fig
+
+    def finalizar(self):
+        """Encerra a última seção e registra o tempo total da rodada."""
+        self._fechar_secao()
+        self._secao_atual = None
+        self._registrar('rodada', 'total', time.perf_counter() - self._inicio_rodada)
+
+    def tabela(self):
+        """Registros da rodada como DataFrame, para o painel de debug."""
+        return pd.DataFrame(self.registros, columns=COLUNAS_TELEMETRIA)
+
+    def gravar(self, caminho_db):
+        """Registra um resumo estruturado no log e, no modo detalhado, grava os registros na tabela telemetria_dashboard.
+
+        O resumo passa pelo logger assíncrono; a escrita no SQLite fica fora do caminho de
+        cada execução e só acontece quando o modo debug está ligado.
+        """
+        if self.detalhado:
+            self._gravar_tabela(caminho_db)
+
+        secoes = [r for r in self.registros if r['tipo'] == 'secao']
+        total = next((r['segundos'] for r in self.registros if r['tipo'] == 'rodada'), None)
+        mais_lenta = max(secoes, key=lambda r: r['segundos'], default=None)
+        logger.info("Execução do dashboard concluída", extra={'dados': {
+            'evento': 'rerun_dashboard',
+            'rodada': self.rodada,
+            'segundos': total,
+            'secao_mais_lenta': mais_lenta['nome'] if mais_lenta else None,
+            'segundos_secao_mais_lenta': mais_lenta['segundos'] if mais_lenta else None,
+        }})
+
+    def _gravar_tabela(self, caminho_db):
+        limite = (datetime.datetime.now() - datetime.timedelta(days=DIAS_RETENCAO_TELEMETRIA)).isoformat(timespec='seconds')
+        try:
+            with closing(sqlite3.connect(caminho_db)) as conn, conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS telemetria_dashboard (
+                        rodada TEXT, momento TEXT, tipo TEXT, nome TEXT, secao TEXT,
+                        segundos REAL, linhas INTEGER, bytes INTEGER
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_telemetria_momento ON telemetria_dashboard (momento)")
+                conn.execute("DELETE FROM telemetria_dashboard WHERE momento < ?", (limite,))
+                conn.executemany(
+                    f"INSERT INTO telemetria_dashboard VALUES ({', '.join('?' * len(COLUNAS_TELEMETRIA))})",
+                    [tuple(r[c] for c in COLUNAS_TELEMETRIA) for r in self.registros]
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Não foi possível gravar a telemetria em {caminho_db}: {e}")
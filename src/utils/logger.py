@@ -1,32 +1,115 @@
-import logging
 import os
+import json
+import queue
+import atexit
+import logging
+import threading
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Logs always go to <project root>/logs, regardless of the current working directory
+LOG_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'logs'))
+LOG_FILE = 'app.log'
+# Rotation: up to 5 backups of 10 MB each
+LOG_MAX_BYTES = 10 * 2**20
+LOG_BACKUP_COUNT = 5
+# 'texto' (default) or 'json' (one JSON object per line); can be set via DIATEX_LOG_FORMATO
+LOG_FORMATO = os.environ.get('DIATEX_LOG_FORMATO', 'texto')
+
+# One queue + listener thread per (file, format), shared by every logger that writes there
+_listeners = {}
+_lock = threading.Lock()
+
+
+class TextFormatter(logging.Formatter):
+    """Plain-text formatter; structured fields passed as extra={'dados': {...}} are appended as JSON."""
+
+    def format(self, record):
+        message = super().format(record)
+        dados = getattr(record, 'dados', None)
+        if dados:
+            message += ' | ' + json.dumps(dados, ensure_ascii=False, default=str)
+        return message
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line (JSON lines), with the structured fields at the top level."""
+
+    def format(self, record):
+        entry = {
+            'momento': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensagem': record.getMessage(),
+        }
+        dados = getattr(record, 'dados', None)
+        if dados:
+            entry.update(dados)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _get_queue_handler(log_path, formato):
+    """Create (once) the queue handler and the background listener for a log file."""
+    key = (log_path, formato)
+    with _lock:
+        if key not in _listeners:
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            if formato == 'json':
+                formatter = JsonFormatter()
+            else:
+                formatter = TextFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+            file_handler = RotatingFileHandler(log_path, maxBytes=LOG_MAX_BYTES,
+                                               backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+            file_handler.setFormatter(formatter)
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(formatter)
+
+            log_queue = queue.SimpleQueue()
+            listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+            listener.start()
+            _listeners[key] = (QueueHandler(log_queue), listener)
+        return _listeners[key][0]
+
+
+def shutdown_loggers():
+    """Flush and stop every listener thread (registered with atexit)."""
+    with _lock:
+        for _, listener in _listeners.values():
+            listener.stop()
+        _listeners.clear()
+
+
+atexit.register(shutdown_loggers)
 
-def setup_logger(name, log_file='app.log', level=logging.INFO):
-    """Function to setup a logger that writes to a file and console."""
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-    handler = logging.FileHandler(log_file)
-    handler.setFormatter(formatter)
+def setup_logger(name, log_file=None, level=logging.INFO, formato=None):
+    """Function to setup a logger that writes to a rotating file and console without blocking the caller.
 
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
+    Records are put on a queue and written by a background thread. Calling it again for
+    the same name does not add duplicate handlers: the logger keeps its first destination,
+    and a warning is logged if a different file or format is requested. Relative `log_file`
+    paths are resolved against LOG_DIR.
+    """
+    log_path = os.path.join(LOG_DIR, log_file or LOG_FILE)
+    formato = formato or LOG_FORMATO
 
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    logger.addHandler(handler)
-    logger.addHandler(console_handler)
+    existing = [h for h in logger.handlers if isinstance(h, QueueHandler)]
+    if not existing:
+        logger.addHandler(_get_queue_handler(log_path, formato))
+    elif _listeners.get((log_path, formato), (None,))[0] not in existing:
+        logger.warning(f"Logger '{name}' is already set up; ignoring the new destination {log_path} ({formato})")
 
     return logger
 
 # Example usage (can be removed if not needed for direct execution)
 if __name__ == "__main__":
-    # Ensure the logs directory exists
-    log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'logs')
-    os.makedirs(log_dir, exist_ok=True)
-    log_file_path = os.path.join(log_dir, f'app_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log')
+    log_file_path = os.path.join(LOG_DIR, f'app_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log')
 
     my_logger = setup_logger('my_app', log_file=log_file_path)
     my_logger.info('This is an info message from the example.')
     my_logger.warning('This is a warning message from the example.')
-    my_logger.error('This is an error message from the example.')
\ No newline at end of file
+    my_logger.error('This is an error message from the example.')
+    my_logger.info('Structured fields go in extra.', extra={'dados': {'linhas': 1000, 'segundos': 0.25}})
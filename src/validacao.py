@@ -0,0 +1,111 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+# Limites físicos: fora deles a leitura é impossível (erro de sensor ou de extração)
+LIMITES_FISICOS = {
+    'NH3': (0, 1000),
+    'Temperatura': (-20, 70),
+    'Humedad': (0, 100),
+}
+
+# Coluna com a faixa de cada variável, no formato "máximo-mínimo unidade" (ex.: "20-0 ppm", "35-15 °C")
+COLUNAS_FAIXA = {
+    'NH3': 'Rango_NH3',
+    'Temperatura': 'Rango_Temperatura',
+    'Humedad': 'Rango_Humedad',
+}
+
+CODIGOS_VARIAVEL = {'NH3': 'NH3', 'Temperatura': 'TEMPERATURA', 'Humedad': 'UMIDADE'}
+
+# Motivos de rejeição além dos por variável (<VAR>_INVALIDO e <VAR>_IMPOSSIVEL)
+TIMESTAMP_INVALIDO = 'TIMESTAMP_INVALIDO'
+TIMESTAMP_REGRESSAO = 'TIMESTAMP_REGRESSAO'
+
+PADRAO_FAIXA = r'(-?\d+(?:[.,]\d+)?)\s*-\s*(-?\d+(?:[.,]\d+)?)'
+
+
+def limites_faixa(faixas):
+    """Converte a coluna Rango_* em limites (mínimo, máximo), processando só os valores distintos."""
+    codigos, distintos = pd.factorize(faixas, use_na_sentinel=True)
+    partes = pd.Series(distintos, dtype='string').str.extract(PADRAO_FAIXA)
+    partes = partes.apply(lambda c: pd.to_numeric(c.str.replace(',', '.', regex=False), errors='coerce'))
+    minimos = np.append(partes.min(axis=1).to_numpy(dtype=float), np.nan)
+    maximos = np.append(partes.max(axis=1).to_numpy(dtype=float), np.nan)
+    # O código -1 (faixa ausente) aponta para o NaN acrescentado no fim
+    return minimos[codigos], maximos[codigos]
+
+
+def _distintos(serie, converter):
+    """Aplica `converter` só aos valores distintos e expande o resultado (ausentes viram NaT)."""
+    codigos, distintos = pd.factorize(serie, use_na_sentinel=True)
+    convertidos = converter(pd.Series(distintos, dtype='string')).to_numpy()
+    return np.append(convertidos, convertidos.dtype.type('NaT'))[codigos]
+
+
+def momentos_leitura(df):
+    """Fecha + Hora como datetime64 (NaT quando não for possível interpretar)."""
+    # Poucas datas e no máximo 1440 horários distintos: a conversão é feita só sobre eles
+    dias = _distintos(df['Fecha'], lambda s: pd.to_datetime(s, format='%Y-%m-%d', errors='coerce'))
+    horas = _distintos(df['Hora'], lambda s: pd.to_timedelta(
+        s.str.strip().where(s.str.count(':') == 2, s.str.strip() + ':00'), errors='coerce'))
+    return pd.Series(dias + horas, index=df.index)
+
+
+def validar_medicoes(df, chave_sequencia='Nome_Arquivo'):
+    """Valida as leituras em bloco e separa as rejeitadas.
+
+    Retorna (válidas, quarentena, resumo). A quarentena traz as colunas originais e
+    `motivo` (códigos separados por ';'); o resumo conta linhas rejeitadas, linhas fora
+    da faixa do relatório e ocorrências de cada código.
+    """
+    n = len(df)
+    # Colunas ausentes (tabelas extraídas com layout diferente) contam como valores inválidos
+    df = df.reindex(columns=df.columns.union(['Fecha', 'Hora', *LIMITES_FISICOS, *COLUNAS_FAIXA.values()], sort=False))
+    rejeicoes = {}
+    avisos = {}
+
+    for variavel, (minimo_fisico, maximo_fisico) in LIMITES_FISICOS.items():
+        codigo = CODIGOS_VARIAVEL[variavel]
+        valores = pd.to_numeric(df[variavel], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        rejeicoes[f'{codigo}_INVALIDO'] = np.isnan(valores)
+        with np.errstate(invalid='ignore'):
+            rejeicoes[f'{codigo}_IMPOSSIVEL'] = (valores < minimo_fisico) | (valores > maximo_fisico)
+            minimos, maximos = limites_faixa(df[COLUNAS_FAIXA[variavel]])
+            # Fora da faixa do relatório (alarme/escala do sensor) é só aviso: a leitura é mantida
+            avisos[f'{codigo}_FORA_FAIXA'] = (valores < minimos) | (valores > maximos)
+
+    momentos = momentos_leitura(df)
+    rejeicoes[TIMESTAMP_INVALIDO] = momentos.isna().to_numpy()
+    # Regressão: leitura com horário anterior ao da linha precedente do mesmo arquivo
+    grupos = df[chave_sequencia] if chave_sequencia in df else pd.Series(0, index=df.index)
+    anterior = momentos.groupby(grupos.to_numpy()).shift()
+    rejeicoes[TIMESTAMP_REGRESSAO] = (momentos < anterior).to_numpy()
+
+    rejeitada = np.zeros(n, dtype=bool)
+    for mascara in rejeicoes.values():
+        rejeitada |= mascara
+
+    # O texto do motivo só é montado para as linhas rejeitadas
+    motivo = np.full(int(rejeitada.sum()), '', dtype=object)
+    for codigo, mascara in rejeicoes.items():
+        selecionadas = mascara[rejeitada]
+        motivo[selecionadas] = motivo[selecionadas] + codigo + ';'
+
+    quarentena = df[rejeitada].copy()
+    quarentena['motivo'] = [m.rstrip(';') for m in motivo]
+    validas = df[~rejeitada]
+
+    fora_faixa = np.zeros(n, dtype=bool)
+    for mascara in avisos.values():
+        fora_faixa |= mascara
+    fora_faixa &= ~rejeitada
+
+    contagem = {codigo: int(m.sum()) for codigo, m in {**rejeicoes, **avisos}.items() if m.any()}
+    resumo = {
+        'linhas_quarentena': int(rejeitada.sum()),
+        'linhas_fora_faixa': int(fora_faixa.sum()),
+        'motivos': json.dumps(contagem),
+    }
+    return validas, quarentena, resumo